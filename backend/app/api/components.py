@@ -3,30 +3,170 @@ API endpoints for power grid components
 """
 
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
-from app.services.graph_service import GraphService
-from app.models.component import Component, PathToSource, PathNode, ComponentType
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Tuple
+import json
+from app.services.graph_service import GraphService, build_projection
+from app.models.component import (
+    Component,
+    ComponentPage,
+    NearestComponent,
+    PathToSource,
+    PathNode,
+    ComponentType,
+    DownstreamImpact,
+    DownstreamNode,
+    DownstreamPage,
+)
 
 router = APIRouter(prefix="/api/components", tags=["components"])
 
 
+def parse_component_types(types: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated list of component types
+    
+    Raises:
+        HTTPException: 400 if a type is not a known ComponentType
+    """
+    if not types:
+        return None
+    
+    parsed = [t.strip() for t in types.split(",") if t.strip()]
+    valid = {t.value for t in ComponentType}
+    unknown = [t for t in parsed if t not in valid]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown component type(s): {', '.join(unknown)}")
+    return parsed or None
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    Parse a "south,west,north,east" bounding box
+    
+    Raises:
+        HTTPException: 400 if the bbox is malformed
+    """
+    try:
+        parts = bbox.split(",")
+        if len(parts) != 4:
+            raise ValueError("bbox must be 'south,west,north,east'")
+        south, west, north, east = (float(x) for x in parts)
+        if south >= north or west >= east:
+            raise ValueError("Invalid bbox: south must be < north, west must be < east")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return south, west, north, east
+
+
 @router.get("/", response_model=list[Component])
-async def get_components(component_type: Optional[str] = Query(None, description="Filter by component type")):
+def get_components(
+    component_type: Optional[str] = Query(None, description="Filter by component type"),
+    bbox: Optional[str] = Query(None, description="Bounding box as south,west,north,east"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return with format=ndjson, e.g. id,type"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json (list) or ndjson (export stream)"),
+):
     """
     Get all components
     
     - Returns all power grid components
-    - Optionally filter by component type (e.g., PowerGeneration, Building)
+    - Optionally filter by component type (e.g., PowerGeneration, Building) and bbox
+    - format=ndjson streams every matching component, optionally projected with fields
+    - Use /api/components/page to page through large graphs
     """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    bbox_tuple = parse_bbox(bbox) if bbox else None
+    
     try:
-        components = GraphService.get_all_components(component_type)
-        return components
+        if format == "ndjson":
+            # Validate fields before the response starts streaming
+            build_projection(field_list)
+            lines = (
+                json.dumps(component) + "\n"
+                for component in GraphService.iter_components(component_type, field_list, bbox_tuple)
+            )
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+        
+        return GraphService.get_all_components(component_type, bbox_tuple)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching components: {str(e)}")
 
 
+@router.get("/page", response_model=ComponentPage)
+def get_components_page(
+    component_type: Optional[str] = Query(None, description="Filter by component type"),
+    limit: int = Query(500, ge=1, le=5000, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,type"),
+    bbox: Optional[str] = Query(None, description="Bounding box as south,west,north,east"),
+):
+    """
+    Get components, one page at a time
+    
+    - Returns power grid components ordered by id
+    - Optionally filter by component type and bbox, and project fields
+    - Follow next_cursor to get the next page (null on the last page)
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    bbox_tuple = parse_bbox(bbox) if bbox else None
+    
+    try:
+        components, next_cursor = GraphService.get_components_page(
+            component_type, limit, cursor, field_list, bbox_tuple
+        )
+        return ComponentPage(components=components, next_cursor=next_cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching components: {str(e)}")
+
+
+@router.get("/bbox", response_model=list[Component])
+def get_components_in_bbox(
+    bbox: str = Query(..., description="Bounding box as south,west,north,east"),
+    component_type: Optional[str] = Query(None, description="Filter by component type"),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum number of components"),
+):
+    """
+    Get components inside a bounding box
+    
+    - Uses the spatial index on component location
+    - Optionally filter by component type
+    """
+    bbox_tuple = parse_bbox(bbox)
+    
+    try:
+        return GraphService.get_components_in_bbox(bbox_tuple, component_type, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching components: {str(e)}")
+
+
+@router.get("/nearest", response_model=list[NearestComponent])
+def get_nearest_components(
+    lon: float = Query(..., ge=-180, le=180, description="Longitude"),
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    k: int = Query(1, ge=1, le=100, description="Number of components to return"),
+    max_distance: float = Query(5000, gt=0, le=50000, description="Search radius in meters"),
+    component_type: Optional[str] = Query(None, description="Filter by component type"),
+):
+    """
+    Get the components nearest to a coordinate
+    
+    Used to resolve a clicked map feature to its graph component.
+    
+    - Returns up to k components ordered by distance (closest first)
+    - Returns an empty list if nothing is within max_distance meters
+    """
+    try:
+        return GraphService.get_nearest_components(lon, lat, k, max_distance, component_type)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error finding nearest components: {str(e)}")
+
+
 @router.get("/{component_id}", response_model=Component)
-async def get_component(component_id: str):
+def get_component(component_id: str):
     """
     Get a single component by ID
     
@@ -45,7 +185,7 @@ async def get_component(component_id: str):
 
 
 @router.get("/{component_id}/path-to-source", response_model=PathToSource)
-async def get_path_to_source(component_id: str):
+def get_path_to_source(component_id: str):
     """
     Get the path from a component back to its power source
     
@@ -85,3 +225,84 @@ async def get_path_to_source(component_id: str):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error finding path: {str(e)}")
+
+
+@router.get("/{component_id}/impact", response_model=DownstreamImpact)
+def get_downstream_impact(
+    component_id: str,
+    max_depth: Optional[int] = Query(None, ge=1, description="Maximum number of FEEDS hops"),
+):
+    """
+    Get the outage radius of a component
+    
+    Counts every component fed (directly or indirectly) by the selected
+    component, grouped by component type.
+    
+    - Returns 404 if component not found
+    """
+    try:
+        component = GraphService.get_component_by_id(component_id)
+        if not component:
+            raise HTTPException(status_code=404, detail=f"Component with id '{component_id}' not found")
+        
+        counts = GraphService.get_downstream_counts(component_id, max_depth)
+        
+        return DownstreamImpact(
+            component_id=component_id,
+            counts=counts,
+            total=sum(counts.values())
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing impact: {str(e)}")
+
+
+@router.get("/{component_id}/downstream", response_model=DownstreamPage)
+def get_downstream(
+    component_id: str,
+    types: Optional[str] = Query(None, description="Comma-separated component types, e.g. Building,ServiceDrop"),
+    max_depth: Optional[int] = Query(None, ge=1, description="Maximum number of FEEDS hops"),
+    limit: int = Query(1000, ge=1, le=10000, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: bool = Query(False, description="Stream every result as NDJSON instead of paging"),
+):
+    """
+    Get the components fed by a component
+    
+    This is the reverse of path-to-source: it follows the electricity
+    flow forward to find everything that loses power if this component fails.
+    
+    - Results are ordered by component id and paginated with a cursor
+    - With stream=true, all results are streamed as newline-delimited JSON
+    - Returns 404 if component not found
+    """
+    type_filter = parse_component_types(types)
+    
+    try:
+        component = GraphService.get_component_by_id(component_id)
+        if not component:
+            raise HTTPException(status_code=404, detail=f"Component with id '{component_id}' not found")
+        
+        if stream:
+            lines = (
+                json.dumps(node) + "\n"
+                for node in GraphService.iter_downstream(component_id, type_filter, max_depth)
+            )
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+        
+        nodes, next_cursor = GraphService.get_downstream_page(
+            component_id, type_filter, max_depth, limit, cursor
+        )
+        
+        return DownstreamPage(
+            component_id=component_id,
+            components=[DownstreamNode(**node) for node in nodes],
+            next_cursor=next_cursor
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error finding downstream components: {str(e)}")
@@ -2,17 +2,64 @@
 API endpoints for Overland Park power infrastructure
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import Tuple
+import json
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional, Tuple
 from app.services.overpass_service import (
     get_overland_park_boundary,
     get_power_infrastructure,
+    get_power_layers,
+    parse_layers,
     calculate_bbox_diagonal,
+    BOUNDARY_DETAIL_TOLERANCES,
+    MAX_BBOX_DIAGONAL_KM,
 )
+from app.services.overpass_limiter import OverpassBusyError, OVERPASS_MAX_WAIT
+from app.services.topology_builder import get_power_topology
+from app.services.stats_grid import get_power_stats
+from app.services.warmup import warmup_scheduler
+from app.services.view_delta import view_index
+from app.services.power_stream import stream_power, tiles_for
+from app.services.power_export import ExportUnavailableError, prepare_export
+from app.services.executor import run_in_thread
+from app.services.metrics import PROCESSING_SECONDS
+from app.services.profiling import phase
+from app.services.startup import startup_report
 
 router = APIRouter(prefix="/api/op", tags=["overland-park"])
 
 
+def _dumps_compact(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    Parse a "south,west,north,east" bounding box small enough to fetch
+    
+    Raises:
+        HTTPException: 400 if the bbox is malformed or its diagonal is over MAX_BBOX_DIAGONAL_KM
+    """
+    try:
+        parts = bbox.split(",")
+        if len(parts) != 4:
+            raise ValueError("bbox must be 'south,west,north,east'")
+        south, west, north, east = (float(x) for x in parts)
+        if south >= north or west >= east:
+            raise ValueError("Invalid bbox: south must be < north, west must be < east")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    bbox_tuple = (south, west, north, east)
+    if calculate_bbox_diagonal(bbox_tuple) > MAX_BBOX_DIAGONAL_KM:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Zoom in - bounding box too large (max {MAX_BBOX_DIAGONAL_KM}km diagonal)"
+        )
+    return bbox_tuple
+
+
 @router.get("/health")
 async def health():
     """Health check endpoint"""
@@ -20,16 +67,30 @@ async def health():
 
 
 @router.get("/boundary")
-async def get_boundary():
+async def get_boundary(
+    detail: str = Query("full", description="Level of detail: full, high, medium or low")
+):
     """
     Get Overland Park, Kansas boundary as GeoJSON
     
+    Args:
+        detail: Level of detail (simplified variants are precomputed)
+    
     Returns:
         GeoJSON FeatureCollection with boundary polygon
     """
+    if detail not in BOUNDARY_DETAIL_TOLERANCES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"detail must be one of: {', '.join(BOUNDARY_DETAIL_TOLERANCES)}"
+        )
+    
     try:
-        boundary = await get_overland_park_boundary()
+        boundary = await get_overland_park_boundary(detail)
+        startup_report.mark_once("first_boundary")
         return boundary
+    except OverpassBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(OVERPASS_MAX_WAIT))})
     except Exception as e:
         raise HTTPException(
             status_code=502,
@@ -39,43 +100,50 @@ async def get_boundary():
 
 @router.get("/power")
 async def get_power(
-    bbox: str = Query(..., description="Bounding box as south,west,north,east")
+    bbox: str = Query(..., description="Bounding box as south,west,north,east"),
+    clip: Optional[str] = Query(None, pattern="^boundary$", description="'boundary' to clip to the city limits"),
+    layers: Optional[str] = Query(
+        None, description="Comma-separated subset of transmission,distribution,transformers"
+    ),
+    since: Optional[str] = Query(None, description="View token of the previous response, for a delta"),
 ):
     """
     Get power infrastructure for Overland Park within bounding box
     
     Args:
         bbox: Comma-separated string "south,west,north,east"
+        clip: "boundary" to drop features outside the city and cut lines at the boundary
+        layers: Only fetch these layers, each returned as its own collection
+        since: 'view' token from the previous response - only features entering
+               and leaving the view are returned
         
     Returns:
-        Dict with 'geojson' (FeatureCollection) and 'stats' (dict)
+        Dict with 'geojson' (FeatureCollection) and 'stats' (dict), or with
+        one FeatureCollection per requested layer, 'stats' and 'layers'; plus
+        the 'view' token. With a known `since`: 'delta', 'added', 'removed',
+        'stats' and 'view' instead.
     """
+    bbox_tuple = _parse_bbox(bbox)
+    
     try:
-        # Parse bbox string
-        parts = bbox.split(",")
-        if len(parts) != 4:
-            raise ValueError("bbox must be 'south,west,north,east'")
+        # Feeds the warm-up scheduler's most-requested / recent views
+        warmup_scheduler.request_log.record(bbox_tuple)
         
-        bbox_tuple = tuple(float(x) for x in parts)
-        south, west, north, east = bbox_tuple
+        if layers is not None:
+            result = await get_power_layers(bbox_tuple, parse_layers(layers), clip=clip)
+        else:
+            result = await get_power_infrastructure(bbox_tuple, clip=clip)
         
-        # Validate bbox order
-        if south >= north or west >= east:
-            raise ValueError("Invalid bbox: south must be < north, west must be < east")
+        # View token for the next request, or only what changed since the previous one
+        result = await run_in_thread(view_index.respond, result, since)
         
-        # Check bbox size
-        diagonal_km = calculate_bbox_diagonal(bbox_tuple)
-        if diagonal_km > 60:
-            raise HTTPException(
-                status_code=400,
-                detail="Zoom in - bounding box too large (max 60km diagonal)"
-            )
+        # Serialize directly (skips jsonable_encoder on large FeatureCollections) off the event loop, and time it
+        with PROCESSING_SECONDS.time("serialize"), phase("serialize"):
+            body = await run_in_thread(_dumps_compact, result)
+        return Response(content=body, media_type="application/json")
         
-        result = await get_power_infrastructure(bbox_tuple)
-        return result
-        
-    except HTTPException:
-        raise
+    except OverpassBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(OVERPASS_MAX_WAIT))})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -83,3 +151,148 @@ async def get_power(
             status_code=502,
             detail=f"Failed to fetch power infrastructure: {str(e)}"
         )
+
+
+@router.get("/power/stream")
+async def get_power_stream(
+    bbox: str = Query(..., description="Bounding box as south,west,north,east"),
+    clip: Optional[str] = Query(None, pattern="^boundary$", description="'boundary' to clip to the city limits"),
+):
+    """
+    Stream power infrastructure tile by tile as Server-Sent Events
+    
+    Cached tiles are sent right away and the rest as their Overpass
+    fetches finish, so the map can draw before the whole view is loaded.
+    
+    Args:
+        bbox: Comma-separated string "south,west,north,east"
+        clip: "boundary" to drop features outside the city and cut lines at the boundary
+        
+    Returns:
+        text/event-stream of 'start', 'tile' (GeoJSON of new features),
+        'error' (failed tile) and a final 'stats' event
+    """
+    bbox_tuple = _parse_bbox(bbox)
+    
+    try:
+        tiles_for(bbox_tuple)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    warmup_scheduler.request_log.record(bbox_tuple, tiled=True)
+    return StreamingResponse(
+        stream_power(bbox_tuple, clip=clip),
+        media_type="text/event-stream",
+        # No proxy buffering - each tile should reach the client as soon as it is sent
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/export")
+async def export_power(
+    export_format: str = Query(
+        "ndjson", alias="format", pattern="^(ndjson|flatgeobuf|geoparquet)$",
+        description="ndjson (one GeoJSON feature per line), flatgeobuf or geoparquet"
+    ),
+    clip: Optional[str] = Query(None, pattern="^boundary$", description="'boundary' to clip to the city limits"),
+):
+    """
+    Download the whole city's power network as one file
+    
+    The file is streamed in chunks, so its size doesn't matter to the
+    server. FlatGeobuf includes a packed Hilbert R-tree and GeoParquet a
+    bbox covering column (rows in Hilbert order) for spatial filtering.
+    
+    Args:
+        export_format: ndjson, flatgeobuf or geoparquet (needs pyarrow on the server)
+        clip: "boundary" to drop features outside the city and cut lines at the boundary
+        
+    Returns:
+        File download (Content-Disposition attachment)
+    """
+    try:
+        export = await prepare_export(export_format, clip=clip)
+    except ExportUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except OverpassBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(OVERPASS_MAX_WAIT))})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to export power infrastructure: {str(e)}"
+        )
+    
+    return StreamingResponse(
+        export.chunks(),
+        media_type=export.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export.filename}"'},
+    )
+
+
+@router.get("/topology")
+async def get_topology(
+    bbox: str = Query(..., description="Bounding box as south,west,north,east"),
+    tolerance: float = Query(15.0, gt=0, le=100, description="Snap tolerance in meters"),
+):
+    """
+    Get the connectivity graph of power infrastructure within bounding box
+    
+    Line endpoints and transformers are snapped to nearby lines and to each
+    other; nodes are labelled with their connected component.
+    
+    Args:
+        bbox: Comma-separated string "south,west,north,east"
+        tolerance: Snap distance in meters
+        
+    Returns:
+        Dict with 'nodes', 'edges', 'components' and 'stats'
+    """
+    bbox_tuple = _parse_bbox(bbox)
+    
+    try:
+        return await get_power_topology(bbox_tuple, tolerance)
+        
+    except OverpassBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(OVERPASS_MAX_WAIT))})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to build power topology: {str(e)}"
+        )
+
+
+@router.get("/stats")
+async def get_stats(
+    bbox: str = Query(..., description="Bounding box as south,west,north,east")
+):
+    """
+    Get power infrastructure stats only (no GeoJSON)
+    
+    Answered from a precomputed summary grid of ~1 km cells; only cold
+    cells trigger an Overpass fetch.
+    
+    Args:
+        bbox: Comma-separated string "south,west,north,east"
+        
+    Returns:
+        Stats dict (miles by type, transformer count, voltage range) plus
+        the grid-aligned 'grid_bbox' the stats describe
+    """
+    bbox_tuple = _parse_bbox(bbox)
+    
+    try:
+        return await get_power_stats(bbox_tuple)
+        
+    except OverpassBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(OVERPASS_MAX_WAIT))})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to fetch power stats: {str(e)}"
+        )
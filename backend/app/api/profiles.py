@@ -0,0 +1,46 @@
+"""
+API endpoints for downloading request profiles
+Profiles are captured by sending a request with the X-Profile-Token header;
+see app/services/profiling.py.
+"""
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import JSONResponse
+from typing import Optional
+from app.services.profiling import PROFILE_TOKEN, token_valid, list_profiles, get_profile
+
+router = APIRouter(prefix="/api/profiles", tags=["profiling"])
+
+
+def require_token(token: Optional[str]) -> None:
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set PROFILE_TOKEN)")
+    if not token_valid(token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@router.get("/")
+async def get_profiles(x_profile_token: Optional[str] = Header(None)):
+    """
+    List stored profiles (newest first)
+    
+    Returns:
+        List of profiles with id, request, total time and phase timings
+    """
+    require_token(x_profile_token)
+    return list_profiles()
+
+
+@router.get("/{profile_id}")
+async def download_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """
+    Download a profile as speedscope JSON (open at https://www.speedscope.app)
+    """
+    require_token(x_profile_token)
+    profile = get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return JSONResponse(
+        profile["speedscope"],
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.speedscope.json"'},
+    )
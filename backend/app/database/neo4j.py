@@ -2,10 +2,11 @@
 Neo4j database connection and session management
 """
 
-from neo4j import GraphDatabase
 from dotenv import load_dotenv
 import os
-from typing import Optional
+import time
+import threading
+from typing import Any, Optional
 import logging
 
 # Load environment variables from .env file
@@ -13,6 +14,13 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# After a failed on-demand connect, requests fail fast for this many seconds
+NEO4J_RECONNECT_INTERVAL = float(os.getenv("NEO4J_RECONNECT_INTERVAL", "30"))
+
+
+class Neo4jUnavailableError(RuntimeError):
+    """Neo4j isn't connected and can't be connected right now"""
+
 
 class Neo4jDriver:
     """Manages Neo4j database connection"""
@@ -21,23 +29,49 @@ class Neo4jDriver:
         self.uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
         self.user = os.getenv("NEO4J_USER", "neo4j")
         self.password = os.getenv("NEO4J_PASSWORD", "password")
-        self.driver: Optional[GraphDatabase.driver] = None
+        # Bounds how long an unreachable server can block a connect attempt
+        self.connection_timeout = float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "5"))
+        self.driver: Optional[Any] = None
+        # Set while the startup task is retrying - requests then fail fast instead of racing it
+        self.connecting_in_background = False
+        self._connect_lock = threading.Lock()
+        self._retry_at: float = 0
     
     def connect(self):
-        """Establish connection to Neo4j"""
+        """Establish connection to Neo4j (one attempt at a time; no-op when connected)"""
+        with self._connect_lock:
+            if self.driver is not None:
+                return self.driver
+            return self._connect()
+    
+    def _connect(self):
+        # Imported on first connect - the driver package is slow to import
+        # and map-only deployments never need it
+        from neo4j import GraphDatabase
+        
+        driver = None
         try:
-            self.driver = GraphDatabase.driver(
+            driver = GraphDatabase.driver(
                 self.uri, 
-                auth=(self.user, self.password)
+                auth=(self.user, self.password),
+                connection_timeout=self.connection_timeout,
+                connection_acquisition_timeout=self.connection_timeout,
             )
             # Test the connection
-            self.driver.verify_connectivity()
+            driver.verify_connectivity()
+            self.driver = driver
             logger.info(f"✅ Successfully connected to Neo4j at {self.uri}")
             return self.driver
         except Exception as e:
             logger.error(f"❌ Failed to connect to Neo4j: {e}")
+            if driver is not None:
+                driver.close()
             raise
     
+    @property
+    def connected(self) -> bool:
+        return self.driver is not None
+    
     def close(self):
         """Close database connection"""
         if self.driver:
@@ -45,10 +79,34 @@ class Neo4jDriver:
             logger.info("Neo4j connection closed")
     
     def get_session(self):
-        """Get a new database session"""
-        if not self.driver:
-            self.connect()
-        return self.driver.session()
+        """
+        Get a new database session
+        
+        Connects on demand, but never waits behind another connect attempt:
+        while the startup task owns the connection, another caller is
+        connecting, or an on-demand connect failed within
+        NEO4J_RECONNECT_INTERVAL, this raises right away instead of blocking
+        for up to NEO4J_CONNECTION_TIMEOUT.
+        
+        Raises:
+            Neo4jUnavailableError: If Neo4j isn't connected and can't be connected now
+        """
+        driver = self.driver
+        if driver is None:
+            if self.connecting_in_background:
+                raise Neo4jUnavailableError("Neo4j is still connecting")
+            if time.monotonic() < self._retry_at:
+                raise Neo4jUnavailableError("Neo4j is unavailable (retrying shortly)")
+            if not self._connect_lock.acquire(blocking=False):
+                raise Neo4jUnavailableError("Neo4j is still connecting")
+            try:
+                driver = self.driver or self._connect()
+            except Exception as e:
+                self._retry_at = time.monotonic() + NEO4J_RECONNECT_INTERVAL
+                raise Neo4jUnavailableError(f"Neo4j is unavailable: {e}") from e
+            finally:
+                self._connect_lock.release()
+        return driver.session()
     
     def test_connection(self) -> bool:
         """Test if connection to Neo4j is working"""
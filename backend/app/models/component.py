@@ -3,7 +3,7 @@ Pydantic models for power grid components
 """
 
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from enum import Enum
 
 
@@ -41,6 +41,17 @@ class Component(BaseModel):
         return Coordinates(longitude=self.longitude, latitude=self.latitude)
 
 
+class NearestComponent(Component):
+    """A component with its distance from a query point"""
+    distance_m: float
+
+
+class ComponentPage(BaseModel):
+    """One page of components (fields may be projected)"""
+    components: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
 class PathNode(BaseModel):
     """A node in the path from component to source"""
     id: str
@@ -59,3 +70,22 @@ class PathToSource(BaseModel):
     """Path from a component back to its power source"""
     component_id: str
     path: List[PathNode]
+
+
+class DownstreamNode(PathNode):
+    """A component fed by the selected component"""
+    depth: Optional[int] = None  # FEEDS hops from the selected component (when known)
+
+
+class DownstreamImpact(BaseModel):
+    """Outage radius of a component: what it feeds, counted per type"""
+    component_id: str
+    counts: Dict[str, int]
+    total: int
+
+
+class DownstreamPage(BaseModel):
+    """One page of components downstream of a component"""
+    component_id: str
+    components: List[DownstreamNode]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,149 @@
+"""
+Executors for CPU-heavy work (JSON parsing, GeoJSON building, clipping)
+Keeps the asyncio event loop free so /health and cached requests stay fast
+while a large bbox is being processed.
+"""
+
+import os
+import pickle
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from app.services.profiling import profiling_active, sampled_thread
+
+logger = logging.getLogger(__name__)
+
+# "thread" (default), "process" or "inline" (run on the event loop, for debugging)
+CPU_EXECUTOR = os.getenv("CPU_EXECUTOR", "thread").lower()
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", "2"))
+# Process-pool results larger than this (bytes) come back through shared memory
+SHARED_MEMORY_THRESHOLD = int(os.getenv("CPU_EXECUTOR_SHM_THRESHOLD", str(1024 * 1024)))
+
+_executor: Optional[Executor] = None
+_thread_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _run_in_worker(func: Callable, args: Tuple) -> Tuple[str, Any, int]:
+    """
+    Process-pool entry point
+
+    The result is pickled once here: small payloads travel back through
+    the pool pipe as bytes, large ones through a shared memory block whose
+    name is returned instead.
+    """
+    result = func(*args)
+    payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(payload) < SHARED_MEMORY_THRESHOLD:
+        return "inline_bytes", payload, len(payload)
+
+    from multiprocessing import shared_memory, resource_tracker
+
+    block = shared_memory.SharedMemory(create=True, size=len(payload))
+    block.buf[:len(payload)] = payload
+    # The parent unlinks the block; stop this worker's tracker from doing it too
+    resource_tracker.unregister(block._name, "shared_memory")
+    block.close()
+    return "shm", block.name, len(payload)
+
+
+def _read_shared_result(name: str, size: int) -> Any:
+    """Load and free a result written by _run_in_worker"""
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return pickle.loads(block.buf[:size])
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _sampled_call(func: Callable, args: Tuple) -> Any:
+    """Thread entry point for a profiled request's work (runs in a copy of its context)"""
+    with sampled_thread():
+        return func(*args)
+
+
+def _submit(loop: asyncio.AbstractEventLoop, executor: Executor, func: Callable, args: Tuple) -> "asyncio.Future":
+    """Run func on a thread executor, sampled by the request's profiler when there is one"""
+    if profiling_active():
+        return loop.run_in_executor(executor, contextvars.copy_context().run, _sampled_call, func, args)
+    return loop.run_in_executor(executor, func, *args)
+
+
+def get_executor() -> Optional[Executor]:
+    """The configured CPU executor (created on first use), None for inline mode"""
+    global _executor
+    if _executor is None and CPU_EXECUTOR != "inline":
+        if CPU_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=CPU_EXECUTOR_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=CPU_EXECUTOR_WORKERS, thread_name_prefix="cpu")
+        logger.info(f"CPU executor: {CPU_EXECUTOR} ({CPU_EXECUTOR_WORKERS} workers)")
+    return _executor
+
+
+def uses_process_pool() -> bool:
+    """Whether run_cpu_bound pickles its arguments across a process boundary"""
+    return isinstance(get_executor(), ProcessPoolExecutor)
+
+
+def _get_thread_executor() -> ThreadPoolExecutor:
+    global _thread_executor
+    if _thread_executor is None:
+        _thread_executor = ThreadPoolExecutor(max_workers=CPU_EXECUTOR_WORKERS, thread_name_prefix="cpu-local")
+    return _thread_executor
+
+
+async def run_cpu_bound(func: Callable, *args: Any) -> Any:
+    """
+    Run a pure, picklable function off the event loop
+
+    Args:
+        func: Module-level function (must be picklable for the process pool)
+        *args: Picklable arguments
+
+    Returns:
+        The function's result
+    """
+    executor = get_executor()
+    if executor is None:
+        return func(*args)
+
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, ProcessPoolExecutor):
+        kind, value, size = await loop.run_in_executor(executor, _run_in_worker, func, args)
+        if kind == "shm":
+            # Unpickling a large result is CPU work too - keep it off the loop
+            return await _submit(loop, _get_thread_executor(), _read_shared_result, (value, size))
+        # Below SHARED_MEMORY_THRESHOLD - cheap enough to load on the loop
+        return pickle.loads(value)
+
+    return await _submit(loop, executor, func, args)
+
+
+async def run_in_thread(func: Callable, *args: Any) -> Any:
+    """
+    Run CPU work that touches in-process state (caches, grids) on a thread
+
+    Used where the process pool can't help because the result lives in
+    this process's memory.
+    """
+    if CPU_EXECUTOR == "inline":
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await _submit(loop, _get_thread_executor(), func, args)
+
+
+def shutdown_executor() -> None:
+    """Stop the worker pools (called on application shutdown)"""
+    global _executor, _thread_executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _thread_executor is not None:
+        _thread_executor.shutdown(wait=False, cancel_futures=True)
+        _thread_executor = None
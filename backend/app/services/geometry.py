@@ -0,0 +1,401 @@
+"""
+Planar geometry helpers for boundary polygons
+Ring assembly from OSM ways, simplification and fast point-in-polygon tests.
+Coordinates are [lon, lat] pairs, as in GeoJSON.
+"""
+
+from typing import List, Dict, Tuple, Optional
+
+Coordinate = List[float]
+Ring = List[Coordinate]
+
+
+def _key(coordinate: Coordinate) -> Tuple[float, float]:
+    return (coordinate[0], coordinate[1])
+
+
+def assemble_rings(ways: List[Ring]) -> List[Ring]:
+    """
+    Stitch OSM way segments into closed rings
+
+    Ways of a multipolygon relation are unordered and may be reversed; ways
+    that share an endpoint are chained (reversing as needed) until the ring
+    closes. A chain that never closes (broken relation) is closed directly.
+
+    Args:
+        ways: Way coordinate lists
+
+    Returns:
+        List of closed rings (first coordinate == last coordinate)
+    """
+    remaining = [list(way) for way in ways if len(way) >= 2]
+    by_endpoint: Dict[Tuple[float, float], List[int]] = {}
+    for i, way in enumerate(remaining):
+        by_endpoint.setdefault(_key(way[0]), []).append(i)
+        by_endpoint.setdefault(_key(way[-1]), []).append(i)
+
+    used = [False] * len(remaining)
+    rings = []
+
+    for start in range(len(remaining)):
+        if used[start]:
+            continue
+        used[start] = True
+        ring = list(remaining[start])
+
+        while _key(ring[0]) != _key(ring[-1]):
+            tail = _key(ring[-1])
+            next_way = None
+            for candidate in by_endpoint.get(tail, ()):
+                if not used[candidate]:
+                    next_way = candidate
+                    break
+            if next_way is None:
+                break  # Broken relation - close below
+
+            used[next_way] = True
+            way = remaining[next_way]
+            if _key(way[0]) != tail:
+                way = way[::-1]
+            ring.extend(way[1:])
+
+        if _key(ring[0]) != _key(ring[-1]):
+            ring.append(list(ring[0]))
+        if len(ring) >= 4:
+            rings.append(ring)
+
+    return rings
+
+
+def ring_area(ring: Ring) -> float:
+    """Signed shoelace area (positive = counter-clockwise)"""
+    area = 0.0
+    for i in range(len(ring) - 1):
+        area += ring[i][0] * ring[i + 1][1] - ring[i + 1][0] * ring[i][1]
+    return area / 2.0
+
+
+def point_in_ring(lon: float, lat: float, ring: Ring) -> bool:
+    """Even-odd ray casting test"""
+    inside = False
+    for i in range(len(ring) - 1):
+        x1, y1 = ring[i][0], ring[i][1]
+        x2, y2 = ring[i + 1][0], ring[i + 1][1]
+        if (y1 > lat) != (y2 > lat):
+            if lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+    return inside
+
+
+def build_multipolygon(outer_ways: List[Ring], inner_ways: List[Ring]) -> List[List[Ring]]:
+    """
+    Build MultiPolygon coordinates from the outer and inner ways of a relation
+
+    Outer rings are wound counter-clockwise and holes clockwise (RFC 7946).
+    Each hole is assigned to the smallest outer ring that contains it.
+
+    Returns:
+        MultiPolygon coordinates: [[outer, hole, ...], ...]
+    """
+    outers = assemble_rings(outer_ways)
+    inners = assemble_rings(inner_ways)
+
+    polygons = []
+    for ring in sorted(outers, key=lambda r: abs(ring_area(r))):
+        if ring_area(ring) < 0:
+            ring = ring[::-1]
+        polygons.append([ring])
+
+    for hole in inners:
+        if ring_area(hole) > 0:
+            hole = hole[::-1]
+        lon, lat = hole[0][0], hole[0][1]
+        # Outers are sorted smallest first, so the first match is the tightest
+        for polygon in polygons:
+            if point_in_ring(lon, lat, polygon[0]):
+                polygon.append(hole)
+                break
+
+    # Largest polygon first
+    polygons.reverse()
+    return polygons
+
+
+def simplify_line(coordinates: List[Coordinate], tolerance: float) -> List[Coordinate]:
+    """
+    Douglas-Peucker simplification (iterative, keeps both endpoints)
+
+    Args:
+        coordinates: [lon, lat] pairs
+        tolerance: Maximum deviation in degrees
+    """
+    if len(coordinates) < 3:
+        return list(coordinates)
+
+    keep = [False] * len(coordinates)
+    keep[0] = keep[-1] = True
+    tolerance_sq = tolerance * tolerance
+    stack = [(0, len(coordinates) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = coordinates[first][0], coordinates[first][1]
+        x2, y2 = coordinates[last][0], coordinates[last][1]
+        dx, dy = x2 - x1, y2 - y1
+        length_sq = dx * dx + dy * dy
+
+        max_dist_sq = -1.0
+        index = -1
+        for i in range(first + 1, last):
+            px, py = coordinates[i][0], coordinates[i][1]
+            if length_sq == 0:
+                dist_sq = (px - x1) ** 2 + (py - y1) ** 2
+            else:
+                t = max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / length_sq))
+                dist_sq = (px - x1 - t * dx) ** 2 + (py - y1 - t * dy) ** 2
+            if dist_sq > max_dist_sq:
+                max_dist_sq = dist_sq
+                index = i
+
+        if index != -1 and max_dist_sq > tolerance_sq:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [c for c, kept in zip(coordinates, keep) if kept]
+
+
+def simplify_multipolygon(polygons: List[List[Ring]], tolerance: float) -> List[List[Ring]]:
+    """
+    Simplify every ring of a MultiPolygon
+
+    Rings that would collapse below a valid ring (4 points) keep their
+    original coordinates; holes that collapse are dropped.
+    """
+    simplified = []
+    for polygon in polygons:
+        rings = []
+        for i, ring in enumerate(polygon):
+            reduced = simplify_line(ring, tolerance)
+            if len(reduced) >= 4:
+                rings.append(reduced)
+            elif i == 0:
+                rings.append(ring)
+        simplified.append(rings)
+    return simplified
+
+
+class PreparedPolygon:
+    """
+    MultiPolygon prepared for many point-in-polygon and clipping operations
+
+    Edges are bucketed twice:
+      - into horizontal bands, so a point test only ray-casts against the
+        few edges whose latitude span covers the point;
+      - into a grid of cells, so clipping a segment only intersects the edges
+        in the cells it passes. Cells without edges are classified once as
+        fully inside or fully outside, which lets most segments skip
+        intersection tests entirely.
+    """
+
+    def __init__(self, polygons: List[List[Ring]], bands: int = 256, grid_size: int = 128):
+        coordinates = [c for polygon in polygons for ring in polygon for c in ring]
+        self.polygons = polygons
+        self.min_lon = min(c[0] for c in coordinates)
+        self.max_lon = max(c[0] for c in coordinates)
+        self.min_lat = min(c[1] for c in coordinates)
+        self.max_lat = max(c[1] for c in coordinates)
+
+        self.bands = bands
+        self._band_height = (self.max_lat - self.min_lat) / bands or 1.0
+        self._band_edges: List[List[Tuple[float, float, float, float]]] = [[] for _ in range(bands)]
+
+        self.grid_size = grid_size
+        self._cell_width = (self.max_lon - self.min_lon) / grid_size or 1.0
+        self._cell_height = (self.max_lat - self.min_lat) / grid_size or 1.0
+        self._cell_edges: Dict[Tuple[int, int], List[Tuple[float, float, float, float]]] = {}
+
+        for polygon in polygons:
+            for ring in polygon:
+                for i in range(len(ring) - 1):
+                    x1, y1 = ring[i][0], ring[i][1]
+                    x2, y2 = ring[i + 1][0], ring[i + 1][1]
+                    edge = (x1, y1, x2, y2)
+                    # Cells of the edge's bbox (edges are short relative to cells)
+                    for cx in range(self._cell_x(min(x1, x2)), self._cell_x(max(x1, x2)) + 1):
+                        for cy in range(self._cell_y(min(y1, y2)), self._cell_y(max(y1, y2)) + 1):
+                            self._cell_edges.setdefault((cx, cy), []).append(edge)
+                    if y1 == y2:
+                        continue  # Horizontal edges never cross the ray
+                    for band in range(self._band(min(y1, y2)), self._band(max(y1, y2)) + 1):
+                        self._band_edges[band].append(edge)
+
+        # Inside/outside state of every edge-free cell, tested once at its center
+        self._cell_inside: Dict[Tuple[int, int], bool] = {}
+        for cx in range(grid_size):
+            for cy in range(grid_size):
+                if (cx, cy) not in self._cell_edges:
+                    self._cell_inside[(cx, cy)] = self.contains(
+                        self.min_lon + (cx + 0.5) * self._cell_width,
+                        self.min_lat + (cy + 0.5) * self._cell_height,
+                    )
+
+    def _band(self, lat: float) -> int:
+        band = int((lat - self.min_lat) / self._band_height)
+        return min(max(band, 0), self.bands - 1)
+
+    def _cell_x(self, lon: float) -> int:
+        cell = int((lon - self.min_lon) / self._cell_width)
+        return 0 if cell < 0 else (self.grid_size - 1 if cell >= self.grid_size else cell)
+
+    def _cell_y(self, lat: float) -> int:
+        cell = int((lat - self.min_lat) / self._cell_height)
+        return 0 if cell < 0 else (self.grid_size - 1 if cell >= self.grid_size else cell)
+
+    @property
+    def bbox(self) -> Tuple[float, float, float, float]:
+        """(south, west, north, east)"""
+        return self.min_lat, self.min_lon, self.max_lat, self.max_lon
+
+    def contains(self, lon: float, lat: float) -> bool:
+        """Even-odd test over all rings (holes are subtracted)"""
+        if not (self.min_lon <= lon <= self.max_lon and self.min_lat <= lat <= self.max_lat):
+            return False
+
+        inside = False
+        for x1, y1, x2, y2 in self._band_edges[self._band(lat)]:
+            if (y1 > lat) != (y2 > lat):
+                if lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+                    inside = not inside
+        return inside
+
+    def _segment_state(self, x1: float, y1: float, x2: float, y2: float):
+        """
+        Classify a segment by the cells its bbox covers
+
+        Returns:
+            (state, edges): state is True/False when the segment is certainly
+            inside/outside, None when edges must be intersected
+        """
+        lo_x, hi_x = (x1, x2) if x1 <= x2 else (x2, x1)
+        lo_y, hi_y = (y1, y2) if y1 <= y2 else (y2, y1)
+        if hi_x < self.min_lon or lo_x > self.max_lon or hi_y < self.min_lat or lo_y > self.max_lat:
+            return False, None
+
+        cx0, cx1 = self._cell_x(lo_x), self._cell_x(hi_x)
+        cy0, cy1 = self._cell_y(lo_y), self._cell_y(hi_y)
+        cell_edges = self._cell_edges
+        cell_inside = self._cell_inside
+
+        # Fast path: short segment within a single cell
+        if cx0 == cx1 and cy0 == cy1:
+            edges = cell_edges.get((cx0, cy0))
+            if edges is None:
+                return cell_inside[(cx0, cy0)], None
+            return None, edges
+
+        edges = []
+        states = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                found = cell_edges.get((cx, cy))
+                if found:
+                    edges.extend(found)
+                else:
+                    states.add(cell_inside[(cx, cy)])
+
+        # Without edges in its cells the segment can't cross the boundary
+        if not edges and len(states) == 1:
+            return states.pop(), None
+        return None, edges
+
+    def clip_line(self, coordinates: List[Coordinate]) -> Tuple[List[List[Coordinate]], bool]:
+        """
+        Clip a LineString to the polygon
+
+        Each segment is split at its exact crossings with boundary edges and
+        every piece is kept or dropped by a midpoint test.
+
+        Args:
+            coordinates: [lon, lat] pairs
+
+        Returns:
+            Tuple of (inside pieces, each with >= 2 coordinates; True when the
+            whole line is inside and the only piece is the line itself)
+        """
+        pieces: List[List[Coordinate]] = []
+        current: List[Coordinate] = []
+        # Stays True while every segment is kept whole
+        unclipped = True
+
+        # Whole line outside the polygon bbox
+        if (max(c[0] for c in coordinates) < self.min_lon or min(c[0] for c in coordinates) > self.max_lon
+                or max(c[1] for c in coordinates) < self.min_lat or min(c[1] for c in coordinates) > self.max_lat):
+            return pieces, False
+
+        def keep(start: Coordinate, end: Coordinate):
+            nonlocal current
+            if current and current[-1][0] == start[0] and current[-1][1] == start[1]:
+                current.append(end)
+            else:
+                if len(current) >= 2:
+                    pieces.append(current)
+                current = [start, end]
+
+        for i in range(len(coordinates) - 1):
+            a, b = coordinates[i], coordinates[i + 1]
+            x1, y1, x2, y2 = a[0], a[1], b[0], b[1]
+            state, edges = self._segment_state(x1, y1, x2, y2)
+
+            if state is True:
+                keep(a, b)
+                continue
+            if state is False:
+                unclipped = False
+                continue
+
+            # Crossing parameters along a -> b
+            dx, dy = x2 - x1, y2 - y1
+            ts = [0.0, 1.0]
+            for ex1, ey1, ex2, ey2 in edges:
+                edx, edy = ex2 - ex1, ey2 - ey1
+                denominator = dx * edy - dy * edx
+                if denominator == 0:
+                    continue  # Parallel
+                t = ((ex1 - x1) * edy - (ey1 - y1) * edx) / denominator
+                u = ((ex1 - x1) * dy - (ey1 - y1) * dx) / denominator
+                if 0.0 < t < 1.0 and 0.0 <= u <= 1.0:
+                    ts.append(t)
+            # Crossings at a boundary vertex are found on both adjacent edges
+            ts.sort()
+            ts = [t for i, t in enumerate(ts) if i == 0 or t - ts[i - 1] > 1e-12]
+            if ts[-1] != 1.0:
+                ts[-1] = 1.0
+
+            if len(ts) > 2:
+                unclipped = False
+            for t0, t1 in zip(ts, ts[1:]):
+                tm = (t0 + t1) / 2
+                if self.contains(x1 + dx * tm, y1 + dy * tm):
+                    start = a if t0 == 0.0 else [x1 + dx * t0, y1 + dy * t0]
+                    end = b if t1 == 1.0 else [x1 + dx * t1, y1 + dy * t1]
+                    keep(start, end)
+                else:
+                    unclipped = False
+
+        if len(current) >= 2:
+            pieces.append(current)
+        return pieces, unclipped and len(pieces) == 1
+
+
+def multipolygon_bbox(polygons: List[List[Ring]]) -> Optional[Tuple[float, float, float, float]]:
+    """(south, west, north, east) of MultiPolygon coordinates, None if empty"""
+    coordinates = [c for polygon in polygons for ring in polygon for c in ring]
+    if not coordinates:
+        return None
+    return (
+        min(c[1] for c in coordinates),
+        min(c[0] for c in coordinates),
+        max(c[1] for c in coordinates),
+        max(c[0] for c in coordinates),
+    )
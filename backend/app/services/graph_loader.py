@@ -0,0 +1,196 @@
+"""
+Bulk loader from Overpass power data into the Neo4j graph
+Writes Component nodes and inferred FEEDS relationships in large batched,
+idempotent UNWIND ... MERGE transactions: nodes on parallel workers,
+relationships one batch at a time.
+"""
+
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple
+
+from neo4j import SummaryCounters
+
+from app.database.neo4j import neo4j_driver
+from app.models.component import ComponentType
+from app.services.topology_builder import (
+    build_component_records,
+    infer_connections,
+    orient_feeds,
+    supply_sources,
+)
+from app.services.topology_cache import bump_topology_version
+from app.services.upstream_index import rebuild_upstream_index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_WORKERS = 4
+
+# Labels can't be parameters, so each type gets its own statement.
+# Only ComponentType values ever reach the query text.
+_MERGE_NODES_QUERY = """
+    UNWIND $rows AS row
+    MERGE (c:Component {{id: row.id}})
+    SET c:{label},
+        c.name = row.name,
+        c.type = row.type,
+        c.longitude = row.longitude,
+        c.latitude = row.latitude,
+        c.location = point({{longitude: row.longitude, latitude: row.latitude}}),
+        c += row.properties
+"""
+
+_MERGE_FEEDS_QUERY = """
+    UNWIND $rows AS row
+    MATCH (a:Component {id: row.source})
+    MATCH (b:Component {id: row.target})
+    MERGE (a)-[r:FEEDS]->(b)
+    SET r.load_id = row.load_id
+"""
+
+# FEEDS between loader-owned components that this load didn't write are stale
+_DELETE_STALE_FEEDS_QUERY = """
+    UNWIND $rows AS row
+    MATCH (a:Component {id: row.id})-[r:FEEDS]->(b:Component)
+    WHERE b.source IN ['osm', 'inferred'] AND coalesce(r.load_id, '') <> row.load_id
+    DELETE r
+"""
+
+
+def _chunks(rows: List[Any], size: int) -> List[List[Any]]:
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def _write_batch(query: str, rows: List[Dict[str, Any]]) -> SummaryCounters:
+    """Write one batch in its own managed transaction (retried on transient errors)"""
+    def work(tx):
+        return tx.run(query, rows=rows).consume().counters
+
+    with neo4j_driver.get_session() as session:
+        return session.execute_write(work)
+
+
+def _run_parallel(query_rows: List[Tuple[str, List[Dict[str, Any]]]], workers: int) -> List[SummaryCounters]:
+    """Batches on parallel sessions - only for batches that never touch the same nodes"""
+    if not query_rows:
+        return []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda item: _write_batch(*item), query_rows))
+
+
+def _run_sequential(query_rows: List[Tuple[str, List[Dict[str, Any]]]]) -> List[SummaryCounters]:
+    """
+    Batches one after another
+
+    Relationship writes lock both endpoints, and batches share hubs (one
+    substation feeding many lines), so parallel writers would deadlock.
+    """
+    return [_write_batch(query, rows) for query, rows in query_rows]
+
+
+def build_graph(features: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+    """
+    Turn power features into Component records and FEEDS edges
+
+    Includes the inferred grid-supply PowerGeneration sources, so paths to
+    source and the upstream index have somewhere to end.
+
+    Args:
+        features: GeoJSON features from get_power_infrastructure
+
+    Returns:
+        Tuple of (component records, (source_id, target_id) FEEDS edges)
+    """
+    records = build_component_records(features)
+    connections = infer_connections(features)
+    edges = orient_feeds(features, connections)
+    sources, source_edges = supply_sources(records, connections, edges)
+    return records + sources, source_edges + edges
+
+
+def load_graph(
+    records: List[Dict[str, Any]],
+    edges: List[Tuple[str, str]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+) -> Dict[str, Any]:
+    """
+    Write components and FEEDS relationships to Neo4j
+
+    Nodes are written before relationships; node batches run on parallel
+    workers, relationship batches sequentially. Everything is MERGEd on
+    component id, so re-running an import updates in place instead of
+    duplicating; FEEDS edges from a previous import that this one no
+    longer infers are deleted.
+
+    Args:
+        records: Component records from build_graph
+        edges: FEEDS edges from build_graph
+        batch_size: Rows per transaction
+        workers: Parallel writer sessions for nodes
+
+    Returns:
+        Dict with counts (edges actually written, created and skipped
+        because an endpoint is missing), elapsed seconds and nodes/edges
+        per second
+    """
+    valid_types = {t.value for t in ComponentType}
+    by_type: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        if record["type"] not in valid_types:
+            raise ValueError(f"Unknown component type: {record['type']}")
+        by_type.setdefault(record["type"], []).append(record)
+
+    start_time = time.time()
+
+    node_batches = [
+        (_MERGE_NODES_QUERY.format(label=component_type), chunk)
+        for component_type, rows in by_type.items()
+        for chunk in _chunks(rows, batch_size)
+    ]
+    _run_parallel(node_batches, workers)
+    # Every row MERGEs its node, so all of them are written
+    node_count = sum(len(rows) for _, rows in node_batches)
+    node_seconds = time.time() - start_time
+
+    load_id = uuid.uuid4().hex
+    edge_rows = [{"source": source, "target": target, "load_id": load_id} for source, target in edges]
+    edge_batches = [(_MERGE_FEEDS_QUERY, chunk) for chunk in _chunks(edge_rows, batch_size)]
+    edge_counters = _run_sequential(edge_batches)
+    # One load_id SET per row whose endpoints both matched
+    edge_count = sum(counters.properties_set for counters in edge_counters)
+    edges_created = sum(counters.relationships_created for counters in edge_counters)
+    edges_skipped = len(edge_rows) - edge_count
+    if edges_skipped:
+        logger.warning(f"⚠️ {edges_skipped} FEEDS row(s) skipped - endpoint component not found")
+
+    stale_rows = [{"id": record["id"], "load_id": load_id} for record in records]
+    stale_batches = [(_DELETE_STALE_FEEDS_QUERY, chunk) for chunk in _chunks(stale_rows, batch_size)]
+    edges_deleted = sum(counters.relationships_deleted for counters in _run_sequential(stale_batches))
+    elapsed = time.time() - start_time
+
+    with neo4j_driver.get_session() as session:
+        bump_topology_version(session)
+
+    # Every edge may have changed, so a full rebuild is cheaper than subtree refreshes
+    upstream = rebuild_upstream_index(batch_size=batch_size)
+
+    summary = {
+        "nodes": node_count,
+        "edges": edge_count,
+        "edges_created": edges_created,
+        "edges_skipped": edges_skipped,
+        "edges_deleted": edges_deleted,
+        "seconds": round(elapsed, 3),
+        "nodes_per_second": round(node_count / node_seconds, 1) if node_seconds > 0 else None,
+        "edges_per_second": round(edge_count / (elapsed - node_seconds), 1) if elapsed > node_seconds else None,
+        "upstream_index_seconds": upstream["seconds"],
+    }
+    logger.info(
+        f"✅ Loaded {node_count} components and {edge_count} FEEDS in {elapsed:.2f}s "
+        f"({summary['nodes_per_second']} nodes/s, {summary['edges_per_second']} edges/s)"
+    )
+    return summary
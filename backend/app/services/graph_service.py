@@ -2,21 +2,88 @@
 Graph traversal and Neo4j query services
 """
 
-from typing import List, Dict, Any, Optional
+import base64
+import json
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from app.database.neo4j import neo4j_driver
+from app.services.topology_cache import topology_cache, fetch_topology_version
+from app.services.upstream_index import path_from_index
+from app.services.metrics import timed_query
+
+# Hop limit for downstream traversals answered by Neo4j
+DEFAULT_DOWNSTREAM_DEPTH = 100
+
+# Sorted id lists of Neo4j downstream expansions (with their topology version) kept for cursor paging
+DOWNSTREAM_ID_CACHE_SIZE = 64
+
+# Nearest-component search: first radius (meters) and growth factor per round
+NEAREST_INITIAL_RADIUS_M = 100.0
+NEAREST_RADIUS_GROWTH = 4.0
+
+# Component properties that can be requested through field projection
+COMPONENT_FIELDS = ("id", "name", "type", "longitude", "latitude")
+
+
+_downstream_ids: "OrderedDict[tuple, Tuple[str, List[str]]]" = OrderedDict()
+_downstream_ids_lock = threading.Lock()
+
+
+def encode_cursor(component_id: str) -> str:
+    """Encode a keyset position (the last component id) as an opaque URL-safe cursor"""
+    raw = json.dumps([component_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        (component_id,) = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return str(component_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def build_projection(fields: Optional[List[str]] = None) -> str:
+    """
+    Build the Cypher RETURN items for a field projection
+    
+    Raises:
+        ValueError: If a field is not in COMPONENT_FIELDS
+    """
+    if not fields:
+        fields = list(COMPONENT_FIELDS)
+    
+    unknown = [f for f in fields if f not in COMPONENT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    
+    # id is always returned - it is part of the cursor
+    selected = ["id"] + [f for f in COMPONENT_FIELDS if f in fields and f != "id"]
+    return ", ".join(f"n.{f} as {f}" for f in selected)
 
 
 class GraphService:
     """Service for graph operations"""
     
     @staticmethod
+    @timed_query("get_path_to_source")
     def get_path_to_source(component_id: str) -> List[Dict[str, Any]]:
         """
         Find the path from a component back to its power source
         
-        This uses Neo4j's variable-length relationship traversal to find
-        all paths from PowerGeneration nodes to the specified component,
-        then returns the longest path (most complete chain).
+        Follows the materialized UPSTREAM pointers when the upstream index
+        is current; otherwise uses Neo4j's variable-length relationship
+        traversal to find all paths from PowerGeneration nodes to the
+        specified component, then returns the longest path (most complete chain).
         
         Args:
             component_id: ID of the component to trace back from
@@ -24,7 +91,18 @@ class GraphService:
         Returns:
             List of components in the path from source to target (ordered source -> target)
         """
+        # Answer from the in-memory topology when it is enabled and knows the component
+        if topology_cache.ensure_fresh():
+            cached_path = topology_cache.path_to_source(component_id)
+            if cached_path is not None:
+                return cached_path
+        
         with neo4j_driver.get_session() as session:
+            # O(depth) pointer chase over the precomputed index
+            indexed_path = path_from_index(session, component_id)
+            if indexed_path is not None:
+                return indexed_path
+            
             # Find all paths from any PowerGeneration to the selected component
             # [:FEEDS*] means "follow FEEDS relationships any number of times"
             query = """
@@ -58,50 +136,382 @@ class GraphService:
             return nodes
     
     @staticmethod
-    def get_all_components(component_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    @timed_query("get_downstream_counts")
+    def get_downstream_counts(component_id: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """
+        Count downstream components per component type (outage radius)
+        
+        With the topology cache enabled, unlimited-depth counts are read from
+        precomputed subtree sizes instead of walking the graph.
+        
+        Args:
+            component_id: ID of the component to start from
+            max_depth: Optional maximum number of FEEDS hops
+            
+        Returns:
+            Dict mapping component type to number of downstream components
+        """
+        # Both paths apply the same hop limit (the cache skips it when it cuts nothing off)
+        depth = max(1, int(max_depth or DEFAULT_DOWNSTREAM_DEPTH))
+        if topology_cache.ensure_fresh():
+            cached_counts = topology_cache.downstream_counts(component_id, depth)
+            if cached_counts is not None:
+                return cached_counts
+        
+        with neo4j_driver.get_session() as session:
+            # DISTINCT without returning the path lets Neo4j prune the expansion
+            query = f"""
+                MATCH (start:Component {{id: $component_id}})-[:FEEDS*1..{depth}]->(d:Component)
+                WITH DISTINCT d
+                RETURN d.type as type, count(*) as count
+            """
+            result = session.run(query, component_id=component_id)
+            return {record["type"]: record["count"] for record in result}
+    
+    @staticmethod
+    @timed_query("get_downstream_page")
+    def get_downstream_page(
+        component_id: str,
+        types: Optional[List[str]] = None,
+        max_depth: Optional[int] = None,
+        limit: int = 1000,
+        after: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of downstream components, ordered by id
+        
+        On Neo4j the FEEDS expansion runs on the first page; its sorted ids
+        are kept (with the topology version they were expanded at) so
+        following pages only look up their own components and hop depths,
+        and a first page on an unchanged topology reuses them.
+        
+        Args:
+            component_id: ID of the component to start from
+            types: Optional component types to keep (e.g. ["Building", "ServiceDrop"])
+            max_depth: Optional maximum number of FEEDS hops (default DEFAULT_DOWNSTREAM_DEPTH)
+            limit: Page size
+            after: next_cursor from the previous page
+            
+        Returns:
+            Tuple of (components, next cursor or None on the last page)
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        depth = max(1, int(max_depth or DEFAULT_DOWNSTREAM_DEPTH))
+        after_id = decode_cursor(after) if after else None
+        if topology_cache.ensure_fresh():
+            cached_page = topology_cache.downstream_page(component_id, types, depth, limit, after_id)
+            if cached_page is not None:
+                nodes, last_id = cached_page
+                return nodes, encode_cursor(last_id) if last_id is not None else None
+        
+        with neo4j_driver.get_session() as session:
+            key = (component_id, tuple(sorted(types)) if types else None, depth)
+            with _downstream_ids_lock:
+                entry = _downstream_ids.get(key)
+                if entry is not None:
+                    _downstream_ids.move_to_end(key)
+            # Follow-up pages page through the id list their first page expanded
+            if entry is None or after_id is None:
+                version = fetch_topology_version(session)
+                if entry is None or entry[0] != version:
+                    query = f"""
+                        MATCH (start:Component {{id: $component_id}})-[:FEEDS*1..{depth}]->(d:Component)
+                        WITH DISTINCT d
+                        WHERE $types IS NULL OR d.type IN $types
+                        RETURN d.id as id
+                        ORDER BY d.id
+                    """
+                    result = session.run(query, component_id=component_id, types=types or None)
+                    entry = (version, [record["id"] for record in result])
+                    with _downstream_ids_lock:
+                        _downstream_ids[key] = entry
+                        while len(_downstream_ids) > DOWNSTREAM_ID_CACHE_SIZE:
+                            _downstream_ids.popitem(last=False)
+            sorted_ids = entry[1]
+            
+            start = bisect_right(sorted_ids, after_id) if after_id is not None else 0
+            page_ids = sorted_ids[start:start + limit]
+            result = session.run(f"""
+                MATCH (start:Component {{id: $component_id}})
+                UNWIND $ids AS id
+                MATCH (d:Component {{id: id}})
+                MATCH p = shortestPath((start)-[:FEEDS*1..{depth}]->(d))
+                RETURN d.id as id, d.name as name, d.type as type,
+                       d.longitude as longitude, d.latitude as latitude,
+                       min(length(p)) as depth
+                ORDER BY d.id
+            """, component_id=component_id, ids=page_ids)
+            nodes = [record.data() for record in result]
+        
+        next_cursor = encode_cursor(page_ids[-1]) if page_ids and start + limit < len(sorted_ids) else None
+        return nodes, next_cursor
+    
+    @staticmethod
+    def iter_downstream(
+        component_id: str,
+        types: Optional[List[str]] = None,
+        max_depth: Optional[int] = None,
+        page_size: int = 5000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream every downstream component
+        
+        Neo4j answers with one query whose records are consumed as they
+        arrive; the topology cache is read page by page. The source is
+        picked from the first page, so a stream never mixes the two, and
+        either way the FEEDS expansion runs once.
+        
+        Args:
+            component_id: ID of the component to start from
+            types: Optional component types to keep
+            max_depth: Optional maximum number of FEEDS hops (default DEFAULT_DOWNSTREAM_DEPTH)
+            page_size: Number of components fetched per round trip
+            
+        Yields:
+            Downstream component dictionaries ordered by id
+        """
+        depth = max(1, int(max_depth or DEFAULT_DOWNSTREAM_DEPTH))
+        page = None
+        if topology_cache.ensure_fresh():
+            page = topology_cache.downstream_page(component_id, types, depth, page_size)
+        if page is not None:
+            while True:
+                nodes, cursor = page
+                yield from nodes
+                if cursor is None:
+                    return
+                page = topology_cache.downstream_page(component_id, types, depth, page_size, cursor)
+                if page is None:
+                    # Restarting on Neo4j would repeat the rows already sent
+                    raise RuntimeError("Topology cache dropped while streaming downstream components")
+        
+        with neo4j_driver.get_session() as session:
+            query = f"""
+                MATCH (start:Component {{id: $component_id}})-[:FEEDS*1..{depth}]->(d:Component)
+                WITH DISTINCT start, d
+                WHERE $types IS NULL OR d.type IN $types
+                MATCH p = shortestPath((start)-[:FEEDS*1..{depth}]->(d))
+                RETURN d.id as id, d.name as name, d.type as type,
+                       d.longitude as longitude, d.latitude as latitude,
+                       length(p) as depth
+                ORDER BY d.id
+            """
+            for record in session.run(query, component_id=component_id, types=types or None):
+                yield record.data()
+    
+    @staticmethod
+    @timed_query("get_components_page")
+    def get_components_page(
+        component_type: Optional[str] = None,
+        limit: int = 500,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of components ordered by id
+        
+        Uses keyset pagination on the stored id: the cursor encodes the id of
+        the last row, and (type, id) / id are both range-indexed, so every
+        page is an index seek that reads only its own rows.
+        
+        Args:
+            component_type: Optional filter by component type (e.g., "PowerGeneration")
+            limit: Page size
+            cursor: next_cursor from the previous page
+            fields: Optional subset of COMPONENT_FIELDS to return (id is always included)
+            bbox: Optional (south, west, north, east) filter on component location
+            
+        Returns:
+            Tuple of (components, next cursor or None on the last page)
+            
+        Raises:
+            ValueError: If the cursor or a field name is invalid
+        """
+        after = decode_cursor(cursor) if cursor else None
+        projection = build_projection(fields)
+        
+        # Only the filters in use go into the query - "$x IS NULL OR ..." hides the indexes from the planner
+        conditions = ["n.id > $after" if after is not None else "n.id IS NOT NULL"]
+        order = "n.id"
+        if component_type:
+            conditions.append("n.type = $component_type")
+            order = "n.type, n.id"
+        if bbox:
+            conditions.append("""point.withinBBox(
+                       n.location,
+                       point({longitude: $west, latitude: $south}),
+                       point({longitude: $east, latitude: $north}))""")
+        south, west, north, east = bbox if bbox else (None, None, None, None)
+        
+        with neo4j_driver.get_session() as session:
+            # Fetch one extra row to know whether another page exists
+            query = f"""
+                MATCH (n:Component)
+                WHERE {" AND ".join(conditions)}
+                RETURN {projection}
+                ORDER BY {order}
+                LIMIT $limit
+            """
+            result = session.run(
+                query,
+                component_type=component_type,
+                south=south, west=west, north=north, east=east,
+                after=after,
+                limit=limit + 1,
+            )
+            rows = [record.data() for record in result]
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["id"])
+        
+        return rows, next_cursor
+    
+    @staticmethod
+    def iter_components(
+        component_type: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        page_size: int = 5000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream every component page by page (for full exports)
+        
+        Each page is a short transaction and an index seek past the previous
+        one, so memory, session time and per-page cost stay bounded however
+        large the graph is.
+        
+        Yields:
+            Component dictionaries in id order
+        """
+        cursor = None
+        while True:
+            rows, cursor = GraphService.get_components_page(
+                component_type, page_size, cursor, fields, bbox
+            )
+            yield from rows
+            if cursor is None:
+                break
+    
+    @staticmethod
+    def get_all_components(
+        component_type: Optional[str] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Get all components, optionally filtered by type
         
+        Loads everything into memory - prefer get_components_page or
+        iter_components for large graphs.
+        
         Args:
             component_type: Optional filter by component type (e.g., "PowerGeneration")
+            bbox: Optional (south, west, north, east) filter on component location
             
         Returns:
-            List of all components with their properties
+            List of all components with their properties, ordered by type and name
         """
+        components = list(GraphService.iter_components(component_type, bbox=bbox))
+        components.sort(key=lambda c: (c.get("type") or "", c.get("name") or ""))
+        return components
+    
+    @staticmethod
+    @timed_query("get_components_in_bbox")
+    def get_components_in_bbox(
+        bbox: Tuple[float, float, float, float],
+        component_type: Optional[str] = None,
+        limit: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get components inside a bounding box using the location point index
+        
+        Args:
+            bbox: (south, west, north, east) in decimal degrees
+            component_type: Optional filter by component type
+            limit: Maximum number of components to return
+            
+        Returns:
+            List of components inside the bbox
+        """
+        south, west, north, east = bbox
         with neo4j_driver.get_session() as session:
-            if component_type:
-                # Filter by type
-                query = """
-                    MATCH (n:Component)
-                    WHERE n.type = $component_type
-                    RETURN n.id as id, n.name as name, n.type as type, 
-                           n.longitude as longitude, n.latitude as latitude
-                    ORDER BY n.type, n.name
-                """
-                result = session.run(query, component_type=component_type)
-            else:
-                # Get all components
-                query = """
-                    MATCH (n:Component)
-                    RETURN n.id as id, n.name as name, n.type as type,
-                           n.longitude as longitude, n.latitude as latitude
-                    ORDER BY n.type, n.name
-                """
-                result = session.run(query)
-            
-            components = []
-            for record in result:
-                components.append({
-                    "id": record["id"],
-                    "name": record["name"],
-                    "type": record["type"],
-                    "longitude": record["longitude"],
-                    "latitude": record["latitude"],
-                })
+            query = """
+                MATCH (n:Component)
+                WHERE point.withinBBox(
+                        n.location,
+                        point({longitude: $west, latitude: $south}),
+                        point({longitude: $east, latitude: $north}))
+                  AND ($component_type IS NULL OR n.type = $component_type)
+                RETURN n.id as id, n.name as name, n.type as type,
+                       n.longitude as longitude, n.latitude as latitude
+                LIMIT $limit
+            """
+            result = session.run(
+                query,
+                south=south, west=west, north=north, east=east,
+                component_type=component_type,
+                limit=limit,
+            )
+            return [record.data() for record in result]
+    
+    @staticmethod
+    @timed_query("get_nearest_components")
+    def get_nearest_components(
+        longitude: float,
+        latitude: float,
+        k: int = 1,
+        max_distance_m: float = 5000.0,
+        component_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the k components nearest to a coordinate
+        
+        Searches an expanding radius so each round is a small, index-backed
+        distance query instead of sorting the whole graph by distance.
+        
+        Args:
+            longitude: Query longitude
+            latitude: Query latitude
+            k: Number of components to return
+            max_distance_m: Give up beyond this radius (meters)
+            component_type: Optional filter by component type
             
-            return components
+        Returns:
+            Up to k components ordered by distance, each with 'distance_m'
+        """
+        query = """
+            WITH point({longitude: $longitude, latitude: $latitude}) as origin
+            MATCH (n:Component)
+            WHERE point.distance(n.location, origin) <= $radius
+              AND ($component_type IS NULL OR n.type = $component_type)
+            RETURN n.id as id, n.name as name, n.type as type,
+                   n.longitude as longitude, n.latitude as latitude,
+                   point.distance(n.location, origin) as distance_m
+            ORDER BY distance_m
+            LIMIT $k
+        """
+        radius = min(NEAREST_INITIAL_RADIUS_M, max_distance_m)
+        with neo4j_driver.get_session() as session:
+            while True:
+                result = session.run(
+                    query,
+                    longitude=longitude,
+                    latitude=latitude,
+                    radius=radius,
+                    component_type=component_type,
+                    k=k,
+                )
+                components = [record.data() for record in result]
+                if len(components) >= k or radius >= max_distance_m:
+                    return components
+                radius = min(radius * NEAREST_RADIUS_GROWTH, max_distance_m)
     
     @staticmethod
+    @timed_query("get_component_by_id")
     def get_component_by_id(component_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a single component by its ID
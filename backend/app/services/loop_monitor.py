@@ -0,0 +1,69 @@
+"""
+Event-loop lag monitor
+A background task sleeps for a fixed interval and records how late it
+wakes up - the time the loop was blocked by synchronous work.
+"""
+
+import asyncio
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, Optional
+
+from app.services.metrics import EVENT_LOOP_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_INTERVAL = 0.1  # seconds between samples
+LOOP_LAG_WINDOW = 600    # samples kept (~1 minute)
+LOOP_LAG_WARN_MS = 200   # log a warning when a single stall exceeds this
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag in a background task"""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, window: int = LOOP_LAG_WINDOW):
+        self.interval = interval
+        self.samples: deque = deque(maxlen=window)
+        self.max_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - expected) * 1000)
+            self.samples.append(lag_ms)
+            EVENT_LOOP_LAG_SECONDS.observe(lag_ms / 1000)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            if lag_ms > LOOP_LAG_WARN_MS:
+                logger.warning(f"⚠️ Event loop blocked for {lag_ms:.0f}ms")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag summary over the sample window (milliseconds)"""
+        samples = sorted(self.samples)
+        if not samples:
+            return {"samples": 0, "mean_ms": None, "p99_ms": None, "max_ms": None}
+        return {
+            "samples": len(samples),
+            "mean_ms": round(sum(samples) / len(samples), 2),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+            "max_ms": round(samples[-1], 2),
+        }
+
+
+# Global instance
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,202 @@
+"""
+Prometheus metrics
+Minimal counters and histograms rendered in the Prometheus text format
+for /metrics - request latency per route, Overpass latency per mirror,
+cache hits, processing stages, payload sizes, Neo4j query time and
+event-loop lag.
+"""
+
+import time
+import threading
+from functools import wraps
+from typing import Callable, Dict, List, Tuple
+
+from app.services.profiling import record_phase, sampled_thread
+
+# Latency buckets (seconds) - from cache hits up to slow Overpass queries
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Payload buckets (bytes) - 1 KB to 64 MB
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(9))
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, values)} {_format_value(v)}" for values, v in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, +Inf count, sum)
+        self._values: Dict[LabelValues, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += 1
+            state[2] += value
+
+    def time(self, *label_values: str) -> "_Timer":
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self, label_values)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((values, (list(s[0]), s[1], s[2])) for values, s in self._values.items())
+        lines = []
+        for values, (counts, total, value_sum) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.labels, values, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.labels, values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {total}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {_format_value(value_sum)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {total}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, label_values: LabelValues):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ("method", "route", "status"),
+)
+HTTP_RESPONSE_BYTES = Histogram(
+    "http_response_size_bytes", "HTTP response body size by route",
+    ("route",), SIZE_BUCKETS,
+)
+OVERPASS_REQUEST_SECONDS = Histogram(
+    "overpass_request_duration_seconds", "Overpass request latency by mirror and outcome",
+    ("mirror", "outcome"),
+)
+OVERPASS_RESPONSE_BYTES = Histogram(
+    "overpass_response_size_bytes", "Overpass response body size",
+    ("mirror",), SIZE_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit/miss)",
+    ("cache", "result"),
+)
+PROCESSING_SECONDS = Histogram(
+    "processing_duration_seconds", "CPU stages (parse, build_features, clip, serialize) by stage",
+    ("stage",),
+)
+NEO4J_QUERY_SECONDS = Histogram(
+    "neo4j_query_duration_seconds", "GraphService call latency by method",
+    ("method",),
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds", "Event-loop scheduling lag",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+REGISTRY = [
+    HTTP_REQUEST_SECONDS,
+    HTTP_RESPONSE_BYTES,
+    OVERPASS_REQUEST_SECONDS,
+    OVERPASS_RESPONSE_BYTES,
+    CACHE_REQUESTS,
+    PROCESSING_SECONDS,
+    NEO4J_QUERY_SECONDS,
+    EVENT_LOOP_LAG_SECONDS,
+]
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def timed_query(method: str) -> Callable:
+    """Decorator observing a GraphService method in neo4j_query_duration_seconds (and the neo4j_query phase)"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                # Sync routes call GraphService from the threadpool - sample that thread too
+                with sampled_thread():
+                    return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                NEO4J_QUERY_SECONDS.observe(elapsed, method)
+                record_phase("neo4j_query", elapsed)
+        return wrapper
+    return decorator
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
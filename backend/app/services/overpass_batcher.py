@@ -0,0 +1,247 @@
+"""
+Union-query batching for power fetches
+Regions missing from the cache at about the same time (adjacent stream
+tiles, concurrent users in different neighborhoods) are collected for a
+short window and fetched with one Overpass query holding a bbox clause
+per region. The combined response is split back per region by testing
+each element against each region the way Overpass selects by bbox.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds to collect regions before sending a batch (0 = no batching)
+OVERPASS_BATCH_WINDOW = float(os.getenv("OVERPASS_BATCH_WINDOW", "0.05"))
+# Regions per union query
+OVERPASS_BATCH_MAX_REGIONS = int(os.getenv("OVERPASS_BATCH_MAX_REGIONS", "16"))
+# Largest extent (degrees, either axis) of the regions in one query - keeps union queries in Overpass's limits
+OVERPASS_BATCH_MAX_SPAN = float(os.getenv("OVERPASS_BATCH_MAX_SPAN", "0.3"))
+
+Bbox = Tuple[float, float, float, float]
+
+
+def _segment_hits_bbox(a: Dict[str, float], b: Dict[str, float], bbox: Bbox) -> bool:
+    """Whether the segment a-b (Overpass {lat, lon} nodes) touches bbox (Liang-Barsky)"""
+    south, west, north, east = bbox
+    x0, y0, dx, dy = a["lon"], a["lat"], b["lon"] - a["lon"], b["lat"] - a["lat"]
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, x0 - west), (dx, east - x0), (-dy, y0 - south), (dy, north - y0)):
+        if p == 0:
+            if q < 0:
+                return False
+            continue
+        t = q / p
+        if p < 0:
+            if t > t1:
+                return False
+            t0 = max(t0, t)
+        else:
+            if t < t0:
+                return False
+            t1 = min(t1, t)
+    return t0 <= t1
+
+
+def element_in_bbox(element: Dict[str, Any], bbox: Bbox) -> bool:
+    """Whether Overpass would return this node/way (with geometry) for a bbox clause"""
+    south, west, north, east = bbox
+    if element.get("type") == "node":
+        return south <= element.get("lat", 91) <= north and west <= element.get("lon", 181) <= east
+
+    bounds = element.get("bounds")
+    if bounds and (bounds["minlat"] > north or bounds["maxlat"] < south
+                   or bounds["minlon"] > east or bounds["maxlon"] < west):
+        return False
+    geometry = [node for node in element.get("geometry", []) if node]
+    for node in geometry:
+        if south <= node["lat"] <= north and west <= node["lon"] <= east:
+            return True
+    return any(_segment_hits_bbox(a, b, bbox) for a, b in zip(geometry, geometry[1:]))
+
+
+def feature_in_bbox(feature: Dict[str, Any], bbox: Bbox) -> bool:
+    """Whether a built GeoJSON power feature would be selected by a bbox clause (see element_in_bbox)"""
+    south, west, north, east = bbox
+    geometry = feature["geometry"]
+    if geometry["type"] == "Point":
+        lon, lat = geometry["coordinates"][:2]
+        return south <= lat <= north and west <= lon <= east
+
+    lines = geometry["coordinates"] if geometry["type"] == "MultiLineString" else [geometry["coordinates"]]
+    for line in lines:
+        nodes = [{"lat": lat, "lon": lon} for lon, lat, *_ in line]
+        if any(south <= node["lat"] <= north and west <= node["lon"] <= east for node in nodes):
+            return True
+        if any(_segment_hits_bbox(a, b, bbox) for a, b in zip(nodes, nodes[1:])):
+            return True
+    return False
+
+
+def split_elements(
+    payload: Any,
+    regions: List[Tuple[Bbox, Tuple[str, ...]]],
+    element_layers: Dict[Tuple[str, str], str],
+) -> List[Dict[str, Any]]:
+    """
+    Split a union response back into one Overpass-shaped response per region
+
+    Pure, so it can run in the CPU executor.
+
+    Args:
+        payload: Union query response (raw bytes/str or decoded)
+        regions: (bbox, layers) per region, in request order
+        element_layers: (element type, power tag) -> layer
+
+    Returns:
+        {"elements": [...]} per region
+    """
+    result = json.loads(payload) if isinstance(payload, (bytes, str)) else payload
+    split: List[List[Dict[str, Any]]] = [[] for _ in regions]
+    for element in result.get("elements", []):
+        layer = element_layers.get((element.get("type"), element.get("tags", {}).get("power")))
+        for i, (bbox, layers) in enumerate(regions):
+            if layer in layers and element_in_bbox(element, bbox):
+                split[i].append(element)
+    return [{"elements": elements} for elements in split]
+
+
+class _Pending:
+    def __init__(self, bbox: Bbox, layers: Tuple[str, ...]):
+        self.bbox = bbox
+        self.layers = layers
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class OverpassBatcher:
+    """
+    Collects power region fetches and sends them as union queries
+
+    Args:
+        query: query_overpass (called with raw=True)
+        selectors: layer -> Overpass selector, e.g. 'way["power"="line"]'
+        element_layers: (element type, power tag) -> layer, for splitting
+        split: Runs split_elements off the event loop (e.g. run_cpu_bound)
+    """
+
+    def __init__(
+        self,
+        query: Callable[..., Awaitable[Any]],
+        selectors: Dict[str, str],
+        element_layers: Dict[Tuple[str, str], str],
+        split: Callable[..., Awaitable[Any]],
+        window: float = OVERPASS_BATCH_WINDOW,
+        max_regions: int = OVERPASS_BATCH_MAX_REGIONS,
+        max_span: float = OVERPASS_BATCH_MAX_SPAN,
+    ):
+        self.query = query
+        self.selectors = selectors
+        self.element_layers = element_layers
+        self.split = split
+        self.window = window
+        self.max_regions = max_regions
+        self.max_span = max_span
+        self._pending: List[_Pending] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.queries = 0
+        self.regions = 0
+
+    def build_query(self, regions: List[Tuple[Bbox, Tuple[str, ...]]], timeout: int = 25) -> str:
+        """Overpass QL union of one bbox clause per region and layer"""
+        clauses = "\n".join(
+            f"      {self.selectors[layer]}({south},{west},{north},{east});"
+            for (south, west, north, east), layers in regions
+            for layer in layers
+        )
+        return f"""
+    [out:json][timeout:{timeout}];
+    (
+{clauses}
+    );
+    out geom;
+    """
+
+    async def fetch(self, bbox: Bbox, layers: List[str]) -> Any:
+        """
+        Overpass response for the given layers in bbox, possibly via a union query
+
+        Returns:
+            Raw response body (sent alone) or {"elements": [...]} split from a union
+        """
+        if self.window <= 0:
+            return await self._send([_Pending(bbox, tuple(layers))], single=True)
+
+        pending = _Pending(bbox, tuple(layers))
+        self._pending.append(pending)
+        if self._flush_task is None:
+            # Own context, so the batch isn't attributed to whichever request started it
+            self._flush_task = asyncio.create_task(self._flush_later(), context=contextvars.Context())
+        return await pending.future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        pending, self._pending, self._flush_task = self._pending, [], None
+        pending = [p for p in pending if not p.future.done()]
+        await asyncio.gather(*(self._run(batch) for batch in self._group(pending)))
+
+    def _group(self, pending: List[_Pending]) -> List[List[_Pending]]:
+        """Greedy spatial split into batches within max_regions and max_span"""
+        batches: List[Tuple[List[_Pending], List[float]]] = []
+        for p in sorted(pending, key=lambda p: (p.bbox[0], p.bbox[1])):
+            south, west, north, east = p.bbox
+            for batch, extent in batches:
+                merged = [min(extent[0], south), min(extent[1], west), max(extent[2], north), max(extent[3], east)]
+                if len(batch) < self.max_regions and merged[2] - merged[0] <= self.max_span \
+                        and merged[3] - merged[1] <= self.max_span:
+                    batch.append(p)
+                    extent[:] = merged
+                    break
+            else:
+                batches.append(([p], list(p.bbox)))
+        return [batch for batch, _ in batches]
+
+    async def _run(self, batch: List[_Pending]) -> None:
+        try:
+            results = await self._send(batch, single=len(batch) == 1)
+        except Exception as e:
+            results = [e] * len(batch)
+        else:
+            if len(batch) == 1:
+                results = [results]
+        for p, result in zip(batch, results):
+            if p.future.done():
+                continue
+            if isinstance(result, Exception):
+                p.future.set_exception(result)
+            else:
+                p.future.set_result(result)
+
+    async def _send(self, batch: List[_Pending], single: bool) -> Any:
+        regions = [(p.bbox, p.layers) for p in batch]
+        self.queries += 1
+        self.regions += len(batch)
+        if single:
+            return await self.query(self.build_query(regions), raw=True)
+
+        start = time.perf_counter()
+        payload = await self.query(self.build_query(regions, timeout=60), raw=True)
+        split = await self.split(split_elements, payload, regions, self.element_layers)
+        logger.info(
+            f"📦 Batched {len(batch)} regions into one Overpass query "
+            f"({(time.perf_counter() - start) * 1000:.0f}ms, {len(payload) / 1024:.0f} KB)"
+        )
+        return split
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "window_s": self.window,
+            "queries": self.queries,
+            "regions": self.regions,
+            "pending": len(self._pending),
+        }
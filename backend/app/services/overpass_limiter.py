@@ -0,0 +1,243 @@
+"""
+Upstream request budget for the public Overpass mirrors
+A token bucket per mirror, back-off from HTTP 429 / Retry-After and the
+mirror's /api/status slot report, and a global cap on concurrent queries.
+Bursts queue behind the cap instead of cascading into throttled mirrors.
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Queries in flight across all mirrors
+OVERPASS_MAX_CONCURRENCY = int(os.getenv("OVERPASS_MAX_CONCURRENCY", "2"))
+# Sustained requests per second per mirror, and burst size
+OVERPASS_MIRROR_RATE = float(os.getenv("OVERPASS_MIRROR_RATE", "0.5"))
+OVERPASS_MIRROR_BURST = int(os.getenv("OVERPASS_MIRROR_BURST", "2"))
+# Longest a request will wait for a slot or a mirror before failing (seconds)
+OVERPASS_MAX_WAIT = float(os.getenv("OVERPASS_MAX_WAIT", "30"))
+
+# Back-off when a mirror throttles without saying for how long
+DEFAULT_THROTTLE_SECONDS = 10
+
+_SLOTS_NOW_RE = re.compile(r"(\d+)\s+slots?\s+available\s+now")
+_SLOT_AFTER_RE = re.compile(r"Slot available after:.*?in\s+(-?\d+)\s+seconds")
+_THROTTLE_MARKERS = ("rate_limited", "too many requests", "dispatcher_client::request_read_and_idx")
+
+
+class OverpassBusyError(Exception):
+    """No Overpass capacity within OVERPASS_MAX_WAIT"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header (delta seconds or HTTP date) -> seconds from now"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_status(text: str) -> Optional[float]:
+    """
+    Seconds until a query slot frees up, from an Overpass /api/status body
+
+    Returns:
+        0 if a slot is available now, the shortest wait otherwise, None if
+        the body doesn't report slots
+    """
+    slots_now = _SLOTS_NOW_RE.search(text)
+    if slots_now and int(slots_now.group(1)) > 0:
+        return 0.0
+    waits = [max(0, int(seconds)) for seconds in _SLOT_AFTER_RE.findall(text)]
+    return float(min(waits)) if waits else None
+
+
+def is_throttled(response: httpx.Response) -> bool:
+    """429, or a 504/"rate_limited" body from a mirror that is out of slots"""
+    if response.status_code == 429:
+        return True
+    if response.status_code in (503, 504):
+        body = response.text[:2000].lower()
+        return any(marker in body for marker in _THROTTLE_MARKERS)
+    return False
+
+
+def status_url(url: str) -> str:
+    """.../api/interpreter -> .../api/status"""
+    return url.rsplit("/", 1)[0] + "/status"
+
+
+class TokenBucket:
+    """
+    Token bucket with reservations
+
+    Callers reserve a token and sleep until it is due, so waiting
+    requests are served in arrival order at the sustained rate.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (without reserving it)"""
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def reserve(self) -> float:
+        """Take a token (possibly going into debt) and return the wait for it"""
+        wait = self.delay()
+        self.tokens -= 1
+        return wait
+
+
+class MirrorState:
+    """Budget and throttling state of one Overpass mirror"""
+
+    def __init__(self, url: str, rate: float, burst: int):
+        self.url = url
+        self.bucket = TokenBucket(rate, burst)
+        self.blocked_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+
+    def wait_time(self) -> float:
+        """Seconds before this mirror may be called"""
+        return max(self.blocked_until - time.monotonic(), self.bucket.delay())
+
+    def block(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.throttled += 1
+
+
+class OverpassLimiter:
+    """Global concurrency cap plus per-mirror rate limits"""
+
+    def __init__(
+        self,
+        urls: List[str],
+        max_concurrency: int = OVERPASS_MAX_CONCURRENCY,
+        rate: float = OVERPASS_MIRROR_RATE,
+        burst: int = OVERPASS_MIRROR_BURST,
+        max_wait: float = OVERPASS_MAX_WAIT,
+    ):
+        self.mirrors: Dict[str, MirrorState] = {url: MirrorState(url, rate, burst) for url in urls}
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold one of the global query slots
+
+        Raises:
+            OverpassBusyError: If no slot frees up within max_wait
+        """
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            raise OverpassBusyError(f"No Overpass slot within {self.max_wait:.0f}s ({self.queued} queued)")
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def mirror_order(self) -> List[str]:
+        """Mirrors by how soon they can be called (configured order breaks ties)"""
+        urls = list(self.mirrors)
+        return sorted(urls, key=lambda url: (round(self.mirrors[url].wait_time(), 1), urls.index(url)))
+
+    async def acquire(self, url: str, deadline: float) -> bool:
+        """
+        Wait for a mirror's block to lapse and take one of its tokens
+
+        Args:
+            url: Mirror URL
+            deadline: time.monotonic() after which the request gives up
+
+        Returns:
+            False (without waiting) if the mirror can't be called before the deadline
+        """
+        mirror = self.mirrors[url]
+        blocked_for = max(0.0, mirror.blocked_until - time.monotonic())
+        if time.monotonic() + max(blocked_for, mirror.bucket.delay()) > deadline:
+            return False
+        if blocked_for:
+            await asyncio.sleep(blocked_for)
+        wait = mirror.bucket.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        mirror.requests += 1
+        return True
+
+    async def throttled(self, url: str, response: httpx.Response, client: httpx.AsyncClient) -> float:
+        """
+        Record a throttled response and block the mirror for the advertised time
+
+        Uses Retry-After when present, otherwise asks the mirror's /api/status
+        when its next slot frees up.
+
+        Returns:
+            Seconds the mirror is blocked for
+        """
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            try:
+                status = await client.get(status_url(url), timeout=5)
+                delay = parse_status(status.text)
+            except httpx.HTTPError:
+                delay = None
+        if delay is None or delay <= 0:
+            delay = DEFAULT_THROTTLE_SECONDS
+        self.mirrors[url].block(delay)
+        logger.warning(f"⚠️ Overpass server {url} throttled us, backing off {delay:.0f}s")
+        return delay
+
+    def info(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        for mirror in self.mirrors.values():
+            mirror.bucket.delay()  # refill before reporting
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "mirrors": [
+                {
+                    "url": mirror.url,
+                    "requests": mirror.requests,
+                    "throttled": mirror.throttled,
+                    "blocked_for_s": round(max(0.0, mirror.blocked_until - now), 1),
+                    "tokens": round(mirror.bucket.tokens, 2),
+                }
+                for mirror in self.mirrors.values()
+            ],
+        }
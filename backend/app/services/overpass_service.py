@@ -3,31 +3,91 @@ Overpass API service for fetching OpenStreetMap data
 Handles Overland Park boundary and power infrastructure queries
 """
 
+import asyncio
 import httpx
+import itertools
+import json
 import math
+import os
 import re
+import time
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional, Tuple
-from geojson import FeatureCollection, Feature, Point, LineString, Polygon
+from geojson import FeatureCollection, Feature, Point, LineString, MultiLineString, Polygon, MultiPolygon
 import logging
+from app.services.stats_grid import stats_grid
+from app.services.executor import run_cpu_bound, run_in_thread, uses_process_pool
+from app.services.overpass_limiter import OverpassBusyError, OverpassLimiter, is_throttled
+from app.services.overpass_batcher import OverpassBatcher
+from app.services.power_snapshot import power_snapshot
+from app.services.metrics import (
+    OVERPASS_REQUEST_SECONDS,
+    OVERPASS_RESPONSE_BYTES,
+    PROCESSING_SECONDS,
+    record_cache,
+)
+from app.services.profiling import phase, record_phase
+from app.services.shared_cache import shared_cache
+from app.services.geometry import (
+    PreparedPolygon,
+    build_multipolygon,
+    simplify_multipolygon,
+)
 
 logger = logging.getLogger(__name__)
 
-# Overpass API fallback servers
-OVERPASS_URLS = [
+# Overpass API fallback servers (OVERPASS_URLS overrides, e.g. a self-hosted or stand-in server)
+OVERPASS_URLS = [url.strip() for url in os.getenv("OVERPASS_URLS", "").split(",") if url.strip()] or [
     "https://overpass-api.de/api/interpreter",
     "https://overpass.kumi.systems/api/interpreter",
     "https://overpass.private.coffee/api/interpreter",
     "https://api.openstreetmap.fr/oapi/interpreter",
 ]
 
-# Cache for boundary (TTL: 1 hour)
-_boundary_cache: Optional[Dict[str, Any]] = None
+# Shared upstream budget for all Overpass queries (see overpass_limiter)
+overpass_limiter = OverpassLimiter(OVERPASS_URLS)
+OVERPASS_THROTTLE_PASSES = 2
+
+# Default map view covering all of Overland Park (south, west, north, east) - matches the frontend
+OVERLAND_PARK_BBOX = (38.85, -94.80, 39.10, -94.55)
+
+# Cache for boundary - assembled once per process; the approximate
+# fallback boundary is retried after BOUNDARY_CACHE_TTL
+_boundary_cache: Optional["BoundaryGeometry"] = None
 _boundary_cache_time: float = 0
+_boundary_lock = asyncio.Lock()
 BOUNDARY_CACHE_TTL = 3600  # 1 hour
 
-# Cache for power data (by bbox, TTL: 30 minutes)
-_power_cache: Dict[str, Tuple[Dict[str, Any], float]] = {}
+# Each assembled boundary gets a version so process-pool workers can keep their own copy
+_boundary_versions = itertools.count(1)
+# Boundary held by this process-pool worker: (version, geometry)
+_worker_boundary: Optional[Tuple[int, "BoundaryGeometry"]] = None
+
+# Boundary levels of detail -> Douglas-Peucker tolerance in degrees (None = full geometry)
+BOUNDARY_DETAIL_TOLERANCES = {
+    "full": None,
+    "high": 0.00002,   # ~2 m
+    "medium": 0.0001,  # ~10 m
+    "low": 0.0005,     # ~50 m
+}
+
+# LRU cache for power data (by bbox, layer and clip mode, TTL: 30 minutes)
+_power_cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
 POWER_CACHE_TTL = 1800  # 30 minutes
+POWER_CACHE_SIZE = int(os.getenv("POWER_CACHE_SIZE", "256"))
+
+# Power layers for /api/op/power?layers= -> Overpass selector (cached separately per layer)
+POWER_LAYERS = {
+    "transmission": 'way["power"="line"]',
+    "distribution": 'way["power"="minor_line"]',
+    "transformers": 'node["power"="transformer"]',
+}
+_ELEMENT_LAYERS = {
+    ("way", "line"): "transmission",
+    ("way", "minor_line"): "distribution",
+    ("node", "transformer"): "transformers",
+}
+_LAYER_POWER = {layer: power for (_, power), layer in _ELEMENT_LAYERS.items()}
 
 
 def round_bbox(bbox: Tuple[float, float, float, float], decimals: int = 4) -> Tuple[float, float, float, float]:
@@ -44,6 +104,10 @@ def round_bbox(bbox: Tuple[float, float, float, float], decimals: int = 4) -> Tu
     return tuple(round(coord, decimals) for coord in bbox)
 
 
+# Largest view (bbox diagonal) a single power fetch may cover
+MAX_BBOX_DIAGONAL_KM = 60
+
+
 def calculate_bbox_diagonal(bbox: Tuple[float, float, float, float]) -> float:
     """
     Calculate diagonal distance of bbox in kilometers
@@ -118,65 +182,170 @@ def calculate_linestring_length(coordinates: List[List[float]]) -> float:
     return total_km
 
 
-async def query_overpass(query: str, timeout: int = 60) -> Dict[str, Any]:
+_VOLTAGE_RE = re.compile(r'(\d+)')
+
+
+def parse_voltage_value(voltage_str: Any) -> Optional[int]:
+    """
+    Extract the numeric voltage from an OSM voltage tag
+    
+    Handles formats like "138000", "138 kV", "13,800" (first number wins).
+    
+    Returns:
+        Voltage as int, or None if the tag has no number
+    """
+    if not voltage_str:
+        return None
+    voltage_match = _VOLTAGE_RE.search(str(voltage_str).replace(',', ''))
+    return int(voltage_match.group(1)) if voltage_match else None
+
+
+async def query_overpass(query: str, timeout: int = 60, raw: bool = False) -> Any:
     """
     Query Overpass API with fallback servers
     
     Args:
         query: Overpass QL query string
         timeout: Request timeout in seconds (reduced to 60s for faster failures)
+        raw: Return the undecoded response body, so JSON parsing can run
+             in the CPU executor instead of on the event loop
         
     Returns:
-        Overpass API response JSON
+        Overpass API response JSON (bytes if raw)
         
     Raises:
+        OverpassBusyError: If no slot or mirror is available within OVERPASS_MAX_WAIT
         Exception: If all servers fail
     """
+    import time
+    
     last_error = None
+    attempted = False
     
-    for url in OVERPASS_URLS:
-        try:
-            # Use shorter timeout for faster response
-            async with httpx.AsyncClient(timeout=httpx.Timeout(timeout, connect=10)) as client:
-                response = await client.post(
-                    url,
-                    data=query,
-                    headers={"Content-Type": "text/plain"},
-                )
-                response.raise_for_status()
-                return response.json()
-        except httpx.TimeoutException as e:
-            last_error = e
-            logger.warning(f"Overpass server {url} timed out: {e}, trying next...")
-            continue
-        except Exception as e:
-            last_error = e
-            logger.warning(f"Overpass server {url} failed: {e}, trying next...")
-            continue
+    # Global concurrency cap - bursts queue here instead of hammering mirrors
+    async with overpass_limiter.slot():
+        deadline = time.monotonic() + overpass_limiter.max_wait
+        # Use shorter timeout for faster response
+        async with httpx.AsyncClient(timeout=httpx.Timeout(timeout, connect=10)) as client:
+            # If every mirror only throttled us, wait out the shortest back-off and go again
+            for _ in range(OVERPASS_THROTTLE_PASSES):
+                throttled_only = True
+                for url in overpass_limiter.mirror_order():
+                    # Per-mirror token bucket and throttling back-off
+                    if not await overpass_limiter.acquire(url, deadline):
+                        continue
+                    attempted = True
+                    request_start = time.perf_counter()
+                    try:
+                        response = await client.post(
+                            url,
+                            data=query,
+                            headers={"Content-Type": "text/plain"},
+                        )
+                        if is_throttled(response):
+                            OVERPASS_REQUEST_SECONDS.observe(time.perf_counter() - request_start, url, "throttled")
+                            await overpass_limiter.throttled(url, response, client)
+                            last_error = Exception(f"{url} is rate limiting (HTTP {response.status_code})")
+                            continue
+                        response.raise_for_status()
+                        OVERPASS_REQUEST_SECONDS.observe(time.perf_counter() - request_start, url, "ok")
+                        OVERPASS_RESPONSE_BYTES.observe(len(response.content), url)
+                        return response.content if raw else response.json()
+                    except httpx.TimeoutException as e:
+                        OVERPASS_REQUEST_SECONDS.observe(time.perf_counter() - request_start, url, "timeout")
+                        last_error = e
+                        throttled_only = False
+                        logger.warning(f"Overpass server {url} timed out: {e}, trying next...")
+                        continue
+                    except Exception as e:
+                        OVERPASS_REQUEST_SECONDS.observe(time.perf_counter() - request_start, url, "error")
+                        last_error = e
+                        throttled_only = False
+                        logger.warning(f"Overpass server {url} failed: {e}, trying next...")
+                        continue
+                if not throttled_only:
+                    break
     
+    if not attempted:
+        raise OverpassBusyError(f"All Overpass servers are rate limited for more than {overpass_limiter.max_wait:.0f}s")
     raise Exception(f"All Overpass servers failed. Last error: {last_error}")
 
 
-async def get_overland_park_boundary() -> FeatureCollection:
+class BoundaryGeometry:
     """
-    Fetch Overland Park, Kansas boundary from OpenStreetMap
+    Assembled Overland Park boundary with precomputed variants
     
-    Returns:
-        GeoJSON FeatureCollection with boundary polygon
+    Holds the full MultiPolygon, one simplified FeatureCollection per
+    BOUNDARY_DETAIL_TOLERANCES level, and a prepared polygon for fast
+    point-in-polygon tests.
     """
-    global _boundary_cache, _boundary_cache_time
-    import time
     
-    # Check cache
-    current_time = time.time()
-    if _boundary_cache and (current_time - _boundary_cache_time) < BOUNDARY_CACHE_TTL:
-        logger.info("Returning cached boundary")
-        return _boundary_cache
+    def __init__(self, polygons: List[List[List[List[float]]]], properties: Dict[str, Any]):
+        self.polygons = polygons
+        self.properties = properties
+        self.approximate = bool(properties.get("note") == "approximate")
+        self.version = next(_boundary_versions)
+        self.prepared = PreparedPolygon(polygons)
+        self.variants: Dict[str, FeatureCollection] = {}
+        for detail, tolerance in BOUNDARY_DETAIL_TOLERANCES.items():
+            variant = polygons if tolerance is None else simplify_multipolygon(polygons, tolerance)
+            self.variants[detail] = FeatureCollection([
+                Feature(geometry=self._geometry(variant), properties=dict(properties))
+            ])
+    
+    @staticmethod
+    def _geometry(polygons: List[List[List[List[float]]]]):
+        """Polygon for a single part, MultiPolygon otherwise"""
+        if len(polygons) == 1:
+            return Polygon(polygons[0])
+        return MultiPolygon(polygons)
+    
+    def feature_collection(self, detail: str = "full") -> FeatureCollection:
+        """
+        Get the boundary at a level of detail
+        
+        Raises:
+            ValueError: If detail is not a BOUNDARY_DETAIL_TOLERANCES key
+        """
+        if detail not in self.variants:
+            raise ValueError(f"detail must be one of: {', '.join(BOUNDARY_DETAIL_TOLERANCES)}")
+        return self.variants[detail]
     
+    def contains(self, lon: float, lat: float) -> bool:
+        """Point-in-polygon test against the full boundary"""
+        return self.prepared.contains(lon, lat)
+
+
+def _select_boundary_relation(elements: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Pick the city boundary relation, preferring admin_level=8"""
+    relations = [e for e in elements if e.get("type") == "relation" and e.get("members")]
+    for relation in relations:
+        if relation.get("tags", {}).get("admin_level") == "8":
+            return relation
+    return relations[0] if relations else None
+
+
+def _approximate_boundary() -> BoundaryGeometry:
+    """Fallback: a simple bounding box for Overland Park"""
+    bbox = [
+        [-94.75, 38.95],   # SW
+        [-94.6, 38.95],    # SE
+        [-94.6, 39.0],     # NE
+        [-94.75, 39.0],    # NW
+        [-94.75, 38.95],   # Close
+    ]
+    return BoundaryGeometry(
+        [[bbox]],
+        {"name": "Overland Park", "type": "boundary", "note": "approximate"},
+    )
+
+
+async def _fetch_boundary() -> BoundaryGeometry:
+    """Download the boundary relation and assemble it (approximate fallback if unusable)"""
     # Overpass query for Overland Park boundary
     # Try multiple queries to find the boundary
     query = """
-    [out:json][timeout:180];
+    [out:json][timeout:60];
     (
       relation["name"="Overland Park"]["admin_level"="8"](38.95,-94.75,39.0,-94.6);
       relation["name"="Overland Park"]["place"="city"](38.95,-94.75,39.0,-94.6);
@@ -186,241 +355,636 @@ async def get_overland_park_boundary() -> FeatureCollection:
     """
     
     try:
-        result = await query_overpass(query)
+        with phase("overpass_fetch"):
+            result = await query_overpass(query)
         
         if not result.get("elements"):
             raise Exception("No boundary found for Overland Park")
         
-        # Convert Overpass relation to GeoJSON
-        features = []
-        for element in result["elements"]:
-            if element.get("type") == "relation" and "members" in element:
-                # Extract outer way coordinates
-                outer_ways = []
-                for member in element.get("members", []):
-                    if member.get("role") == "outer" and member.get("type") == "way":
-                        # Get way coordinates from geometry if available
-                        if "geometry" in member:
-                            coords = [[node["lon"], node["lat"]] for node in member["geometry"]]
-                            if coords:
-                                outer_ways.append(coords)
-                
-                if outer_ways:
-                    # Create polygon from outer ways
-                    # For simplicity, use first outer way as main polygon
-                    polygon_coords = outer_ways[0]
-                    if polygon_coords[0] != polygon_coords[-1]:
-                        polygon_coords.append(polygon_coords[0])  # Close polygon
-                    
-                    feature = Feature(
-                        geometry=Polygon([polygon_coords]),
-                        properties={
-                            "name": element.get("tags", {}).get("name", "Overland Park"),
-                            "type": "boundary",
-                        }
-                    )
-                    features.append(feature)
+        relation = _select_boundary_relation(result["elements"])
+        polygons = []
+        if relation:
+            # Collect outer and inner ways, then stitch them into rings
+            outer_ways, inner_ways = [], []
+            for member in relation.get("members", []):
+                if member.get("type") != "way" or "geometry" not in member:
+                    continue
+                coords = [[node["lon"], node["lat"]] for node in member["geometry"]]
+                if member.get("role") == "inner":
+                    inner_ways.append(coords)
+                elif member.get("role") in ("outer", ""):
+                    outer_ways.append(coords)
+            polygons = build_multipolygon(outer_ways, inner_ways)
         
-        if not features:
-            # Fallback: create a simple bounding box for Overland Park
-            # Approximate city boundaries
+        if polygons:
+            boundary = BoundaryGeometry(polygons, {
+                "name": relation.get("tags", {}).get("name", "Overland Park"),
+                "type": "boundary",
+            })
+            logger.info(
+                f"✅ Boundary assembled: {len(polygons)} polygon(s), "
+                f"{sum(len(p) - 1 for p in polygons)} hole(s)"
+            )
+        else:
             logger.warning("Could not extract boundary geometry from OSM, using approximate bounding box")
-            bbox = [
-                [-94.75, 38.95],   # SW
-                [-94.75, 39.0],    # NW
-                [-94.6, 39.0],     # NE
-                [-94.6, 38.95],    # SE
-                [-94.75, 38.95],   # Close
-            ]
-            features.append(Feature(
-                geometry=Polygon([bbox]),
-                properties={"name": "Overland Park", "type": "boundary", "note": "approximate"}
-            ))
-        
-        feature_collection = FeatureCollection(features)
-        
-        # Cache result
-        _boundary_cache = feature_collection
-        _boundary_cache_time = current_time
+            boundary = _approximate_boundary()
         
-        return feature_collection
+        return boundary
         
     except Exception as e:
         logger.error(f"Error fetching Overland Park boundary: {e}")
         raise
 
 
-async def get_power_infrastructure(bbox: Tuple[float, float, float, float]) -> Dict[str, Any]:
+async def get_boundary_geometry() -> BoundaryGeometry:
     """
-    Fetch power infrastructure from OpenStreetMap for given bounding box
+    Get the assembled Overland Park boundary (fetched and built once per process)
     
-    Args:
-        bbox: (south, west, north, east) in decimal degrees
+    Concurrent first callers wait on a lock, so the relation is only
+    downloaded and assembled once.
+    
+    Returns:
+        BoundaryGeometry with full/simplified variants and a prepared polygon
+    """
+    global _boundary_cache, _boundary_cache_time
+    import time
+    
+    def cached() -> Optional[BoundaryGeometry]:
+        if _boundary_cache is None:
+            return None
+        if _boundary_cache.approximate and (time.time() - _boundary_cache_time) >= BOUNDARY_CACHE_TTL:
+            return None
+        return _boundary_cache
+    
+    boundary = cached()
+    record_cache("boundary", hit=boundary is not None)
+    if boundary:
+        logger.info("Returning cached boundary")
+        return boundary
+    
+    async with _boundary_lock:
+        boundary = cached()
+        if boundary:
+            return boundary
+        
+        if shared_cache is not None:
+            # Only one worker downloads the relation; the others read its polygons
+            fetched: List[BoundaryGeometry] = []
+            
+            async def fill() -> Dict[str, Any]:
+                fetched.append(await _fetch_boundary())
+                return {"polygons": fetched[0].polygons, "properties": fetched[0].properties}
+            
+            data, _, source = await shared_cache.get_or_fill("boundary", BOUNDARY_CACHE_TTL, fill)
+            record_cache("boundary_shared", hit=source != "filled")
+            boundary = fetched[0] if fetched else BoundaryGeometry(data["polygons"], data["properties"])
+        else:
+            boundary = await _fetch_boundary()
         
+        # Cache result
+        _boundary_cache = boundary
+        _boundary_cache_time = time.time()
+        
+        return boundary
+
+
+def _recall_power(key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+    """Fresh (data, cached_at) power entry from this process, marked recently used"""
+    entry = _power_cache.get(key)
+    if entry is None or (time.time() - entry[1]) >= POWER_CACHE_TTL:
+        return None
+    _power_cache.move_to_end(key)
+    return entry
+
+
+def _remember_power(key: str, data: Dict[str, Any], cached_at: float) -> None:
+    """Cache a power result, dropping expired entries and the least recently used beyond POWER_CACHE_SIZE"""
+    _power_cache[key] = (data, cached_at)
+    _power_cache.move_to_end(key)
+    now = time.time()
+    for expired in [k for k, (_, t) in _power_cache.items() if now - t >= POWER_CACHE_TTL]:
+        del _power_cache[expired]
+    while len(_power_cache) > POWER_CACHE_SIZE:
+        _power_cache.popitem(last=False)
+
+
+def export_cache_snapshot() -> Dict[str, Any]:
+    """
+    JSON-serializable copy of the boundary and power caches
+    
+    The approximate fallback boundary and expired power entries are left out.
+    """
+    import time
+    
+    snapshot: Dict[str, Any] = {"boundary": None, "power": []}
+    if _boundary_cache is not None and not _boundary_cache.approximate:
+        snapshot["boundary"] = {
+            "polygons": _boundary_cache.polygons,
+            "properties": _boundary_cache.properties,
+            "cached_at": _boundary_cache_time,
+        }
+    now = time.time()
+    for key, (data, cache_time) in list(_power_cache.items()):
+        if now - cache_time < POWER_CACHE_TTL:
+            snapshot["power"].append({"key": key, "cached_at": cache_time, "data": data})
+    return snapshot
+
+
+def restore_cache_snapshot(snapshot: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Refill the boundary and power caches from export_cache_snapshot() output
+    
+    Power entries keep their original age, so they expire on schedule.
+    
     Returns:
-        Dict with 'geojson' (FeatureCollection) and 'stats' (dict)
+        Counts of restored boundary and power entries
     """
-    global _power_cache
+    global _boundary_cache, _boundary_cache_time
     import time
     
-    # Round bbox for caching (use 3 decimals for better cache hits)
-    rounded_bbox = round_bbox(bbox, decimals=3)
-    bbox_key = str(rounded_bbox)
+    restored = {"boundary": 0, "power": 0}
+    boundary = snapshot.get("boundary")
+    if boundary and _boundary_cache is None:
+        _boundary_cache = BoundaryGeometry(boundary["polygons"], boundary["properties"])
+        _boundary_cache_time = boundary["cached_at"]
+        restored["boundary"] = 1
     
-    # Check cache
-    current_time = time.time()
-    if bbox_key in _power_cache:
-        cached_data, cache_time = _power_cache[bbox_key]
-        if (current_time - cache_time) < POWER_CACHE_TTL:
-            logger.info(f"✅ Cache HIT for bbox {bbox_key} (age: {current_time - cache_time:.1f}s)")
-            return cached_data
+    now = time.time()
+    for entry in snapshot.get("power", []):
+        if now - entry["cached_at"] < POWER_CACHE_TTL and entry["key"] not in _power_cache:
+            _remember_power(entry["key"], entry["data"], entry["cached_at"])
+            restored["power"] += 1
+    return restored
+
+
+async def get_overland_park_boundary(detail: str = "full") -> FeatureCollection:
+    """
+    Fetch Overland Park, Kansas boundary from OpenStreetMap
     
-    logger.info(f"⏳ Fetching power data for bbox {bbox_key} (cache miss)")
-    start_time = time.time()
+    Args:
+        detail: Level of detail - one of BOUNDARY_DETAIL_TOLERANCES ("full", "high", "medium", "low")
     
-    # Validate bbox size
-    diagonal_km = calculate_bbox_diagonal(bbox)
-    if diagonal_km > 60:
-        raise ValueError("Zoom in - bounding box too large (max 60km diagonal)")
+    Returns:
+        GeoJSON FeatureCollection with boundary polygon (or multipolygon)
+    """
+    boundary = await get_boundary_geometry()
+    return boundary.feature_collection(detail)
+
+
+def build_power_result(payload: Any) -> Dict[str, Any]:
+    """
+    Build power GeoJSON and stats from an Overpass response
     
-    south, west, north, east = bbox
+    Pure and picklable, so it can run in the CPU executor (thread or
+    process pool) instead of on the event loop.
     
-    # Optimized Overpass query for power infrastructure
-    # Using shorter timeout and optimized output format
-    query = f"""
-    [out:json][timeout:25];
-    (
-      way["power"="line"]({south},{west},{north},{east});
-      way["power"="minor_line"]({south},{west},{north},{east});
-      node["power"="transformer"]({south},{west},{north},{east});
-    );
-    out geom;
+    Args:
+        payload: Overpass response - raw JSON bytes/str or an already decoded dict
+        
+    Returns:
+        Dict with 'geojson' (FeatureCollection) and 'stats' (dict)
     """
+    result = json.loads(payload) if isinstance(payload, (bytes, str)) else payload
     
-    try:
-        result = await query_overpass(query)
-        
-        features = []
-        transmission_miles = 0.0
-        distribution_miles = 0.0
-        transformer_count = 0
-        voltage_values = []  # Track all voltage values for analysis
-        
-        for element in result.get("elements", []):
-            element_type = element.get("type")
-            tags = element.get("tags", {})
-            power_type = tags.get("power", "")
-            
-            if element_type == "way" and power_type in ["line", "minor_line"]:
-                # Extract coordinates
-                if "geometry" in element:
-                    coordinates = [[node["lon"], node["lat"]] for node in element["geometry"]]
-                    if len(coordinates) >= 2:
-                        # Calculate length
-                        length_km = calculate_linestring_length(coordinates)
-                        length_miles = length_km * 0.621371
-                        
-                        # Add to totals
-                        if power_type == "line":
-                            transmission_miles += length_miles
-                        else:
-                            distribution_miles += length_miles
-                        
-                        # Track voltage for analysis
-                        voltage_str = tags.get("voltage", "")
-                        if voltage_str:
-                            try:
-                                # Extract numeric voltage value (handle formats like "138000", "138 kV", etc.)
-                                voltage_match = re.search(r'(\d+)', str(voltage_str).replace(',', ''))
-                                if voltage_match:
-                                    voltage_val = int(voltage_match.group(1))
-                                    voltage_values.append(voltage_val)
-                            except (ValueError, AttributeError):
-                                pass
-                        
-                        # Include ALL tags from OSM, plus computed fields
-                        # Filter out empty values during construction for better performance
-                        properties = {
-                            "power": power_type,
-                            "osm_id": element.get("id"),
-                            "length_km": round(length_km, 3),
-                            "length_miles": round(length_miles, 3),
-                        }
-                        # Add all non-empty tags
-                        for k, v in tags.items():
-                            if v and str(v).strip():  # Only add non-empty values
-                                properties[k] = v
-                        
-                        feature = Feature(
-                            geometry=LineString(coordinates),
-                            properties=properties
-                        )
-                        features.append(feature)
-            
-            elif element_type == "node" and power_type == "transformer":
-                # Extract coordinates
-                lon = element.get("lon")
-                lat = element.get("lat")
-                if lon is not None and lat is not None:
-                    transformer_count += 1
+    features = []
+    transmission_miles = 0.0
+    distribution_miles = 0.0
+    transformer_count = 0
+    voltage_values = []  # Track all voltage values for analysis
+    
+    for element in result.get("elements", []):
+        element_type = element.get("type")
+        tags = element.get("tags", {})
+        power_type = tags.get("power", "")
+        
+        if element_type == "way" and power_type in ["line", "minor_line"]:
+            # Extract coordinates
+            if "geometry" in element:
+                coordinates = [[node["lon"], node["lat"]] for node in element["geometry"]]
+                if len(coordinates) >= 2:
+                    # Calculate length
+                    length_km = calculate_linestring_length(coordinates)
+                    length_miles = length_km * 0.621371
+                    
+                    # Add to totals
+                    if power_type == "line":
+                        transmission_miles += length_miles
+                    else:
+                        distribution_miles += length_miles
+                    
+                    # Track voltage for analysis
+                    voltage_val = parse_voltage_value(tags.get("voltage"))
+                    if voltage_val is not None:
+                        voltage_values.append(voltage_val)
+                    
                     # Include ALL tags from OSM, plus computed fields
                     # Filter out empty values during construction for better performance
                     properties = {
-                        "power": "transformer",
+                        "power": power_type,
                         "osm_id": element.get("id"),
+                        "length_km": round(length_km, 3),
+                        "length_miles": round(length_miles, 3),
                     }
                     # Add all non-empty tags
                     for k, v in tags.items():
                         if v and str(v).strip():  # Only add non-empty values
                             properties[k] = v
                     
-                    # Track voltage for analysis
-                    voltage_str = tags.get("voltage", "")
-                    if voltage_str:
-                        try:
-                            # Extract numeric voltage value (handle formats like "138000", "138 kV", etc.)
-                            voltage_match = re.search(r'(\d+)', str(voltage_str).replace(',', ''))
-                            if voltage_match:
-                                voltage_val = int(voltage_match.group(1))
-                                voltage_values.append(voltage_val)
-                                logger.debug(f"Found voltage {voltage_val} from transformer {element.get('id')}")
-                        except (ValueError, AttributeError) as e:
-                            logger.debug(f"Could not parse voltage '{voltage_str}': {e}")
-                            pass
-                    
                     feature = Feature(
-                        geometry=Point([lon, lat]),
+                        geometry=LineString(coordinates),
                         properties=properties
                     )
                     features.append(feature)
         
-        feature_collection = FeatureCollection(features)
+        elif element_type == "node" and power_type == "transformer":
+            # Extract coordinates
+            lon = element.get("lon")
+            lat = element.get("lat")
+            if lon is not None and lat is not None:
+                transformer_count += 1
+                # Include ALL tags from OSM, plus computed fields
+                # Filter out empty values during construction for better performance
+                properties = {
+                    "power": "transformer",
+                    "osm_id": element.get("id"),
+                }
+                # Add all non-empty tags
+                for k, v in tags.items():
+                    if v and str(v).strip():  # Only add non-empty values
+                        properties[k] = v
+                
+                # Track voltage for analysis
+                voltage_val = parse_voltage_value(tags.get("voltage"))
+                if voltage_val is not None:
+                    voltage_values.append(voltage_val)
+                
+                feature = Feature(
+                    geometry=Point([lon, lat]),
+                    properties=properties
+                )
+                features.append(feature)
+    
+    return {
+        "geojson": FeatureCollection(features),
+        "stats": {
+            "transmission_miles": round(transmission_miles, 2),
+            "distribution_miles": round(distribution_miles, 2),
+            "transformer_count": transformer_count,
+            "highest_voltage": max(voltage_values) if voltage_values else None,
+            "lowest_voltage": min(voltage_values) if voltage_values else None,
+        }
+    }
+
+
+def build_power_result_timed(payload: Any) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    build_power_result with separate JSON parse and feature build timings
+    
+    Returns:
+        Tuple of (result dict, {"parse": seconds, "build_features": seconds})
+    """
+    start = time.perf_counter()
+    result = json.loads(payload) if isinstance(payload, (bytes, str)) else payload
+    parsed = time.perf_counter()
+    result_data = build_power_result(result)
+    return result_data, {"parse": parsed - start, "build_features": time.perf_counter() - parsed}
+
+
+def parse_layers(value: str) -> List[str]:
+    """
+    Parse a comma-separated layers parameter
+    
+    Returns:
+        Requested layers in POWER_LAYERS order, without duplicates
+        
+    Raises:
+        ValueError: If a layer is unknown or none is given
+    """
+    requested = {layer.strip() for layer in value.split(",") if layer.strip()}
+    unknown = requested - set(POWER_LAYERS)
+    if unknown:
+        raise ValueError(f"Unknown layer(s): {', '.join(sorted(unknown))} (use {', '.join(POWER_LAYERS)})")
+    if not requested:
+        raise ValueError(f"layers must name at least one of {', '.join(POWER_LAYERS)}")
+    return [layer for layer in POWER_LAYERS if layer in requested]
+
+
+def build_power_layers(payload: Any, layers: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Build one power result per layer from an Overpass response
+    
+    Elements are split by layer before building, so each layer's stats
+    only count its own features. Pure, like build_power_result.
+    
+    Returns:
+        Dict of layer -> {'geojson', 'stats'}
+    """
+    result = json.loads(payload) if isinstance(payload, (bytes, str)) else payload
+    elements: Dict[str, List[Dict[str, Any]]] = {layer: [] for layer in layers}
+    for element in result.get("elements", []):
+        layer = _ELEMENT_LAYERS.get((element.get("type"), element.get("tags", {}).get("power")))
+        if layer in elements:
+            elements[layer].append(element)
+    return {layer: build_power_result({"elements": layer_elements}) for layer, layer_elements in elements.items()}
+
+
+def split_power_layers(result_data: Dict[str, Any], layers: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-layer results carved out of a full (all layers) power result
+    
+    Lets layered requests reuse the unlayered cache entry instead of
+    querying Overpass again. Stats are recomputed per layer from the
+    features' stored lengths and voltage tags.
+    
+    Returns:
+        Dict of layer -> {'geojson', 'stats'}
+    """
+    wanted = {_LAYER_POWER[layer]: layer for layer in layers}
+    features: Dict[str, List[Dict[str, Any]]] = {layer: [] for layer in layers}
+    for feature in result_data["geojson"]["features"]:
+        layer = wanted.get(feature["properties"].get("power"))
+        if layer is not None:
+            features[layer].append(feature)
+    
+    results = {}
+    for layer, layer_features in features.items():
+        miles = sum(feature["properties"].get("length_miles", 0.0) for feature in layer_features)
+        voltages = [
+            voltage
+            for voltage in (parse_voltage_value(feature["properties"].get("voltage")) for feature in layer_features)
+            if voltage is not None
+        ]
+        results[layer] = {
+            "geojson": FeatureCollection(layer_features),
+            "stats": {
+                "transmission_miles": round(miles, 2) if layer == "transmission" else 0.0,
+                "distribution_miles": round(miles, 2) if layer == "distribution" else 0.0,
+                "transformer_count": len(layer_features) if layer == "transformers" else 0,
+                "highest_voltage": max(voltages) if voltages else None,
+                "lowest_voltage": min(voltages) if voltages else None,
+            },
+        }
+    return results
+
+
+def merge_layer_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-layer stats into the /power stats shape"""
+    highest = [s["highest_voltage"] for s in stats if s["highest_voltage"] is not None]
+    lowest = [s["lowest_voltage"] for s in stats if s["lowest_voltage"] is not None]
+    return {
+        "transmission_miles": round(sum(s["transmission_miles"] for s in stats), 2),
+        "distribution_miles": round(sum(s["distribution_miles"] for s in stats), 2),
+        "transformer_count": sum(s["transformer_count"] for s in stats),
+        "highest_voltage": max(highest) if highest else None,
+        "lowest_voltage": min(lowest) if lowest else None,
+    }
+
+
+def clip_power_to_boundary(result_data: Dict[str, Any], boundary: BoundaryGeometry) -> Dict[str, Any]:
+    """
+    Clip power features to the city boundary and recompute stats
+    
+    Transformers are kept if they are inside the boundary; lines are cut
+    at the exact boundary crossings and their lengths recomputed from the
+    inside pieces (MultiLineString when a line leaves and re-enters).
+    
+    Args:
+        result_data: Result of get_power_infrastructure
+        boundary: Assembled boundary from get_boundary_geometry
+        
+    Returns:
+        Dict with 'geojson' (FeatureCollection) and 'stats' (dict), same shape as the input
+    """
+    prepared = boundary.prepared
+    features = []
+    transmission_miles = 0.0
+    distribution_miles = 0.0
+    transformer_count = 0
+    voltage_values = []
+    
+    for feature in result_data["geojson"]["features"]:
+        geometry = feature["geometry"]
+        properties = feature["properties"]
+        power_type = properties.get("power")
         
-        # Calculate voltage statistics
-        highest_voltage = None
-        lowest_voltage = None
-        if voltage_values:
-            highest_voltage = max(voltage_values)
-            lowest_voltage = min(voltage_values)
-            logger.info(f"Voltage range: {lowest_voltage}V - {highest_voltage}V ({len(voltage_values)} values found)")
+        if geometry["type"] == "Point":
+            lon, lat = geometry["coordinates"][:2]
+            if not prepared.contains(lon, lat):
+                continue
+            transformer_count += 1
+            features.append(feature)
         else:
-            logger.info("No voltage data found in current view")
+            coordinates = geometry["coordinates"]
+            pieces, unclipped = prepared.clip_line(coordinates)
+            if not pieces:
+                continue
+            
+            if unclipped:
+                # Entirely inside - keep the original feature
+                length_miles = properties.get("length_miles", 0.0)
+                features.append(feature)
+            else:
+                length_km = sum(calculate_linestring_length(piece) for piece in pieces)
+                length_miles = length_km * 0.621371
+                clipped_properties = dict(properties)
+                clipped_properties.update({
+                    "length_km": round(length_km, 3),
+                    "length_miles": round(length_miles, 3),
+                    "clipped": True,
+                })
+                features.append(Feature(
+                    geometry=LineString(pieces[0]) if len(pieces) == 1 else MultiLineString(pieces),
+                    properties=clipped_properties
+                ))
+            
+            if power_type == "line":
+                transmission_miles += length_miles
+            else:
+                distribution_miles += length_miles
         
-        result_data = {
-            "geojson": feature_collection,
-            "stats": {
-                "transmission_miles": round(transmission_miles, 2),
-                "distribution_miles": round(distribution_miles, 2),
-                "transformer_count": transformer_count,
-                "highest_voltage": highest_voltage,
-                "lowest_voltage": lowest_voltage,
-            }
+        voltage_val = parse_voltage_value(properties.get("voltage"))
+        if voltage_val is not None:
+            voltage_values.append(voltage_val)
+    
+    return {
+        "geojson": FeatureCollection(features),
+        "stats": {
+            "transmission_miles": round(transmission_miles, 2),
+            "distribution_miles": round(distribution_miles, 2),
+            "transformer_count": transformer_count,
+            "highest_voltage": max(voltage_values) if voltage_values else None,
+            "lowest_voltage": min(voltage_values) if voltage_values else None,
         }
+    }
+
+
+def _clip_in_worker(
+    result_data: Dict[str, Any],
+    version: int,
+    boundary_data: Optional[Tuple[List[List[List[List[float]]]], Dict[str, Any]]],
+) -> Optional[Dict[str, Any]]:
+    """
+    Process-pool side of clip_off_loop
+    
+    Returns:
+        The clipped result, or None if this worker doesn't hold boundary
+        version yet and boundary_data wasn't sent
+    """
+    global _worker_boundary
+    if _worker_boundary is None or _worker_boundary[0] != version:
+        if boundary_data is None:
+            return None
+        _worker_boundary = (version, BoundaryGeometry(*boundary_data))
+    return clip_power_to_boundary(result_data, _worker_boundary[1])
+
+
+async def clip_off_loop(result_data: Dict[str, Any], boundary: BoundaryGeometry) -> Dict[str, Any]:
+    """
+    clip_power_to_boundary on the CPU executor
+    
+    With a process pool only the boundary version travels with each call;
+    a worker that doesn't hold that version yet asks once for the polygons.
+    """
+    if not uses_process_pool():
+        return await run_cpu_bound(clip_power_to_boundary, result_data, boundary)
+    
+    clipped = await run_cpu_bound(_clip_in_worker, result_data, boundary.version, None)
+    if clipped is None:
+        clipped = await run_cpu_bound(
+            _clip_in_worker, result_data, boundary.version, (boundary.polygons, boundary.properties)
+        )
+    return clipped
+
+
+def is_power_cached(bbox: Tuple[float, float, float, float]) -> bool:
+    """Whether an unclipped power result for this bbox is cached and fresh (or in the snapshot)"""
+    import time
+
+    bbox_key = str(round_bbox(bbox, decimals=3))
+    if _recall_power(bbox_key) is not None:
+        return True
+    if power_snapshot.enabled and power_snapshot.covers(bbox):
+        return True
+    if shared_cache is not None:
+        created_at = shared_cache.created_at(f"power:{bbox_key}")
+        return created_at is not None and (time.time() - created_at) < POWER_CACHE_TTL
+    return False
+
+
+# Power fetches that miss the cache together share one union query (see overpass_batcher)
+power_batcher = OverpassBatcher(query_overpass, POWER_LAYERS, _ELEMENT_LAYERS, split=run_cpu_bound)
+
+
+async def _fetch_power(bbox: Tuple[float, float, float, float]) -> Dict[str, Any]:
+    """Query Overpass for the power features in bbox and build the result"""
+    with phase("overpass_fetch"):
+        payload = await power_batcher.fetch(bbox, list(POWER_LAYERS))
+    
+    # JSON decoding and the element loop are CPU-bound - run them off the event loop
+    result_data, timings = await run_cpu_bound(build_power_result_timed, payload)
+    for stage, seconds in timings.items():
+        PROCESSING_SECONDS.observe(seconds, stage)
+        record_phase(stage, seconds)
+    return result_data
+
+
+async def get_power_infrastructure(
+    bbox: Tuple[float, float, float, float],
+    clip: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Fetch power infrastructure from OpenStreetMap for given bounding box
+    
+    Args:
+        bbox: (south, west, north, east) in decimal degrees
+        clip: "boundary" to clip features (and stats) to the city boundary
+        
+    Returns:
+        Dict with 'geojson' (FeatureCollection) and 'stats' (dict)
+    """
+    import time
+    
+    # Round bbox for caching (use 3 decimals for better cache hits)
+    rounded_bbox = round_bbox(bbox, decimals=3)
+    bbox_key = str(rounded_bbox)
+    
+    if clip == "boundary":
+        clip_key = f"{bbox_key}|clip=boundary"
+        current_time = time.time()
+        entry = _recall_power(clip_key)
+        if entry is not None:
+            record_cache("power_clipped", hit=True)
+            return entry[0]
+        record_cache("power_clipped", hit=False)
+        
+        request_start = time.perf_counter()
+        unclipped = await get_power_infrastructure(bbox)
+        boundary = await get_boundary_geometry()
+        
+        clip_start = time.perf_counter()
+        clipped = await clip_off_loop(unclipped, boundary)
+        clip_ms = (time.perf_counter() - clip_start) * 1000
+        PROCESSING_SECONDS.observe(clip_ms / 1000, "clip")
+        total_ms = (time.perf_counter() - request_start) * 1000
+        logger.info(
+            f"✂️ Clipped {len(unclipped['geojson']['features'])} -> {len(clipped['geojson']['features'])} "
+            f"features to boundary in {clip_ms:.1f}ms ({clip_ms / total_ms:.0%} of request)"
+        )
+        
+        _remember_power(clip_key, clipped, current_time)
+        return clipped
+    elif clip is not None:
+        raise ValueError("clip must be 'boundary'")
+    
+    # Check cache
+    current_time = time.time()
+    entry = _recall_power(bbox_key)
+    if entry is not None:
+        cached_data, cache_time = entry
+        logger.info(f"✅ Cache HIT for bbox {bbox_key} (age: {current_time - cache_time:.1f}s)")
+        record_cache("power", hit=True)
+        return cached_data
+    record_cache("power", hit=False)
+    
+    logger.info(f"⏳ Fetching power data for bbox {bbox_key} (cache miss)")
+    start_time = time.time()
+    
+    # Validate bbox size
+    diagonal_km = calculate_bbox_diagonal(bbox)
+    if diagonal_km > MAX_BBOX_DIAGONAL_KM:
+        raise ValueError("Zoom in - bounding box too large (max 60km diagonal)")
+    
+    try:
+        result_data = None
+        if power_snapshot.enabled:
+            # Views inside the on-disk snapshot are answered from its mmap'd arrays
+            result_data = await run_in_thread(power_snapshot.query, bbox)
+            record_cache("power_snapshot", hit=result_data is not None)
+        if result_data is None and shared_cache is not None:
+            # One worker queries Overpass for this view; the others read its result
+            result_data, current_time, source = await shared_cache.get_or_fill(
+                f"power:{bbox_key}", POWER_CACHE_TTL, lambda: _fetch_power(bbox)
+            )
+            record_cache("power_shared", hit=source != "filled")
+        elif result_data is None:
+            result_data = await _fetch_power(bbox)
+        features = result_data["geojson"]["features"]
+        transformer_count = result_data["stats"]["transformer_count"]
+        highest_voltage = result_data["stats"]["highest_voltage"]
+        lowest_voltage = result_data["stats"]["lowest_voltage"]
+        
+        if highest_voltage is not None:
+            logger.info(f"Voltage range: {lowest_voltage}V - {highest_voltage}V")
+        else:
+            logger.info("No voltage data found in current view")
         
         logger.info(f"Returning stats: transformers={transformer_count}, voltage_range={lowest_voltage}-{highest_voltage}")
         
         # Cache result
-        _power_cache[bbox_key] = (result_data, current_time)
+        _remember_power(bbox_key, result_data, current_time)
+        
+        # Fold into the stats summary grid so /api/op/stats can answer without Overpass
+        await run_in_thread(stats_grid.ingest, bbox, features)
         
         elapsed = time.time() - start_time
         logger.info(f"✅ Power data fetched in {elapsed:.2f}s - {len(features)} features, cache updated")
@@ -432,3 +996,184 @@ async def get_power_infrastructure(bbox: Tuple[float, float, float, float]) -> D
     except Exception as e:
         logger.error(f"Error fetching power infrastructure: {e}")
         raise
+
+
+async def _get_cached_entry(key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+    """Fresh (data, cached_at) from this process or, failing that, the shared tier"""
+    entry = _recall_power(key)
+    if entry is not None:
+        return entry
+    if shared_cache is not None:
+        entry = await run_in_thread(shared_cache.get, f"power:{key}")
+        if entry is not None and (time.time() - entry[1]) < POWER_CACHE_TTL:
+            _remember_power(key, *entry)
+            return entry
+    return None
+
+
+async def _get_cached_power(key: str) -> Optional[Dict[str, Any]]:
+    """Fresh power cache entry from this process or, failing that, the shared tier"""
+    entry = await _get_cached_entry(key)
+    return entry[0] if entry is not None else None
+
+
+def _snapshot_layers(
+    bbox: Tuple[float, float, float, float],
+    layers: List[str],
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Per-layer results from the power snapshot, or None if it doesn't cover bbox"""
+    results = {}
+    for layer in layers:
+        result_data = power_snapshot.query(bbox, [_LAYER_POWER[layer]])
+        if result_data is None:
+            return None
+        results[layer] = result_data
+    return results
+
+
+async def _store_power(key: str, data: Dict[str, Any], cached_at: float) -> None:
+    _remember_power(key, data, cached_at)
+    if shared_cache is not None:
+        await run_in_thread(shared_cache.put, f"power:{key}", data, cached_at)
+
+
+async def _get_layer_results(
+    bbox: Tuple[float, float, float, float],
+    bbox_key: str,
+    layers: List[str],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Unclipped per-layer results
+    
+    Cached layers are reused. The rest are carved out of the full power
+    result when that is cached or all layers are needed (so /power and
+    layered requests share one entry and one fetch); otherwise they are
+    fetched together in one query, claimed through the shared cache so
+    only one worker runs it.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for layer in layers:
+        cached = await _get_cached_power(f"{bbox_key}|layer={layer}")
+        record_cache("power_layer", hit=cached is not None)
+        if cached is not None:
+            results[layer] = cached
+        else:
+            missing.append(layer)
+    if not missing:
+        return results
+    
+    full_entry = await _get_cached_entry(bbox_key)
+    if full_entry is None and len(missing) == len(POWER_LAYERS):
+        # Same path as /power: snapshot, shared-cache claim, Overpass; ingests the stats grid
+        full = await get_power_infrastructure(bbox)
+        # Stored with its real creation time (shared tier entries can be older than now)
+        full_entry = _recall_power(bbox_key) or (full, time.time())
+    if full_entry is not None:
+        full, cached_at = full_entry
+        split = await run_in_thread(split_power_layers, full, missing)
+        for layer, result_data in split.items():
+            # Local only - the shared tier already holds the full entry - and never past the full entry's TTL
+            _remember_power(f"{bbox_key}|layer={layer}", result_data, cached_at)
+            results[layer] = result_data
+        return results
+    
+    logger.info(f"⏳ Fetching power layers {','.join(missing)} for bbox {bbox_key} (cache miss)")
+    start_time = time.time()
+    
+    fetched = None
+    if power_snapshot.enabled:
+        fetched = await run_in_thread(_snapshot_layers, bbox, missing)
+        record_cache("power_snapshot", hit=fetched is not None)
+    if fetched is None:
+        async def fetch_layers() -> Dict[str, Dict[str, Any]]:
+            with phase("overpass_fetch"):
+                payload = await power_batcher.fetch(bbox, missing)
+            
+            build_start = time.perf_counter()
+            built = await run_cpu_bound(build_power_layers, payload, missing)
+            build_seconds = time.perf_counter() - build_start
+            PROCESSING_SECONDS.observe(build_seconds, "build_features")
+            record_phase("build_features", build_seconds)
+            return built
+        
+        if shared_cache is not None:
+            # One worker queries Overpass for this layer set; the others read its result
+            fetched, start_time, source = await shared_cache.get_or_fill(
+                f"power:{bbox_key}|layers={','.join(missing)}", POWER_CACHE_TTL, fetch_layers
+            )
+            record_cache("power_shared", hit=source != "filled")
+        else:
+            fetched = await fetch_layers()
+    
+    for layer, result_data in fetched.items():
+        await _store_power(f"{bbox_key}|layer={layer}", result_data, start_time)
+        results[layer] = result_data
+    
+    # The stats grid needs every layer of a cell, so only complete fetches are folded in
+    if len(missing) == len(POWER_LAYERS):
+        features = [feature for result_data in fetched.values() for feature in result_data["geojson"]["features"]]
+        await run_in_thread(stats_grid.ingest, bbox, features)
+    
+    feature_count = sum(len(result_data["geojson"]["features"]) for result_data in fetched.values())
+    logger.info(f"✅ Power layers fetched in {time.time() - start_time:.2f}s - {feature_count} features, cache updated")
+    return results
+
+
+async def get_power_layers(
+    bbox: Tuple[float, float, float, float],
+    layers: List[str],
+    clip: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Fetch selected power layers for a bounding box, each cached on its own
+    
+    Toggling one layer on the map only queries (and caches) that layer;
+    layers already cached for the view are not fetched again.
+    
+    Args:
+        bbox: (south, west, north, east) in decimal degrees
+        layers: Layers from parse_layers (subset of POWER_LAYERS)
+        clip: "boundary" to clip features (and stats) to the city boundary
+        
+    Returns:
+        Dict with one FeatureCollection per requested layer, merged 'stats' and 'layers'
+    """
+    if clip not in (None, "boundary"):
+        raise ValueError("clip must be 'boundary'")
+    if calculate_bbox_diagonal(bbox) > MAX_BBOX_DIAGONAL_KM:
+        raise ValueError("Zoom in - bounding box too large (max 60km diagonal)")
+    
+    bbox_key = str(round_bbox(bbox, decimals=3))
+    
+    try:
+        if clip == "boundary":
+            results: Dict[str, Dict[str, Any]] = {}
+            missing = []
+            for layer in layers:
+                cached = await _get_cached_power(f"{bbox_key}|layer={layer}|clip=boundary")
+                record_cache("power_layer_clipped", hit=cached is not None)
+                if cached is not None:
+                    results[layer] = cached
+                else:
+                    missing.append(layer)
+            if missing:
+                unclipped = await _get_layer_results(bbox, bbox_key, missing)
+                boundary = await get_boundary_geometry()
+                for layer in missing:
+                    with PROCESSING_SECONDS.time("clip"):
+                        results[layer] = await clip_off_loop(unclipped[layer], boundary)
+                    await _store_power(f"{bbox_key}|layer={layer}|clip=boundary", results[layer], time.time())
+        else:
+            results = await _get_layer_results(bbox, bbox_key, layers)
+        
+        response: Dict[str, Any] = {layer: results[layer]["geojson"] for layer in layers}
+        response["stats"] = merge_layer_stats([results[layer]["stats"] for layer in layers])
+        response["layers"] = layers
+        return response
+        
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching power layers: {e}")
+        raise
@@ -0,0 +1,506 @@
+"""
+Bulk export of the city's power dataset
+Streams every power feature in the Overland Park view (optionally clipped
+to the boundary) as newline-delimited GeoJSON, FlatGeobuf or GeoParquet.
+Files are encoded chunk by chunk, so the response is never held in
+memory; beyond the dataset itself (read lazily from the mmap'd snapshot
+when there is one) only a few numbers per feature are kept.
+
+FlatGeobuf files carry a packed Hilbert R-tree and GeoParquet files are
+written in Hilbert order with a bbox covering column, so GIS tools can
+read just the area they need. GeoParquet needs pyarrow (optional).
+"""
+
+import json
+import struct
+import logging
+from array import array
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.services.executor import run_in_thread
+from app.services.overpass_service import OVERLAND_PARK_BBOX, get_power_infrastructure
+from app.services.power_snapshot import power_snapshot
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for geoparquet
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+# Features encoded per streamed chunk (and per GeoParquet row group)
+EXPORT_CHUNK_FEATURES = 2000
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/geo+json-seq", "ndjson"),
+    "flatgeobuf": ("application/flatgeobuf", "fgb"),
+    "geoparquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# FlatGeobuf enums (header.fbs)
+_FGB_MAGIC = b"fgb\x03fgb\x00"
+_FGB_GEOMETRY_TYPES = {"Point": 1, "LineString": 2, "MultiLineString": 5}
+_FGB_BOOL, _FGB_LONG, _FGB_DOUBLE, _FGB_STRING = 2, 7, 10, 11
+_FGB_INDEX_NODE_SIZE = 16
+_FGB_NODE = struct.Struct("<4dQ")
+
+_HILBERT_MAX = (1 << 16) - 1
+
+# WKB geometry type codes
+_WKB_TYPES = {"Point": 1, "LineString": 2, "MultiLineString": 5}
+
+
+class ExportUnavailableError(Exception):
+    """The requested format needs an optional dependency that isn't installed"""
+
+
+def _hilbert(x: int, y: int) -> int:
+    """Position of (x, y) on a 2^16 x 2^16 Hilbert curve"""
+    d = 0
+    s = 1 << 15
+    while s:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x, y = _HILBERT_MAX - x, _HILBERT_MAX - y
+            x, y = y, x
+        s >>= 1
+    return d
+
+
+def _lines(geometry: Dict[str, Any]) -> List[List[List[float]]]:
+    """Coordinate lists of a Point / LineString / MultiLineString"""
+    if geometry["type"] == "Point":
+        return [[geometry["coordinates"]]]
+    if geometry["type"] == "LineString":
+        return [geometry["coordinates"]]
+    return geometry["coordinates"]
+
+
+def _column_type(types: set) -> int:
+    if types == {bool}:
+        return _FGB_BOOL
+    if types == {int}:
+        return _FGB_LONG
+    if types and types <= {int, float}:
+        return _FGB_DOUBLE
+    return _FGB_STRING
+
+
+def _text(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+class _Dataset:
+    """
+    Features by position plus what every format needs up front
+
+    The scan keeps per-feature bounds and the Hilbert order, the property
+    columns with their types and the overall envelope - not the features.
+    """
+
+    def __init__(self, count: int, feature: Callable[[int], Dict[str, Any]]):
+        self.count = count
+        self.feature = feature
+        self.bounds = array("d")
+        self.columns: Dict[str, int] = {}
+        self.column_index: Dict[str, int] = {}
+        self.geometry_types: List[str] = []
+        self.envelope = [0.0, 0.0, 0.0, 0.0]
+        self.order = array("I")
+
+    def scan(self) -> None:
+        column_types: Dict[str, set] = {}
+        geometry_types = set()
+        for i in range(self.count):
+            feature = self.feature(i)
+            geometry_types.add(feature["geometry"]["type"])
+            coordinates = [c for line in _lines(feature["geometry"]) for c in line]
+            lons = [c[0] for c in coordinates]
+            lats = [c[1] for c in coordinates]
+            self.bounds.extend((min(lons), min(lats), max(lons), max(lats)))
+            for key, value in feature["properties"].items():
+                if value is not None:
+                    column_types.setdefault(key, set()).add(type(value))
+
+        self.columns = {key: _column_type(types) for key, types in column_types.items()}
+        self.column_index = {key: i for i, key in enumerate(self.columns)}
+        self.geometry_types = sorted(geometry_types)
+        if not self.count:
+            return
+
+        bounds = self.bounds
+        min_x, min_y = min(bounds[0::4]), min(bounds[1::4])
+        max_x, max_y = max(bounds[2::4]), max(bounds[3::4])
+        self.envelope = [min_x, min_y, max_x, max_y]
+        width, height = (max_x - min_x) or 1.0, (max_y - min_y) or 1.0
+        hilbert = array("Q", (
+            _hilbert(
+                int(_HILBERT_MAX * ((bounds[4 * i] + bounds[4 * i + 2]) / 2 - min_x) / width),
+                int(_HILBERT_MAX * ((bounds[4 * i + 1] + bounds[4 * i + 3]) / 2 - min_y) / height),
+            )
+            for i in range(self.count)
+        ))
+        self.order = array("I", sorted(range(self.count), key=hilbert.__getitem__))
+
+
+# --- FlatBuffers (front-to-back: every table's children follow it, so offsets point forward) ---
+
+_FB_SCALARS = {"bool": struct.Struct("<B"), "u8": struct.Struct("<B"), "u16": struct.Struct("<H"),
+               "i32": struct.Struct("<i"), "u64": struct.Struct("<Q")}
+
+
+def _fb_pad(buf: bytearray, alignment: int, extra: int = 0) -> None:
+    buf.extend(bytes(-(len(buf) + extra) % alignment))
+
+
+def _fb_table(buf: bytearray, fields: Dict[int, Tuple[str, Any]]) -> int:
+    """Append a table (vtable first); fields are field id -> (kind, value)"""
+    slots = max(fields) + 1 if fields else 0
+    _fb_pad(buf, 2)
+    vtable_pos = len(buf)
+    buf.extend(bytes(4 + 2 * slots))
+
+    _fb_pad(buf, 4)
+    table_pos = len(buf)
+    buf.extend(struct.pack("<i", table_pos - vtable_pos))
+    positions = {}
+    scalars = sorted(
+        ((field, kind, value) for field, (kind, value) in fields.items() if kind in _FB_SCALARS),
+        key=lambda f: -_FB_SCALARS[f[1]].size,
+    )
+    for field, kind, value in scalars:
+        _fb_pad(buf, _FB_SCALARS[kind].size)
+        positions[field] = len(buf)
+        buf.extend(_FB_SCALARS[kind].pack(value))
+    references = [(field, kind, value) for field, (kind, value) in fields.items() if kind not in _FB_SCALARS]
+    for field, _, _ in references:
+        _fb_pad(buf, 4)
+        positions[field] = len(buf)
+        buf.extend(bytes(4))
+
+    struct.pack_into("<HH", buf, vtable_pos, 4 + 2 * slots, len(buf) - table_pos)
+    for field, position in positions.items():
+        struct.pack_into("<H", buf, vtable_pos + 4 + 2 * field, position - table_pos)
+    for field, kind, value in references:
+        child = _fb_child(buf, kind, value)
+        struct.pack_into("<I", buf, positions[field], child - positions[field])
+    return table_pos
+
+
+def _fb_child(buf: bytearray, kind: str, value: Any) -> int:
+    if kind == "table":
+        return _fb_table(buf, value)
+    if kind == "f64s":
+        _fb_pad(buf, 8, extra=4)
+        position = len(buf)
+        buf.extend(struct.pack(f"<I{len(value)}d", len(value), *value))
+        return position
+
+    _fb_pad(buf, 4)
+    position = len(buf)
+    if kind == "string":
+        data = value.encode("utf-8")
+        buf.extend(struct.pack("<I", len(data)) + data + b"\0")
+    elif kind == "bytes":
+        buf.extend(struct.pack("<I", len(value)) + value)
+    elif kind == "u32s":
+        buf.extend(struct.pack(f"<I{len(value)}I", len(value), *value))
+    elif kind == "tables":
+        buf.extend(struct.pack("<I", len(value)) + bytes(4 * len(value)))
+        for i, table in enumerate(value):
+            slot = position + 4 + 4 * i
+            struct.pack_into("<I", buf, slot, _fb_table(buf, table) - slot)
+    else:
+        raise ValueError(f"Unknown FlatBuffers field kind: {kind}")
+    return position
+
+
+def _fb_size_prefixed(fields: Dict[int, Tuple[str, Any]]) -> bytes:
+    buf = bytearray(4)
+    struct.pack_into("<I", buf, 0, _fb_table(buf, fields))
+    return struct.pack("<I", len(buf)) + bytes(buf)
+
+
+class _FlatGeobufWriter:
+    """Header, packed Hilbert R-tree and features of a FlatGeobuf file"""
+
+    def __init__(self, dataset: _Dataset):
+        self.dataset = dataset
+
+    def header(self) -> bytes:
+        dataset = self.dataset
+        types = dataset.geometry_types
+        fields: Dict[int, Tuple[str, Any]] = {
+            0: ("string", "overland_park_power"),
+            2: ("u8", _FGB_GEOMETRY_TYPES[types[0]] if len(types) == 1 else 0),
+            7: ("tables", [
+                {0: ("string", name), 1: ("u8", column_type)} for name, column_type in dataset.columns.items()
+            ]),
+            8: ("u64", dataset.count),
+            9: ("u16", _FGB_INDEX_NODE_SIZE if dataset.count else 0),
+            10: ("table", {0: ("string", "EPSG"), 1: ("i32", 4326)}),
+        }
+        if dataset.count:
+            fields[1] = ("f64s", dataset.envelope)
+        return _FGB_MAGIC + _fb_size_prefixed(fields)
+
+    def feature(self, i: int) -> bytes:
+        dataset = self.dataset
+        feature = dataset.feature(i)
+        geometry = feature["geometry"]
+        lines = _lines(geometry)
+        geometry_fields: Dict[int, Tuple[str, Any]] = {
+            1: ("f64s", [ordinate for line in lines for coordinate in line for ordinate in coordinate[:2]]),
+            6: ("u8", _FGB_GEOMETRY_TYPES[geometry["type"]]),
+        }
+        if geometry["type"] == "MultiLineString":
+            ends, total = [], 0
+            for line in lines:
+                total += len(line)
+                ends.append(total)
+            geometry_fields[0] = ("u32s", ends)
+
+        properties = bytearray()
+        for key, value in feature["properties"].items():
+            if value is None:
+                continue
+            column_type = dataset.columns[key]
+            properties.extend(struct.pack("<H", dataset.column_index[key]))
+            if column_type == _FGB_BOOL:
+                properties.extend(struct.pack("<B", value))
+            elif column_type == _FGB_LONG:
+                properties.extend(struct.pack("<q", value))
+            elif column_type == _FGB_DOUBLE:
+                properties.extend(struct.pack("<d", value))
+            else:
+                data = _text(value).encode("utf-8")
+                properties.extend(struct.pack("<I", len(data)) + data)
+
+        return _fb_size_prefixed({0: ("table", geometry_fields), 1: ("bytes", bytes(properties))})
+
+    def index(self, sizes: Sequence[int]) -> List[bytes]:
+        """
+        Packed Hilbert R-tree over the features in Hilbert order, root first
+
+        Leaves point at each feature's byte offset in the feature section,
+        inner nodes at the position of their first child node.
+        """
+        dataset = self.dataset
+        # Always at least one level above the leaves (readers size the index the same way)
+        level_counts = [dataset.count]
+        while len(level_counts) == 1 or level_counts[-1] != 1:
+            level_counts.append(-(-level_counts[-1] // _FGB_INDEX_NODE_SIZE))
+        node_count = sum(level_counts)
+        level_starts, start = [], node_count
+        for count in level_counts:
+            start -= count
+            level_starts.append(start)
+
+        boxes = array("d", bytes(8 * 4 * node_count))
+        offsets = array("Q", bytes(8 * node_count))
+        position = level_starts[0]
+        offset = 0
+        for i, size in zip(dataset.order, sizes):
+            boxes[4 * position:4 * position + 4] = dataset.bounds[4 * i:4 * i + 4]
+            offsets[position] = offset
+            offset += size
+            position += 1
+        for level in range(len(level_counts) - 1):
+            child, end = level_starts[level], level_starts[level] + level_counts[level]
+            parent = level_starts[level + 1]
+            while child < end:
+                last = min(child + _FGB_INDEX_NODE_SIZE, end)
+                boxes[4 * parent:4 * parent + 4] = array("d", (
+                    min(boxes[4 * j] for j in range(child, last)),
+                    min(boxes[4 * j + 1] for j in range(child, last)),
+                    max(boxes[4 * j + 2] for j in range(child, last)),
+                    max(boxes[4 * j + 3] for j in range(child, last)),
+                ))
+                offsets[parent] = child
+                child, parent = last, parent + 1
+
+        chunks = []
+        for first in range(0, node_count, EXPORT_CHUNK_FEATURES * 4):
+            chunk = bytearray()
+            for node in range(first, min(first + EXPORT_CHUNK_FEATURES * 4, node_count)):
+                chunk.extend(_FGB_NODE.pack(*boxes[4 * node:4 * node + 4], offsets[node]))
+            chunks.append(bytes(chunk))
+        return chunks
+
+
+def _wkb(geometry: Dict[str, Any]) -> bytes:
+    """Little-endian WKB of a Point / LineString / MultiLineString"""
+    kind = geometry["type"]
+    if kind == "Point":
+        return struct.pack("<BI2d", 1, _WKB_TYPES[kind], *geometry["coordinates"][:2])
+    if kind == "LineString":
+        coordinates = geometry["coordinates"]
+        return struct.pack(f"<BII{2 * len(coordinates)}d", 1, _WKB_TYPES[kind], len(coordinates),
+                           *(ordinate for c in coordinates for ordinate in c[:2]))
+    return struct.pack("<BII", 1, _WKB_TYPES[kind], len(geometry["coordinates"])) + b"".join(
+        _wkb({"type": "LineString", "coordinates": line}) for line in geometry["coordinates"]
+    )
+
+
+class _ChunkSink:
+    """Write target for ParquetWriter whose output is drained after every row group"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.buffer.extend(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.buffer = bytes(self.buffer), bytearray()
+        return data
+
+
+class _GeoParquetWriter:
+    """Row groups of WKB geometry, bbox covering struct and one column per property"""
+
+    _ARROW_TYPES = {_FGB_BOOL: "bool_", _FGB_LONG: "int64", _FGB_DOUBLE: "float64", _FGB_STRING: "string"}
+
+    def __init__(self, dataset: _Dataset):
+        self.dataset = dataset
+        self.sink = _ChunkSink()
+        bbox_type = pa.struct([(name, pa.float64()) for name in ("xmin", "ymin", "xmax", "ymax")])
+        fields = [pa.field("geometry", pa.binary()), pa.field("bbox", bbox_type)]
+        fields += [
+            pa.field(name, getattr(pa, self._ARROW_TYPES[column_type])())
+            for name, column_type in dataset.columns.items()
+            if name not in ("geometry", "bbox")
+        ]
+        geo = {
+            "version": "1.1.0",
+            "primary_column": "geometry",
+            "columns": {"geometry": {
+                "encoding": "WKB",
+                "geometry_types": dataset.geometry_types,
+                "bbox": dataset.envelope,
+                "covering": {"bbox": {axis: ["bbox", axis] for axis in ("xmin", "ymin", "xmax", "ymax")}},
+            }},
+        }
+        self.schema = pa.schema(fields, metadata={"geo": json.dumps(geo)})
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def row_group(self, indexes: Sequence[int]) -> bytes:
+        dataset = self.dataset
+        columns: Dict[str, List[Any]] = {field.name: [] for field in self.schema}
+        for i in indexes:
+            feature = dataset.feature(i)
+            columns["geometry"].append(_wkb(feature["geometry"]))
+            columns["bbox"].append(dict(zip(("xmin", "ymin", "xmax", "ymax"), dataset.bounds[4 * i:4 * i + 4])))
+            properties = feature["properties"]
+            for name in columns:
+                if name not in ("geometry", "bbox"):
+                    value = properties.get(name)
+                    if value is not None and dataset.columns[name] == _FGB_STRING:
+                        value = _text(value)
+                    elif value is not None and dataset.columns[name] == _FGB_DOUBLE:
+                        value = float(value)
+                    columns[name].append(value)
+        self.writer.write_table(pa.Table.from_pydict(columns, schema=self.schema))
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+class PowerExport:
+    """A prepared export: the scanned dataset plus the format's streaming encoder"""
+
+    def __init__(self, export_format: str, dataset: _Dataset, clip: Optional[str]):
+        self.format = export_format
+        self.dataset = dataset
+        self.media_type, extension = EXPORT_FORMATS[export_format]
+        self.filename = f"overland-park-power{'-clipped' if clip else ''}.{extension}"
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Encoded file, one chunk of features at a time (encoding runs off the event loop)"""
+        dataset = self.dataset
+        if self.format == "ndjson":
+            for first in range(0, dataset.count, EXPORT_CHUNK_FEATURES):
+                yield await run_in_thread(self._ndjson_chunk, range(first, min(first + EXPORT_CHUNK_FEATURES, dataset.count)))
+            return
+
+        order = dataset.order
+        batches = [order[first:first + EXPORT_CHUNK_FEATURES] for first in range(0, len(order), EXPORT_CHUNK_FEATURES)]
+        if self.format == "flatgeobuf":
+            writer = _FlatGeobufWriter(dataset)
+            yield writer.header()
+            if dataset.count:
+                # Leaf offsets need every feature's encoded size before the first feature is sent
+                sizes = await run_in_thread(lambda: array("I", (len(writer.feature(i)) for i in order)))
+                for chunk in await run_in_thread(writer.index, sizes):
+                    yield chunk
+            for batch in batches:
+                yield await run_in_thread(lambda: b"".join(writer.feature(i) for i in batch))
+        else:
+            writer = await run_in_thread(_GeoParquetWriter, dataset)
+            for batch in batches:
+                yield await run_in_thread(writer.row_group, batch)
+            yield await run_in_thread(writer.close)
+
+    def _ndjson_chunk(self, indexes: Sequence[int]) -> bytes:
+        return "".join(
+            json.dumps(self.dataset.feature(i), separators=(",", ":")) + "\n" for i in indexes
+        ).encode("utf-8")
+
+
+async def prepare_export(export_format: str, clip: Optional[str] = None) -> PowerExport:
+    """
+    Load and scan the city's power dataset for an export
+
+    Unclipped exports read features one at a time from the power snapshot
+    when it covers the city; otherwise the (cached) get_power_infrastructure
+    result for the city view is used. Runs before the response starts, so
+    failures still get a proper status code.
+
+    Args:
+        export_format: One of EXPORT_FORMATS
+        clip: "boundary" to export only what lies inside the city boundary
+
+    Raises:
+        ValueError: Unknown format or clip
+        ExportUnavailableError: geoparquet without pyarrow installed
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if export_format == "geoparquet" and pa is None:
+        raise ExportUnavailableError("geoparquet export needs pyarrow (pip install pyarrow)")
+
+    snapshot = await run_in_thread(power_snapshot.current) if clip is None else None
+    if snapshot is not None and snapshot.covers(OVERLAND_PARK_BBOX):
+        if snapshot.bbox == tuple(OVERLAND_PARK_BBOX):
+            dataset = _Dataset(snapshot.header["features"], snapshot.feature)
+        else:
+            indexes = [i for i in snapshot.candidates(OVERLAND_PARK_BBOX) if snapshot.matches(i, OVERLAND_PARK_BBOX)]
+            dataset = _Dataset(len(indexes), lambda i: snapshot.feature(indexes[i]))
+    else:
+        features = (await get_power_infrastructure(OVERLAND_PARK_BBOX, clip=clip))["geojson"]["features"]
+        dataset = _Dataset(len(features), features.__getitem__)
+
+    if export_format != "ndjson":
+        await run_in_thread(dataset.scan)
+    logger.info(f"📦 Exporting {dataset.count} power features as {export_format}{' (clipped)' if clip else ''}")
+    return PowerExport(export_format, dataset, clip)
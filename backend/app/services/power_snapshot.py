@@ -0,0 +1,439 @@
+"""
+Memory-mapped power dataset snapshots
+A snapshot is one immutable file holding a processed power result (the
+output of get_power_infrastructure for a large bbox) as columnar arrays:
+coordinates, per-feature bounds, length/voltage columns for stats, a
+deduplicated tag string table and a grid spatial index. It is written
+atomically and opened with mmap, so a fresh worker answers /api/op/power
+for any view inside the snapshot without Overpass, and all workers on a
+host share the file's pages through the page cache.
+"""
+
+import os
+import sys
+import json
+import mmap
+import functools
+import time
+import struct
+import logging
+import threading
+from array import array
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+from app.services.overpass_batcher import element_in_bbox
+
+logger = logging.getLogger(__name__)
+
+# Snapshot file built by build_power_snapshot.py (empty = disabled)
+POWER_SNAPSHOT_PATH = os.getenv("POWER_SNAPSHOT_PATH", "")
+# Snapshots older than this (seconds) are ignored; 0 = never expire
+POWER_SNAPSHOT_MAX_AGE = float(os.getenv("POWER_SNAPSHOT_MAX_AGE", "86400"))
+# Spatial index cell edge in degrees
+SNAPSHOT_CELL_SIZE = 0.01
+
+_MAGIC = b"PGSNAP01"
+_PREFIX = struct.Struct("<8sI")  # magic, header length
+_ALIGN = 8
+
+# Power tag <-> column code; transformers are points, the rest linestrings
+_POWER_CODES = {"line": 0, "minor_line": 1, "transformer": 2}
+_NO_VOLTAGE = -1
+# Decoded tag strings kept per open snapshot
+_STRING_CACHE_SIZE = 16384
+
+Bbox = Tuple[float, float, float, float]
+
+# name -> array typecode, in file order
+_SECTIONS = [
+    ("power", "B"),
+    ("coord_offsets", "I"),
+    ("lon", "d"),
+    ("lat", "d"),
+    ("min_lon", "d"),
+    ("min_lat", "d"),
+    ("max_lon", "d"),
+    ("max_lat", "d"),
+    ("length_miles", "d"),
+    ("voltage", "q"),
+    ("tag_offsets", "I"),
+    ("tag_keys", "I"),
+    ("tag_values", "I"),
+    ("string_offsets", "I"),
+    ("strings", "B"),
+    ("cell_offsets", "I"),
+    ("cell_items", "I"),
+]
+
+
+def write_snapshot(path: str, result: Dict[str, Any], bbox: Bbox, cell_size: float = SNAPSHOT_CELL_SIZE) -> Dict[str, Any]:
+    """
+    Write an unclipped power result as a snapshot file (atomically)
+
+    Args:
+        path: Destination file; replaced in one rename, so readers never see a partial file
+        result: Result of get_power_infrastructure(bbox) (no clip)
+        bbox: (south, west, north, east) the result was fetched for
+        cell_size: Spatial index cell edge in degrees
+
+    Returns:
+        Header metadata of the written snapshot (plus 'bytes')
+    """
+    from app.services.overpass_service import calculate_linestring_length, parse_voltage_value
+
+    columns = {name: array(typecode) for name, typecode in _SECTIONS}
+    columns["coord_offsets"].append(0)
+    columns["tag_offsets"].append(0)
+    strings: Dict[str, int] = {}
+
+    def intern(value: Any) -> int:
+        # JSON text keeps value types (osm_id and lengths are numbers, tags strings)
+        text = json.dumps(value, ensure_ascii=False)
+        if text not in strings:
+            strings[text] = len(strings)
+        return strings[text]
+
+    features = result["geojson"]["features"]
+    for feature in features:
+        geometry = feature["geometry"]
+        properties = feature["properties"]
+        power = properties.get("power")
+        if power not in _POWER_CODES:
+            raise ValueError(f"Unsupported power feature: {power}")
+        if geometry["type"] == "Point":
+            coordinates = [geometry["coordinates"]]
+            length_miles = 0.0
+        elif geometry["type"] == "LineString":
+            coordinates = geometry["coordinates"]
+            # Unrounded (the property is rounded to 3 decimals) so sub-view stats sum like build_power_result's
+            length_miles = calculate_linestring_length(coordinates) * 0.621371
+        else:
+            raise ValueError(f"Snapshots hold unclipped results only (got {geometry['type']})")
+
+        columns["power"].append(_POWER_CODES[power])
+        lons = [coordinate[0] for coordinate in coordinates]
+        lats = [coordinate[1] for coordinate in coordinates]
+        columns["lon"].extend(lons)
+        columns["lat"].extend(lats)
+        columns["coord_offsets"].append(len(columns["lon"]))
+        columns["min_lon"].append(min(lons))
+        columns["min_lat"].append(min(lats))
+        columns["max_lon"].append(max(lons))
+        columns["max_lat"].append(max(lats))
+        columns["length_miles"].append(length_miles)
+        voltage = parse_voltage_value(properties.get("voltage"))
+        columns["voltage"].append(voltage if voltage is not None else _NO_VOLTAGE)
+        for key, value in properties.items():
+            columns["tag_keys"].append(intern(key))
+            columns["tag_values"].append(intern(value))
+        columns["tag_offsets"].append(len(columns["tag_keys"]))
+
+    columns["string_offsets"].append(0)
+    for text in strings:
+        columns["strings"].frombytes(text.encode("utf-8"))
+        columns["string_offsets"].append(len(columns["strings"]))
+
+    # Grid index: every cell lists the features whose bounds overlap it
+    south, west, north, east = bbox
+    rows = max(1, int((north - south) / cell_size + 0.999999))
+    cols = max(1, int((east - west) / cell_size + 0.999999))
+    cells: List[List[int]] = [[] for _ in range(rows * cols)]
+    for i in range(len(features)):
+        r0, c0 = _cell(columns["min_lat"][i], columns["min_lon"][i], bbox, cell_size, rows, cols)
+        r1, c1 = _cell(columns["max_lat"][i], columns["max_lon"][i], bbox, cell_size, rows, cols)
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                cells[r * cols + c].append(i)
+    columns["cell_offsets"].append(0)
+    for items in cells:
+        columns["cell_items"].extend(items)
+        columns["cell_offsets"].append(len(columns["cell_items"]))
+
+    header: Dict[str, Any] = {
+        "version": 1,
+        "byteorder": sys.byteorder,
+        "bbox": list(bbox),
+        "built_at": time.time(),
+        "features": len(features),
+        "stats": result["stats"],
+        "grid": {"cell_size": cell_size, "rows": rows, "cols": cols},
+        "sections": {},
+    }
+    header_bytes = _layout_header(header, [(name, len(columns[name]), columns[name].itemsize) for name, _ in _SECTIONS])
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(_MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        for name, _ in _SECTIONS:
+            data = columns[name].tobytes()
+            f.write(data)
+            f.write(b"\0" * (_aligned(len(data)) - len(data)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    header["bytes"] = os.path.getsize(path)
+    return header
+
+
+def _layout_header(header: Dict[str, Any], sections: List[Tuple[str, int, int]], reserve: int = 16) -> bytes:
+    """
+    Fill in header["sections"] and encode the header, padded to the first section
+
+    Section offsets depend on the header length and vice versa: room for
+    the offset digits is reserved up front, and if the encoded header
+    still outgrows it the data start moves out and the offsets are redone.
+
+    Args:
+        header: Header dict; its "sections" entry is replaced
+        sections: (name, item count, item size) in file order
+        reserve: Bytes reserved per section for its offset digits
+
+    Returns:
+        Header bytes ending exactly where the first section starts
+    """
+    relative = {}
+    offset = 0
+    for name, count, itemsize in sections:
+        relative[name] = offset
+        offset += _aligned(count * itemsize)
+
+    counts = {name: count for name, count, _ in sections}
+    header["sections"] = {name: [0, counts[name]] for name in relative}
+    data_start = _aligned(_PREFIX.size + len(json.dumps(header)) + reserve * len(sections))
+    while True:
+        header["sections"] = {name: [data_start + relative[name], counts[name]] for name in relative}
+        encoded = json.dumps(header).encode("utf-8")
+        if _PREFIX.size + len(encoded) <= data_start:
+            return encoded.ljust(data_start - _PREFIX.size)
+        data_start = _aligned(_PREFIX.size + len(encoded))
+
+
+def _aligned(size: int) -> int:
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _cell(lat: float, lon: float, bbox: Bbox, cell_size: float, rows: int, cols: int) -> Tuple[int, int]:
+    """Grid cell of a point, clamped to the grid"""
+    row = min(rows - 1, max(0, int((lat - bbox[0]) / cell_size)))
+    col = min(cols - 1, max(0, int((lon - bbox[1]) / cell_size)))
+    return row, col
+
+
+class _Snapshot:
+    """One opened snapshot file: header plus zero-copy views into the mapping"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = _PREFIX.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a power snapshot")
+        self.header = json.loads(bytes(self._mmap[_PREFIX.size:_PREFIX.size + header_length]))
+        if self.header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {self.header['byteorder']}-endian machine")
+
+        view = memoryview(self._mmap)
+        self.columns: Dict[str, memoryview] = {}
+        for name, typecode in _SECTIONS:
+            offset, count = self.header["sections"][name]
+            itemsize = array(typecode).itemsize
+            self.columns[name] = view[offset:offset + count * itemsize].cast(typecode)
+
+        self.bbox: Bbox = tuple(self.header["bbox"])
+        self.grid = self.header["grid"]
+        # Bounded - ids and lengths are unique per feature, so an unbounded memo would grow with the dataset
+        self.string = functools.lru_cache(maxsize=_STRING_CACHE_SIZE)(self._decode_string)
+
+    def _decode_string(self, index: int) -> Any:
+        offsets = self.columns["string_offsets"]
+        return json.loads(bytes(self.columns["strings"][offsets[index]:offsets[index + 1]]))
+
+    def covers(self, bbox: Bbox) -> bool:
+        south, west, north, east = self.bbox
+        return south <= bbox[0] and west <= bbox[1] and bbox[2] <= north and bbox[3] <= east
+
+    def candidates(self, bbox: Bbox) -> List[int]:
+        """Features in the grid cells overlapping bbox, in snapshot order"""
+        rows, cols, cell_size = self.grid["rows"], self.grid["cols"], self.grid["cell_size"]
+        r0, c0 = _cell(bbox[0], bbox[1], self.bbox, cell_size, rows, cols)
+        r1, c1 = _cell(bbox[2], bbox[3], self.bbox, cell_size, rows, cols)
+        offsets, items = self.columns["cell_offsets"], self.columns["cell_items"]
+        found = set()
+        for r in range(r0, r1 + 1):
+            start = r * cols
+            found.update(items[offsets[start + c0]:offsets[start + c1 + 1]])
+        return sorted(found)
+
+    def matches(self, i: int, bbox: Bbox) -> bool:
+        """Whether Overpass would return feature i for a bbox clause"""
+        south, west, north, east = bbox
+        columns = self.columns
+        min_lat, min_lon, max_lat, max_lon = (
+            columns["min_lat"][i], columns["min_lon"][i], columns["max_lat"][i], columns["max_lon"][i]
+        )
+        if min_lat > north or max_lat < south or min_lon > east or max_lon < west:
+            return False
+        if south <= min_lat and max_lat <= north and west <= min_lon and max_lon <= east:
+            return True
+        start, end = columns["coord_offsets"][i], columns["coord_offsets"][i + 1]
+        element = {"type": "way", "geometry": [
+            {"lon": columns["lon"][j], "lat": columns["lat"][j]} for j in range(start, end)
+        ]}
+        return element_in_bbox(element, bbox)
+
+    def feature(self, i: int) -> Dict[str, Any]:
+        columns = self.columns
+        start, end = columns["tag_offsets"][i], columns["tag_offsets"][i + 1]
+        string = self.string
+        properties = {
+            string(key): string(value)
+            for key, value in zip(columns["tag_keys"][start:end].tolist(), columns["tag_values"][start:end].tolist())
+        }
+        start, end = columns["coord_offsets"][i], columns["coord_offsets"][i + 1]
+        coordinates = list(map(list, zip(columns["lon"][start:end].tolist(), columns["lat"][start:end].tolist())))
+        if columns["power"][i] == _POWER_CODES["transformer"]:
+            geometry = {"type": "Point", "coordinates": coordinates[0]}
+        else:
+            geometry = {"type": "LineString", "coordinates": coordinates}
+        return {"type": "Feature", "geometry": geometry, "properties": properties}
+
+    def stats(self, indexes: List[int]) -> Dict[str, Any]:
+        """/power stats over the given features (same sums as build_power_result)"""
+        powers, lengths, voltages = self.columns["power"], self.columns["length_miles"], self.columns["voltage"]
+        miles = [0.0, 0.0]
+        transformer_count = 0
+        voltage_values = []
+        for i in indexes:
+            code = powers[i]
+            if code == _POWER_CODES["transformer"]:
+                transformer_count += 1
+            else:
+                miles[code] += lengths[i]
+            if voltages[i] != _NO_VOLTAGE:
+                voltage_values.append(voltages[i])
+        return {
+            "transmission_miles": round(miles[0], 2),
+            "distribution_miles": round(miles[1], 2),
+            "transformer_count": transformer_count,
+            "highest_voltage": max(voltage_values) if voltage_values else None,
+            "lowest_voltage": min(voltage_values) if voltage_values else None,
+        }
+
+
+class PowerSnapshotStore:
+    """
+    The current snapshot file, reopened when it is replaced on disk
+
+    Args:
+        path: Snapshot file (empty = disabled)
+        max_age: Seconds after building the snapshot stops being used (0 = never)
+    """
+
+    def __init__(self, path: str = POWER_SNAPSHOT_PATH, max_age: float = POWER_SNAPSHOT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+        self.open_ms: Optional[float] = None
+        self.hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def current(self) -> Optional[_Snapshot]:
+        """The open snapshot if it exists and is fresh, reopening after an atomic replace"""
+        if not self.path:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._snapshot = None
+            return None
+
+        snapshot = self._snapshot
+        if snapshot is None or (snapshot.stat.st_ino, snapshot.stat.st_mtime_ns) != (stat.st_ino, stat.st_mtime_ns):
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or (snapshot.stat.st_ino, snapshot.stat.st_mtime_ns) != (stat.st_ino, stat.st_mtime_ns):
+                    start = time.perf_counter()
+                    try:
+                        snapshot = _Snapshot(self.path)
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.warning(f"⚠️ Power snapshot {self.path} unusable: {e}")
+                        return None
+                    self.open_ms = round((time.perf_counter() - start) * 1000, 2)
+                    self._snapshot = snapshot
+                    logger.info(
+                        f"🗺️ Opened power snapshot {self.path} in {self.open_ms}ms "
+                        f"({snapshot.header['features']} features, bbox {snapshot.bbox})"
+                    )
+
+        if self.max_age and time.time() - snapshot.header["built_at"] > self.max_age:
+            return None
+        return snapshot
+
+    def covers(self, bbox: Bbox) -> bool:
+        """Whether query() can answer this bbox"""
+        snapshot = self.current()
+        return snapshot is not None and snapshot.covers(bbox)
+
+    def query(self, bbox: Bbox, powers: Optional[Collection[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Power result for bbox from the snapshot
+
+        Args:
+            bbox: (south, west, north, east) in decimal degrees
+            powers: Only features with these power tags (default all)
+
+        Returns:
+            Dict with 'geojson' (FeatureCollection) and 'stats', like
+            get_power_infrastructure, or None if the bbox isn't covered
+        """
+        snapshot = self.current()
+        if snapshot is None or not snapshot.covers(bbox):
+            return None
+
+        codes = None if powers is None else {_POWER_CODES[power] for power in powers}
+        if codes is None and tuple(bbox) == snapshot.bbox:
+            indexes = list(range(snapshot.header["features"]))
+            stats = snapshot.header["stats"]
+        else:
+            power_column = snapshot.columns["power"]
+            indexes = [
+                i for i in snapshot.candidates(bbox)
+                if (codes is None or power_column[i] in codes) and snapshot.matches(i, bbox)
+            ]
+            stats = snapshot.stats(indexes)
+        self.hits += 1
+        return {
+            # Same JSON as a geojson.FeatureCollection, without re-validating every coordinate
+            "geojson": {"type": "FeatureCollection", "features": [snapshot.feature(i) for i in indexes]},
+            "stats": stats,
+        }
+
+    def info(self) -> Optional[Dict[str, Any]]:
+        if not self.path:
+            return None
+        snapshot = self.current()
+        if snapshot is None:
+            return {"path": self.path, "available": False}
+        return {
+            "path": self.path,
+            "available": True,
+            "bbox": snapshot.bbox,
+            "features": snapshot.header["features"],
+            "age_s": round(time.time() - snapshot.header["built_at"], 1),
+            "bytes": snapshot.stat.st_size,
+            "open_ms": self.open_ms,
+            "hits": self.hits,
+        }
+
+
+# Global instance
+power_snapshot = PowerSnapshotStore()
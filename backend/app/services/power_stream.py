@@ -0,0 +1,220 @@
+"""
+Progressive power loading over Server-Sent Events
+The requested bbox is split into fixed grid tiles, each fetched and
+cached on its own through get_power_infrastructure. Cached tiles are
+pushed immediately, missing tiles are pushed (center first) as their
+Overpass fetches complete, and a final message carries the stats over
+everything sent. Only features inside the requested bbox are sent (the
+same selection as /power, so the stats match), and features spanning
+several tiles are only sent once. Missing tiles are fetched a few at a
+time so one view doesn't queue past the Overpass limiter's wait.
+"""
+
+import os
+import json
+import math
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from geojson import FeatureCollection
+
+from app.services.overpass_service import (
+    calculate_linestring_length,
+    get_power_infrastructure,
+    is_power_cached,
+    overpass_limiter,
+    parse_voltage_value,
+    power_batcher,
+)
+from app.services.executor import run_in_thread
+from app.services.overpass_batcher import feature_in_bbox
+from app.services.overpass_limiter import OverpassBusyError
+from app.services.view_delta import feature_key
+
+logger = logging.getLogger(__name__)
+
+# Tile edge in degrees (~5.5 km); tiles sit on a fixed grid so neighbouring views share them
+POWER_TILE_SIZE = float(os.getenv("POWER_TILE_SIZE", "0.05"))
+POWER_STREAM_MAX_TILES = 64
+
+Bbox = Tuple[float, float, float, float]
+
+
+def tiles_for(bbox: Bbox, size: float = POWER_TILE_SIZE) -> List[Bbox]:
+    """
+    Grid tiles covering bbox, nearest to its center first
+
+    Raises:
+        ValueError: If the bbox needs more than POWER_STREAM_MAX_TILES tiles
+    """
+    south, west, north, east = bbox
+    rows = range(math.floor(south / size), math.ceil(north / size))
+    cols = range(math.floor(west / size), math.ceil(east / size))
+    if len(rows) * len(cols) > POWER_STREAM_MAX_TILES:
+        raise ValueError(f"Zoom in - view needs more than {POWER_STREAM_MAX_TILES} tiles")
+
+    center = ((south + north) / 2, (west + east) / 2)
+    tiles = [
+        (round(r * size, 6), round(c * size, 6), round((r + 1) * size, 6), round((c + 1) * size, 6))
+        for r in rows for c in cols
+    ]
+    tiles.sort(key=lambda t: ((t[0] + t[2]) / 2 - center[0]) ** 2 + ((t[1] + t[3]) / 2 - center[1]) ** 2)
+    return tiles
+
+
+def tile_concurrency() -> int:
+    """Missing tiles fetched at once: what the limiter's slots can serve, batched when batching is on"""
+    tiles_per_query = power_batcher.max_regions if power_batcher.window > 0 else 1
+    return max(1, overpass_limiter.max_concurrency * tiles_per_query)
+
+
+def sse_message(event: str, data: Dict[str, Any]) -> str:
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class _StreamStats:
+    """
+    Stats over the features sent so far (same shape and sums as /power stats)
+
+    Line lengths are recomputed from the geometry, since /power sums them
+    unrounded; boundary-clipped results keep the stored length of lines
+    that were entirely inside, as clip_power_to_boundary does.
+    """
+
+    def __init__(self, clipped: bool = False):
+        self.clipped = clipped
+        self.transmission_miles = 0.0
+        self.distribution_miles = 0.0
+        self.transformer_count = 0
+        self.voltages: List[int] = []
+
+    def add(self, feature: Dict[str, Any]) -> None:
+        properties = feature["properties"]
+        power_type = properties.get("power")
+        if power_type == "transformer":
+            self.transformer_count += 1
+        else:
+            length_miles = self._length_miles(feature)
+            if power_type == "line":
+                self.transmission_miles += length_miles
+            else:
+                self.distribution_miles += length_miles
+        voltage = parse_voltage_value(properties.get("voltage"))
+        if voltage is not None:
+            self.voltages.append(voltage)
+
+    def _length_miles(self, feature: Dict[str, Any]) -> float:
+        properties = feature["properties"]
+        if self.clipped and not properties.get("clipped"):
+            return properties.get("length_miles", 0.0)
+        geometry = feature["geometry"]
+        lines = geometry["coordinates"] if geometry["type"] == "MultiLineString" else [geometry["coordinates"]]
+        return sum(calculate_linestring_length(line) for line in lines) * 0.621371
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "transmission_miles": round(self.transmission_miles, 2),
+            "distribution_miles": round(self.distribution_miles, 2),
+            "transformer_count": self.transformer_count,
+            "highest_voltage": max(self.voltages) if self.voltages else None,
+            "lowest_voltage": min(self.voltages) if self.voltages else None,
+        }
+
+
+async def stream_power(bbox: Bbox, clip: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    SSE messages for a progressively loaded power view
+
+    Events:
+        start: tile count and how many are already cached
+        tile: one tile's features not sent before, with progress
+        error: a tile that failed (the stream goes on)
+        stats: final stats over all sent features, then the stream ends
+
+    Args:
+        bbox: (south, west, north, east) in decimal degrees, already validated
+              (the stream has started by the time the generator runs)
+        clip: "boundary" to clip features to the city boundary
+    """
+    start = time.perf_counter()
+    tiles = tiles_for(bbox)
+    cached = [tile for tile in tiles if is_power_cached(tile)]
+    missing = [tile for tile in tiles if tile not in cached]
+    sent: Set[str] = set()
+    stats = _StreamStats(clipped=clip is not None)
+    done = failed = 0
+
+    # Filtering and encoding a large tile is CPU work - callers run it via run_in_thread,
+    # one tile at a time, so sent and stats are never touched concurrently
+    def tile_message(tile: Bbox, result: Dict[str, Any], was_cached: bool) -> str:
+        features = []
+        for feature in result["geojson"]["features"]:
+            key = feature_key(feature)
+            if key not in sent and feature_in_bbox(feature, bbox):
+                sent.add(key)
+                stats.add(feature)
+                features.append(feature)
+        return sse_message("tile", {
+            "tile": tile,
+            "cached": was_cached,
+            "geojson": FeatureCollection(features),
+            "progress": {"done": done, "total": len(tiles)},
+        })
+
+    def error_message(tile: Bbox, error: Exception) -> str:
+        return sse_message("error", {
+            "tile": tile,
+            "error": str(error),
+            "status": 503 if isinstance(error, OverpassBusyError) else 502,
+        })
+
+    yield sse_message("start", {"bbox": bbox, "tiles": len(tiles), "cached": len(cached)})
+
+    for tile in cached:
+        try:
+            result = await get_power_infrastructure(tile, clip=clip)
+            done += 1
+            yield await run_in_thread(tile_message, tile, result, True)
+        except Exception as e:
+            # Retry it with the tiles still to fetch
+            logger.warning(f"⚠️ Cached tile {tile} unavailable: {e}")
+            missing.append(tile)
+
+    if cached:
+        logger.info(f"⚡ Streamed {len(cached)} cached tile(s) in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    pacing = asyncio.Semaphore(tile_concurrency())
+
+    async def fetch(tile: Bbox):
+        try:
+            async with pacing:
+                return tile, await get_power_infrastructure(tile, clip=clip), None
+        except Exception as e:
+            return tile, None, e
+
+    tasks = [asyncio.create_task(fetch(tile)) for tile in missing]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            tile, result, error = await next_done
+            if error is not None:
+                failed += 1
+                logger.warning(f"⚠️ Tile {tile} failed: {error}")
+                yield error_message(tile, error)
+                continue
+            done += 1
+            yield await run_in_thread(tile_message, tile, result, False)
+    finally:
+        # Client went away - don't keep fetching for it
+        for task in tasks:
+            task.cancel()
+
+    yield sse_message("stats", {
+        "stats": stats.as_dict(),
+        "tiles": len(tiles),
+        "failed": failed,
+        "features": len(sent),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    })
@@ -0,0 +1,247 @@
+"""
+On-demand request profiling
+A request carrying the admin profiling token is run under a wall-clock
+sampling profiler and records named phase timings (overpass_fetch, parse,
+build_features, serialize, neo4j_query). Only the event loop thread and
+the threads doing work for that request are sampled, so concurrent
+requests don't show up in its profile. Profiles are kept in memory as
+speedscope JSON for download. Disabled unless PROFILE_TOKEN is set.
+"""
+
+import os
+import sys
+import time
+import uuid
+import secrets
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Tuple
+
+# Shared secret for the X-Profile-Token header (empty = profiling off)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Seconds between stack samples
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+# Profiles kept for download
+PROFILE_KEEP = 20
+
+# Phase timings of the request being profiled (None outside profiled requests)
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("profile_phases", default=None)
+# Sampler of the request being profiled (None outside profiled requests)
+_sampler: ContextVar[Optional["SamplingProfiler"]] = ContextVar("profile_sampler", default=None)
+
+_profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def token_valid(token: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN) and token is not None and secrets.compare_digest(token, PROFILE_TOKEN)
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add time to a named phase of the current profiled request (no-op otherwise)"""
+    phases = _phases.get()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+def profiling_active() -> bool:
+    """Whether the current context belongs to a profiled request"""
+    return _sampler.get() is not None
+
+
+@contextmanager
+def sampled_thread():
+    """Sample the calling thread for the current profiled request while the block runs (no-op otherwise)"""
+    sampler = _sampler.get()
+    if sampler is None:
+        yield
+        return
+    with sampler.thread():
+        yield
+
+
+@contextmanager
+def phase(name: str):
+    """Time a block as a named phase of the current profiled request"""
+    if _phases.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start)
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampler over the threads working for one request
+
+    A background thread snapshots the stacks of the registered threads each
+    interval: the thread that started the profiler (the event loop) plus
+    threads inside thread() - CPU executor threads and threadpool Neo4j
+    calls running on the request's behalf. Work in process-pool workers
+    shows up as the loop waiting.
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples: Dict[Tuple[int, Tuple], int] = {}
+        self.thread_names: Dict[int, str] = {}
+        # Thread id -> nesting depth of thread() blocks
+        self._threads: Dict[int, int] = {}
+        self._threads_lock = threading.Lock()
+        self._owner: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def _register(self) -> int:
+        thread = threading.current_thread()
+        with self._threads_lock:
+            self._threads[thread.ident] = self._threads.get(thread.ident, 0) + 1
+            self.thread_names[thread.ident] = thread.name
+        return thread.ident
+
+    def _unregister(self, thread_id: int) -> None:
+        with self._threads_lock:
+            if self._threads[thread_id] > 1:
+                self._threads[thread_id] -= 1
+            else:
+                del self._threads[thread_id]
+
+    @contextmanager
+    def thread(self):
+        """Sample the calling thread while the block runs"""
+        thread_id = self._register()
+        try:
+            yield
+        finally:
+            self._unregister(thread_id)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in self._threads:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                key = (thread_id, tuple(reversed(stack)))
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._owner = self._register()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        self._unregister(self._owner)
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """Samples as a speedscope file (one sampled profile per thread)"""
+        frames: List[Dict[str, Any]] = []
+        frame_index: Dict[Tuple, int] = {}
+        by_thread: Dict[int, Tuple[List[List[int]], List[float]]] = {}
+        weight = self.interval * 1000
+
+        for (thread_id, stack), count in self.samples.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indices.append(frame_index[frame])
+            samples, weights = by_thread.setdefault(thread_id, ([], []))
+            samples.append(indices)
+            weights.append(count * weight)
+
+        profiles = []
+        for thread_id, (samples, weights) in by_thread.items():
+            profiles.append({
+                "type": "sampled",
+                "name": self.thread_names.get(thread_id, f"thread {thread_id}"),
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+        # Busiest thread first - speedscope opens the first profile
+        profiles.sort(key=lambda p: p["endValue"], reverse=True)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "powergrid-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+class RequestProfile:
+    """Profiles one request: sampler plus phase timings, stored on exit"""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.phases: Dict[str, float] = {}
+        self.profiler = SamplingProfiler()
+        self._token = None
+        self._sampler_token = None
+
+    def __enter__(self) -> "RequestProfile":
+        self._token = _phases.set(self.phases)
+        self._sampler_token = _sampler.set(self.profiler)
+        self.profiler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.stop()
+        _sampler.reset(self._sampler_token)
+        _phases.reset(self._token)
+        with _profiles_lock:
+            _profiles[self.id] = {
+                "id": self.id,
+                "name": self.name,
+                "created_at": time.time(),
+                "total_ms": round(self.profiler.elapsed * 1000, 2),
+                "phases_ms": self.phases_ms(),
+                "speedscope": self.profiler.to_speedscope(self.name),
+            }
+            while len(_profiles) > PROFILE_KEEP:
+                _profiles.popitem(last=False)
+        return False
+
+    def phases_ms(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()}
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (shown in browser dev tools)"""
+        entries = [f"{name};dur={ms}" for name, ms in self.phases_ms().items()]
+        entries.append(f"total;dur={round(self.profiler.elapsed * 1000, 2)}")
+        return ", ".join(entries)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    with _profiles_lock:
+        return [
+            {k: v for k, v in profile.items() if k != "speedscope"}
+            for profile in reversed(_profiles.values())
+        ]
+
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    with _profiles_lock:
+        return _profiles.get(profile_id)
@@ -0,0 +1,368 @@
+"""
+Cross-worker shared cache tier
+With `uvicorn --workers N` every worker otherwise keeps its own power and
+boundary caches and fetches the same data from Overpass. This tier keeps
+zlib-compressed JSON payloads in one mmap'd file that all workers map:
+a small fixed index of slots in front of a ring-buffer data region.
+Readers decompress straight from the mapping; writes and fill claims
+take an flock on the file, and a claim makes sure only one worker fills
+a given key while the others wait for it.
+
+Ring positions are absolute (they only grow), so an entry is live while
+the write head is less than one ring length past its start - overwritten
+entries become misses without touching their slots on every write.
+
+Disabled unless SHARED_CACHE_PATH is set (e.g. /dev/shm/powergrid-cache).
+Needs fcntl, so it stays off on Windows.
+"""
+
+import os
+import json
+import mmap
+import time
+import zlib
+import struct
+import asyncio
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")
+SHARED_CACHE_SIZE_MB = int(os.getenv("SHARED_CACHE_SIZE_MB", "256"))
+# A fill claim older than this is considered abandoned (worker died mid-fetch)
+SHARED_CACHE_FILL_TIMEOUT = float(os.getenv("SHARED_CACHE_FILL_TIMEOUT", "90"))
+
+INDEX_SLOTS = 4096
+PROBE_LENGTH = 8
+
+_MAGIC = b"PGCACHE2"
+# magic, slot count, data region size, absolute ring write head
+_HEADER = struct.Struct("<8sIQQ")
+# key digest, state, generation, absolute offset, length, created_at, filler pid, fill started
+_SLOT = struct.Struct("<16sB3xIQIdId")
+
+_EMPTY, _FILLING, _READY = 0, 1, 2
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+
+class SharedCache:
+    """
+    mmap-backed cache shared by all worker processes on a host
+
+    Args:
+        path: Backing file (put it on tmpfs, e.g. /dev/shm, for memory speed)
+        size_mb: Size of the data region
+    """
+
+    def __init__(self, path: str, size_mb: int = SHARED_CACHE_SIZE_MB):
+        self.path = path
+        self.data_size = size_mb * 1024 * 1024
+        self.data_start = _HEADER.size + INDEX_SLOTS * _SLOT.size
+        total = self.data_start + self.data_size
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._thread_lock = threading.Lock()
+        with self._locked():
+            if os.fstat(self._fd).st_size != total:
+                os.ftruncate(self._fd, total)
+            self._map = mmap.mmap(self._fd, total)
+            magic, slots, data_size, _ = _HEADER.unpack_from(self._map, 0)
+            if magic != _MAGIC or slots != INDEX_SLOTS or data_size != self.data_size:
+                # New file or different layout - start empty
+                self._map[:self.data_start] = bytes(self.data_start)
+                _HEADER.pack_into(self._map, 0, _MAGIC, INDEX_SLOTS, self.data_size, 0)
+
+    @contextmanager
+    def _locked(self, shared: bool = False):
+        # flock only excludes other processes - threads of this one share the descriptor
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _slot_offset(self, index: int) -> int:
+        return _HEADER.size + index * _SLOT.size
+
+    def _read_slot(self, index: int) -> Tuple:
+        return _SLOT.unpack_from(self._map, self._slot_offset(index))
+
+    def _write_slot(self, index: int, *fields) -> None:
+        _SLOT.pack_into(self._map, self._slot_offset(index), *fields)
+
+    def _probe(self, digest: bytes):
+        start = int.from_bytes(digest[:4], "little") % INDEX_SLOTS
+        return [(start + i) % INDEX_SLOTS for i in range(PROBE_LENGTH)]
+
+    def _head(self) -> int:
+        return _HEADER.unpack_from(self._map, 0)[3]
+
+    def _live(self, slot: Tuple, head: int) -> bool:
+        """A READY slot whose bytes haven't been overwritten by a later lap of the ring"""
+        return slot[1] == _READY and head - slot[3] <= self.data_size
+
+    def _find(self, digest: bytes) -> Optional[int]:
+        for index in self._probe(digest):
+            slot = self._read_slot(index)
+            if slot[0] == digest and slot[1] != _EMPTY:
+                return index
+        return None
+
+    @staticmethod
+    def _claim_live(slot: Tuple, now: float) -> bool:
+        """Whether a slot's fill claim is held by a running worker that hasn't timed out"""
+        pid = slot[6]
+        if pid == 0 or now - slot[7] >= SHARED_CACHE_FILL_TIMEOUT:
+            return False
+        if pid == os.getpid():
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _find_or_victim(self, digest: bytes) -> Optional[int]:
+        """
+        Slot holding the key, else an empty slot, else a victim in the probe window
+
+        Victims are READY slots, oldest first (unclaimed before ones being
+        refreshed). A FILLING slot is only taken over once its claim is
+        dead - evicting a live claim would send a second worker to fetch
+        the same key. Returns None when every slot holds a live claim.
+        """
+        found = self._find(digest)
+        if found is not None:
+            return found
+        candidates = self._probe(digest)
+        slots = {index: self._read_slot(index) for index in candidates}
+        head = self._head()
+        for index in candidates:
+            state = slots[index][1]
+            if state == _EMPTY or (state == _READY and not self._live(slots[index], head)):
+                return index
+
+        now = time.time()
+        ready = [index for index in candidates if slots[index][1] == _READY]
+        if ready:
+            return min(ready, key=lambda index: (self._claim_live(slots[index], now), slots[index][5]))
+        for index in candidates:
+            if not self._claim_live(slots[index], now):
+                return index
+        return None
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Cached value and its creation time, or None
+
+        The compressed payload is decompressed directly from the mapping;
+        the slot generation and ring head are re-checked afterwards (writers
+        advance the head before writing bytes), so a concurrent overwrite
+        turns into a miss instead of a torn read.
+        """
+        digest = _digest(key)
+        with self._locked(shared=True):
+            index = self._find(digest)
+            if index is None:
+                return None
+            slot = self._read_slot(index)
+            if not self._live(slot, self._head()):
+                return None
+        _, _, generation, offset, length, created_at, _, _ = slot
+
+        start = self.data_start + offset % self.data_size
+        try:
+            with memoryview(self._map)[start:start + length] as view:
+                raw = zlib.decompress(view)
+        except zlib.error:
+            return None
+        if self._read_slot(index)[2] != generation or not self._live(slot, self._head()):
+            return None
+        return json.loads(raw), created_at
+
+    def created_at(self, key: str) -> Optional[float]:
+        """
+        Creation time of a ready entry, or None - reads only the index slot
+
+        Cheap enough for the event loop: nothing is decompressed or decoded.
+        """
+        digest = _digest(key)
+        with self._locked(shared=True):
+            index = self._find(digest)
+            if index is None:
+                return None
+            slot = self._read_slot(index)
+            live = self._live(slot, self._head())
+        return slot[5] if live else None
+
+    def put(self, key: str, value: Any, created_at: Optional[float] = None) -> bool:
+        """
+        Store a JSON-serializable value (replaces any fill claim on the key)
+
+        Returns:
+            False if the compressed payload doesn't fit in the data region,
+            or every slot it could use holds another live fill claim
+        """
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode(), 1)
+        if len(payload) > self.data_size:
+            return False
+        digest = _digest(key)
+        created_at = time.time() if created_at is None else created_at
+
+        with self._locked():
+            index = self._find_or_victim(digest)
+            if index is None:
+                return False
+            magic, slots, data_size, head = _HEADER.unpack_from(self._map, 0)
+            offset = head
+            if offset % self.data_size + len(payload) > self.data_size:
+                # Skip the ring's tail - the payload starts the next lap
+                offset += self.data_size - offset % self.data_size
+            end = offset + len(payload)
+
+            # Advance the head first: entries these bytes overwrite are misses from now on
+            _HEADER.pack_into(self._map, 0, magic, slots, data_size, end)
+            start = self.data_start + offset % self.data_size
+            self._map[start:start + len(payload)] = payload
+            generation = self._read_slot(index)[2] + 1
+            self._write_slot(index, digest, _READY, generation, offset, len(payload), created_at, 0, 0.0)
+        return True
+
+    def claim(self, key: str) -> bool:
+        """
+        Become the only worker filling a key
+
+        Returns:
+            False if another live worker already holds the claim
+        """
+        digest = _digest(key)
+        now = time.time()
+        with self._locked():
+            index = self._find(digest)
+            if index is not None:
+                slot = self._read_slot(index)
+                claimed_elsewhere = slot[6] != os.getpid() and self._claim_live(slot, now)
+                if slot[1] in (_FILLING, _READY) and claimed_elsewhere:
+                    return False
+                if slot[1] == _READY:
+                    # Stale entry being refreshed - keep its data readable until the new put
+                    self._write_slot(index, *slot[:6], os.getpid(), now)
+                    return True
+            else:
+                index = self._find_or_victim(digest)
+                if index is None:
+                    # Probe window full of live claims - fill without one
+                    return True
+            slot = self._read_slot(index)
+            self._write_slot(index, digest, _FILLING, slot[2] + 1, 0, 0, 0.0, os.getpid(), now)
+        return True
+
+    def release(self, key: str) -> None:
+        """Drop this worker's fill claim (after a failed fill)"""
+        digest = _digest(key)
+        with self._locked():
+            index = self._find(digest)
+            if index is None:
+                return
+            slot = self._read_slot(index)
+            if slot[6] != os.getpid():
+                return
+            if slot[1] == _FILLING:
+                self._write_slot(index, digest, _EMPTY, slot[2] + 1, 0, 0, 0.0, 0, 0.0)
+            else:
+                self._write_slot(index, *slot[:6], 0, 0.0)
+
+    async def get_or_fill(
+        self,
+        key: str,
+        ttl: float,
+        fill: Callable[[], Awaitable[Any]],
+        wait_timeout: float = SHARED_CACHE_FILL_TIMEOUT,
+    ) -> Tuple[Any, float, str]:
+        """
+        Fresh cached value, or fill it - at most one worker fills a key at a time
+
+        Workers that lose the claim poll for the winner's result and fall
+        back to filling themselves after wait_timeout.
+
+        Returns:
+            Tuple of (value, created_at, "hit" | "filled" | "waited")
+        """
+        async def fresh() -> Optional[Tuple[Any, float]]:
+            # Decoding a large payload is CPU work - keep it off the event loop
+            entry = await asyncio.to_thread(self.get, key)
+            if entry is not None and time.time() - entry[1] < ttl:
+                return entry
+            return None
+
+        entry = await fresh()
+        if entry is not None:
+            return entry[0], entry[1], "hit"
+
+        deadline = time.monotonic() + wait_timeout
+        delay = 0.05
+        # The locks below can be held by another thread or worker - never wait on them on the loop
+        while not await asyncio.to_thread(self.claim, key):
+            if time.monotonic() > deadline:
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+            entry = await fresh()
+            if entry is not None:
+                return entry[0], entry[1], "waited"
+
+        try:
+            value = await fill()
+        except BaseException:
+            await asyncio.to_thread(self.release, key)
+            raise
+        created_at = time.time()
+        if not await asyncio.to_thread(self.put, key, value, created_at):
+            await asyncio.to_thread(self.release, key)
+        return value, created_at, "filled"
+
+    def info(self):
+        with self._locked(shared=True):
+            slots = [self._read_slot(index) for index in range(INDEX_SLOTS)]
+            head = self._head()
+        return {
+            "path": self.path,
+            "size_mb": self.data_size // (1024 * 1024),
+            "entries": sum(1 for slot in slots if self._live(slot, head)),
+            "filling": sum(1 for slot in slots if slot[1] == _FILLING),
+            "ring_cursor_mb": round(head % self.data_size / (1024 * 1024), 2),
+        }
+
+
+def _open_shared_cache() -> Optional[SharedCache]:
+    if not SHARED_CACHE_PATH:
+        return None
+    if fcntl is None:
+        logger.warning("⚠️ SHARED_CACHE_PATH is set but file locking is unavailable on this platform - shared cache disabled")
+        return None
+    try:
+        cache = SharedCache(SHARED_CACHE_PATH)
+        logger.info(f"✅ Shared cache mapped at {SHARED_CACHE_PATH} ({SHARED_CACHE_SIZE_MB} MB)")
+        return cache
+    except OSError as e:
+        logger.warning(f"⚠️ Shared cache unavailable: {e}")
+        return None
+
+
+# Global instance (None when disabled)
+shared_cache = _open_shared_cache()
@@ -0,0 +1,163 @@
+"""
+Fast, non-blocking application startup
+The API starts serving map endpoints immediately: Neo4j is connected in
+the background with exponential backoff, the boundary and power caches
+are restored from an on-disk snapshot, and every startup milestone is
+timed for the /api/health startup report.
+"""
+
+import os
+import gzip
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+
+from app.database.neo4j import neo4j_driver
+from app.services import overpass_service
+from app.services.power_snapshot import power_snapshot
+from app.services.topology_cache import topology_cache
+
+logger = logging.getLogger(__name__)
+
+# Background Neo4j connection: attempts and backoff cap (seconds)
+NEO4J_CONNECT_ATTEMPTS = int(os.getenv("NEO4J_CONNECT_ATTEMPTS", "10"))
+NEO4J_CONNECT_MAX_BACKOFF = float(os.getenv("NEO4J_CONNECT_MAX_BACKOFF", "60"))
+
+# Cache snapshot written on shutdown and restored at boot (empty = disabled)
+CACHE_SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH", "")
+
+
+class StartupReport:
+    """Milestones (ms since boot) of the current process"""
+
+    def __init__(self):
+        self.boot_started = time.perf_counter()
+        self.milestones: Dict[str, float] = {}
+        self.details: Dict[str, Any] = {}
+
+    def begin(self, boot_started: float) -> None:
+        """Set the boot reference (taken before the heavy imports in main.py)"""
+        self.boot_started = boot_started
+
+    def mark(self, name: str) -> float:
+        elapsed_ms = round((time.perf_counter() - self.boot_started) * 1000, 1)
+        self.milestones[name] = elapsed_ms
+        return elapsed_ms
+
+    def mark_once(self, name: str) -> None:
+        if name not in self.milestones:
+            elapsed_ms = self.mark(name)
+            logger.info(f"⏱️ Startup: {name} at {elapsed_ms:.0f}ms after boot")
+
+    def info(self) -> Dict[str, Any]:
+        return {"milestones_ms": dict(self.milestones), **self.details}
+
+
+# Global instance
+startup_report = StartupReport()
+
+
+async def connect_neo4j_in_background() -> bool:
+    """
+    Connect to Neo4j with exponential backoff, without blocking startup
+
+    Loads the topology cache once connected. After NEO4J_CONNECT_ATTEMPTS
+    failures it gives up; graph endpoints still connect on demand.
+
+    Returns:
+        True once connected
+    """
+    neo4j_driver.connecting_in_background = True
+    try:
+        return await _connect_neo4j_with_backoff()
+    finally:
+        neo4j_driver.connecting_in_background = False
+
+
+async def _connect_neo4j_with_backoff() -> bool:
+    delay = 1.0
+    for attempt in range(1, NEO4J_CONNECT_ATTEMPTS + 1):
+        try:
+            if not neo4j_driver.connected:
+                await asyncio.to_thread(neo4j_driver.connect)
+            if await asyncio.to_thread(neo4j_driver.test_connection):
+                startup_report.mark_once("neo4j_connected")
+                logger.info("✅ Neo4j connection verified! (Path traversal features enabled)")
+                if topology_cache.enabled:
+                    await asyncio.to_thread(topology_cache.load)
+                    startup_report.mark_once("topology_cache_loaded")
+                return True
+        except Exception as e:
+            logger.warning(f"⚠️ Neo4j not available (attempt {attempt}/{NEO4J_CONNECT_ATTEMPTS}): {e}")
+        startup_report.details["neo4j_attempts"] = attempt
+        if attempt < NEO4J_CONNECT_ATTEMPTS:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, NEO4J_CONNECT_MAX_BACKOFF)
+
+    logger.info("ℹ️  Map view works without Neo4j. Start Neo4j for path traversal features.")
+    return False
+
+
+def _read_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_snapshot(path: str, snapshot: Dict[str, Any]) -> int:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=3) as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+async def restore_cache_snapshot() -> None:
+    """Refill the boundary and power caches from CACHE_SNAPSHOT_PATH (off the event loop)"""
+    if not CACHE_SNAPSHOT_PATH:
+        return
+
+    def restore() -> Dict[str, int]:
+        snapshot = _read_snapshot(CACHE_SNAPSHOT_PATH)
+        return overpass_service.restore_cache_snapshot(snapshot) if snapshot else {}
+
+    try:
+        restored = await asyncio.to_thread(restore)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache snapshot restore failed: {e}")
+        return
+    elapsed_ms = startup_report.mark("snapshot_restored")
+    startup_report.details["snapshot_restored"] = restored
+    if restored:
+        logger.info(f"✅ Restored cache snapshot at {elapsed_ms:.0f}ms: {restored}")
+
+
+async def open_power_snapshot() -> None:
+    """Map the power dataset snapshot (POWER_SNAPSHOT_PATH) before the first request"""
+    if not power_snapshot.enabled:
+        return
+
+    snapshot = await asyncio.to_thread(power_snapshot.current)
+    if snapshot is None:
+        logger.warning(f"⚠️ Power snapshot {power_snapshot.path} missing or expired - views fall back to Overpass")
+        return
+    startup_report.mark("power_snapshot_opened")
+    startup_report.details["power_snapshot_features"] = snapshot.header["features"]
+
+
+def save_cache_snapshot() -> None:
+    """Write the boundary and power caches to CACHE_SNAPSHOT_PATH (on shutdown)"""
+    if not CACHE_SNAPSHOT_PATH:
+        return
+
+    try:
+        size = _write_snapshot(CACHE_SNAPSHOT_PATH, overpass_service.export_cache_snapshot())
+        logger.info(f"✅ Cache snapshot saved to {CACHE_SNAPSHOT_PATH} ({size / 1024:.0f} KB)")
+    except Exception as e:
+        logger.warning(f"⚠️ Cache snapshot save failed: {e}")
@@ -0,0 +1,282 @@
+"""
+Precomputed summary grid for power infrastructure stats
+Every fetched power result is folded into fixed grid cells (line miles by
+power type, transformer count, voltage range), so stats for any bbox are a
+sum over cells instead of a full Overpass fetch.
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.services.executor import run_in_thread
+from app.services.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# 100 cells per degree = 0.01° cells (~1.1 km north-south)
+GRID_CELLS_PER_DEGREE = 100
+
+# Cells older than this are refetched (same as the power cache)
+STATS_GRID_TTL = 1800  # 30 minutes
+
+# Cells kept in memory; the least recently rebuilt go first (~200 bytes each)
+STATS_GRID_MAX_CELLS = int(os.getenv("STATS_GRID_MAX_CELLS", "100000"))
+
+KM_TO_MILES = 0.621371
+
+Cell = Tuple[int, int]
+
+
+def _to_grid(value: float) -> float:
+    """Degrees -> grid units, snapping float noise (38.95 * 100 = 3895.0000000000005)"""
+    scaled = value * GRID_CELLS_PER_DEGREE
+    nearest = round(scaled)
+    return nearest if abs(scaled - nearest) < 1e-9 else scaled
+
+
+def cell_for(lon: float, lat: float) -> Cell:
+    """(row, column) of the grid cell containing a point"""
+    return math.floor(_to_grid(lat)), math.floor(_to_grid(lon))
+
+
+def cells_covering(bbox: Tuple[float, float, float, float]) -> List[Cell]:
+    """Every cell that intersects the bbox"""
+    south, west, north, east = bbox
+    row0, col0 = cell_for(west, south)
+    row1, col1 = cell_for(east, north)
+    return [(row, col) for row in range(row0, row1 + 1) for col in range(col0, col1 + 1)]
+
+
+def cells_inside(bbox: Tuple[float, float, float, float]) -> List[Cell]:
+    """Cells lying completely inside the bbox (only these are fully described by a fetch)"""
+    south, west, north, east = bbox
+    row0 = math.ceil(_to_grid(south))
+    col0 = math.ceil(_to_grid(west))
+    row1 = math.floor(_to_grid(north)) - 1
+    col1 = math.floor(_to_grid(east)) - 1
+    return [(row, col) for row in range(row0, row1 + 1) for col in range(col0, col1 + 1)]
+
+
+def cells_bbox(cells: List[Cell]) -> Tuple[float, float, float, float]:
+    """Grid-aligned (south, west, north, east) around a set of cells"""
+    rows = [row for row, _ in cells]
+    cols = [col for _, col in cells]
+    return (
+        min(rows) / GRID_CELLS_PER_DEGREE,
+        min(cols) / GRID_CELLS_PER_DEGREE,
+        (max(rows) + 1) / GRID_CELLS_PER_DEGREE,
+        (max(cols) + 1) / GRID_CELLS_PER_DEGREE,
+    )
+
+
+def split_cells(cells: List[Cell], fits) -> List[List[Cell]]:
+    """
+    Split cells into groups whose grid-aligned bbox passes fits(bbox)
+
+    Groups are halved along their longer side until each one fits (a single
+    cell always counts as fitting).
+    """
+    pending = [cells]
+    groups = []
+    while pending:
+        group = pending.pop()
+        if len(group) == 1 or fits(cells_bbox(group)):
+            groups.append(group)
+            continue
+        rows = [row for row, _ in group]
+        cols = [col for _, col in group]
+        axis = 0 if max(rows) - min(rows) >= max(cols) - min(cols) else 1
+        group = sorted(group, key=lambda cell: cell[axis])
+        middle = len(group) // 2
+        pending.extend((group[:middle], group[middle:]))
+    return groups
+
+
+class CellStats:
+    """Summary of one grid cell"""
+
+    __slots__ = ("transmission_miles", "distribution_miles", "transformer_count",
+                 "voltage_min", "voltage_max", "updated_at")
+
+    def __init__(self, updated_at: float):
+        self.transmission_miles = 0.0
+        self.distribution_miles = 0.0
+        self.transformer_count = 0
+        self.voltage_min: Optional[int] = None
+        self.voltage_max: Optional[int] = None
+        self.updated_at = updated_at
+
+    def add_voltage(self, voltage: int) -> None:
+        if self.voltage_min is None or voltage < self.voltage_min:
+            self.voltage_min = voltage
+        if self.voltage_max is None or voltage > self.voltage_max:
+            self.voltage_max = voltage
+
+
+class StatsGrid:
+    """In-memory summary grid, filled from get_power_infrastructure results"""
+
+    def __init__(self, max_cells: int = STATS_GRID_MAX_CELLS, ttl: float = STATS_GRID_TTL):
+        self.max_cells = max_cells
+        self.ttl = ttl
+        # Ordered by rebuild time, oldest first
+        self._cells: "OrderedDict[Cell, CellStats]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ingest(self, bbox: Tuple[float, float, float, float], features: List[Dict[str, Any]]) -> int:
+        """
+        Rebuild the cells that lie completely inside a fetched bbox
+
+        Line length is split per segment and credited to the cell holding the
+        segment midpoint; a line's voltage counts in every cell it passes.
+        Cells only partially covered by the bbox are left untouched, so a
+        cell is never summed from an incomplete fetch.
+
+        Args:
+            bbox: (south, west, north, east) the features were fetched for
+            features: GeoJSON features from get_power_infrastructure
+
+        Returns:
+            Number of cells rebuilt
+        """
+        # Imported here to avoid a circular import with overpass_service
+        from app.services.overpass_service import haversine_distance, parse_voltage_value
+
+        now = time.time()
+        fresh = {cell: CellStats(now) for cell in cells_inside(bbox)}
+        if not fresh:
+            return 0
+
+        for feature in features:
+            geometry = feature["geometry"]
+            properties = feature["properties"]
+            voltage = parse_voltage_value(properties.get("voltage"))
+
+            if geometry["type"] == "Point":
+                lon, lat = geometry["coordinates"][:2]
+                stats = fresh.get(cell_for(lon, lat))
+                if stats is not None:
+                    stats.transformer_count += 1
+                    if voltage is not None:
+                        stats.add_voltage(voltage)
+                continue
+
+            is_transmission = properties.get("power") == "line"
+            coordinates = geometry["coordinates"]
+            for i in range(len(coordinates) - 1):
+                (lon1, lat1), (lon2, lat2) = coordinates[i][:2], coordinates[i + 1][:2]
+                stats = fresh.get(cell_for((lon1 + lon2) / 2, (lat1 + lat2) / 2))
+                if stats is None:
+                    continue
+                miles = haversine_distance((lat1, lon1), (lat2, lon2)) * KM_TO_MILES
+                if is_transmission:
+                    stats.transmission_miles += miles
+                else:
+                    stats.distribution_miles += miles
+                if voltage is not None:
+                    stats.add_voltage(voltage)
+
+        with self._lock:
+            for cell, stats in fresh.items():
+                self._cells.pop(cell, None)
+                self._cells[cell] = stats
+            while len(self._cells) > self.max_cells:
+                self._cells.popitem(last=False)
+        return len(fresh)
+
+    def missing_cells(self, bbox: Tuple[float, float, float, float]) -> List[Cell]:
+        """Cells intersecting the bbox with no fresh summary (expired cells are dropped here)"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            while self._cells and next(iter(self._cells.values())).updated_at < cutoff:
+                self._cells.popitem(last=False)
+            return [cell for cell in cells_covering(bbox) if cell not in self._cells]
+
+    def info(self) -> Dict[str, Any]:
+        """Cell count for /health"""
+        return {"cells": len(self._cells), "max_cells": self.max_cells}
+
+    def summarize(self, bbox: Tuple[float, float, float, float]) -> Dict[str, Any]:
+        """
+        Sum the cells intersecting the bbox - O(cells)
+
+        Stats describe the grid-aligned area around the bbox (returned as
+        'grid_bbox'); missing cells count as empty.
+
+        Returns:
+            Stats dict in the same shape as get_power_infrastructure stats
+        """
+        cells = cells_covering(bbox)
+        transmission_miles = 0.0
+        distribution_miles = 0.0
+        transformer_count = 0
+        voltage_min: Optional[int] = None
+        voltage_max: Optional[int] = None
+
+        for cell in cells:
+            stats = self._cells.get(cell)
+            if stats is None:
+                continue
+            transmission_miles += stats.transmission_miles
+            distribution_miles += stats.distribution_miles
+            transformer_count += stats.transformer_count
+            if stats.voltage_min is not None and (voltage_min is None or stats.voltage_min < voltage_min):
+                voltage_min = stats.voltage_min
+            if stats.voltage_max is not None and (voltage_max is None or stats.voltage_max > voltage_max):
+                voltage_max = stats.voltage_max
+
+        return {
+            "transmission_miles": round(transmission_miles, 2),
+            "distribution_miles": round(distribution_miles, 2),
+            "transformer_count": transformer_count,
+            "highest_voltage": voltage_max,
+            "lowest_voltage": voltage_min,
+            "grid_bbox": list(cells_bbox(cells)),
+            "cells": len(cells),
+        }
+
+
+# Global instance
+stats_grid = StatsGrid()
+
+
+async def get_power_stats(bbox: Tuple[float, float, float, float]) -> Dict[str, Any]:
+    """
+    Stats for a bounding box from the summary grid
+
+    Warm cells are summed directly; cold cells are filled by power fetches
+    over the grid-aligned box around them (split when snapping to the grid
+    pushes it past the fetch size limit).
+
+    Args:
+        bbox: (south, west, north, east) in decimal degrees
+
+    Returns:
+        Stats dict (see StatsGrid.summarize)
+    """
+    # Imported here to avoid a circular import with overpass_service
+    from app.services.overpass_service import (
+        MAX_BBOX_DIAGONAL_KM,
+        calculate_bbox_diagonal,
+        get_power_infrastructure,
+    )
+
+    missing = stats_grid.missing_cells(bbox)
+    record_cache("stats_grid", hit=not missing)
+    if missing:
+        groups = split_cells(missing, lambda box: calculate_bbox_diagonal(box) <= MAX_BBOX_DIAGONAL_KM)
+        for group in groups:
+            fill_bbox = cells_bbox(group)
+            logger.info(f"⏳ Stats grid: {len(group)} cold cells, fetching {fill_bbox}")
+            power = await get_power_infrastructure(fill_bbox)
+            # Fresh fetches are ingested by get_power_infrastructure; a cached
+            # power result may outlive its cells, so ingest it here if needed
+            if stats_grid.missing_cells(fill_bbox):
+                await run_in_thread(stats_grid.ingest, fill_bbox, power["geojson"]["features"])
+
+    return stats_grid.summarize(bbox)
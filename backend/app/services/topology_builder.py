@@ -0,0 +1,472 @@
+"""
+Topology inference for OpenStreetMap power features
+Connects lines and transformers that touch (within a tolerance) and orients
+the connections as FEEDS relationships.
+"""
+
+import math
+import time
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple, Optional
+
+from app.services.executor import run_cpu_bound
+from app.services.metrics import record_cache
+from app.services.overpass_service import get_power_infrastructure, parse_voltage_value, round_bbox
+
+logger = logging.getLogger(__name__)
+
+# Features closer than this (meters) are considered connected
+SNAP_TOLERANCE_M = 15.0
+
+# Meters per degree of latitude (mean) - good enough for snapping distances
+METERS_PER_DEGREE = 111_320.0
+
+# Requested tolerances are rounded to this step (meters) so near-equal values share a build
+TOLERANCE_STEP_M = 0.5
+
+# LRU cache for built topologies (by bbox and tolerance, same TTL as the power cache)
+_topology_cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+TOPOLOGY_CACHE_TTL = 1800  # 30 minutes
+TOPOLOGY_CACHE_SIZE = 32
+
+# Graph component type for each OSM power tag
+COMPONENT_TYPE_BY_POWER = {
+    "line": "TransmissionLine",
+    "minor_line": "DistributionLine",
+    "transformer": "LocalTransformer",
+}
+
+
+def component_id_for(feature: Dict[str, Any]) -> str:
+    """
+    Stable graph ID for a power feature
+
+    OSM node and way IDs live in separate namespaces, so the element type
+    is part of the ID.
+    """
+    properties = feature["properties"]
+    element_type = "node" if feature["geometry"]["type"] == "Point" else "way"
+    return f"osm-{element_type}-{properties['osm_id']}"
+
+
+def line_parts(geometry: Dict[str, Any]) -> List[List[List[float]]]:
+    """
+    Vertex lists of a line geometry
+
+    Lines clipped to the city boundary can come back as MultiLineStrings;
+    each part is treated as its own line.
+    """
+    if geometry["type"] == "LineString":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiLineString":
+        return [part for part in geometry["coordinates"] if part]
+    raise ValueError(f"Unsupported geometry type for a power line: {geometry['type']}")
+
+
+class SpatialHash:
+    """
+    Uniform grid over a local equirectangular projection
+
+    Points are bucketed into square cells of the snap tolerance, so a radius
+    query only has to look at the 3x3 cells around the query point.
+    """
+
+    def __init__(self, cell_size_m: float, origin_latitude: float):
+        self.cell_size_m = cell_size_m
+        self._x_scale = METERS_PER_DEGREE * math.cos(math.radians(origin_latitude))
+        self._y_scale = METERS_PER_DEGREE
+        self._cells: Dict[Tuple[int, int], List[Tuple[float, float, Any]]] = {}
+
+    def project(self, lon: float, lat: float) -> Tuple[float, float]:
+        return lon * self._x_scale, lat * self._y_scale
+
+    def insert(self, lon: float, lat: float, item: Any) -> None:
+        x, y = self.project(lon, lat)
+        cell = (int(x // self.cell_size_m), int(y // self.cell_size_m))
+        self._cells.setdefault(cell, []).append((x, y, item))
+
+    def insert_many(self, coordinates: List[List[float]], item: Any) -> None:
+        """Insert every [lon, lat] of a line under the same item (hot loop, kept inline)"""
+        cells = self._cells
+        x_scale, y_scale, size = self._x_scale, self._y_scale, self.cell_size_m
+        for coordinate in coordinates:
+            x = coordinate[0] * x_scale
+            y = coordinate[1] * y_scale
+            cell = (int(x // size), int(y // size))
+            bucket = cells.get(cell)
+            if bucket is None:
+                cells[cell] = [(x, y, item)]
+            else:
+                bucket.append((x, y, item))
+
+    def query(self, lon: float, lat: float, radius_m: float) -> List[Any]:
+        """Items within radius_m of (lon, lat); radius_m must be <= cell size"""
+        x, y = self.project(lon, lat)
+        cx, cy = int(x // self.cell_size_m), int(y // self.cell_size_m)
+        radius_sq = radius_m * radius_m
+        cells = self._cells
+        found = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                bucket = cells.get((cx + dx, cy + dy))
+                if bucket:
+                    for px, py, item in bucket:
+                        if (px - x) * (px - x) + (py - y) * (py - y) <= radius_sq:
+                            found.append(item)
+        return found
+
+
+def infer_connections(
+    features: List[Dict[str, Any]],
+    tolerance_m: float = SNAP_TOLERANCE_M,
+) -> List[Tuple[str, str]]:
+    """
+    Find pairs of touching features (undirected)
+
+    Line endpoints and transformers are snapped to any vertex of another
+    line (so taps onto the middle of a line are found) and to each other.
+    Two interior vertices never connect on their own - lines that merely
+    share poles or cross are not electrically joined. Each part of a
+    MultiLineString (a line clipped to the boundary) has its own endpoints.
+
+    Every vertex goes into a grid spatial hash once, so the whole join is
+    O(vertices) instead of comparing every pair of features.
+
+    Args:
+        features: GeoJSON features from get_power_infrastructure
+        tolerance_m: Snap distance in meters
+
+    Returns:
+        Sorted list of unique (id_a, id_b) pairs with id_a < id_b
+    """
+    if not features:
+        return []
+
+    latitudes = [
+        feature["geometry"]["coordinates"][1]
+        if feature["geometry"]["type"] == "Point"
+        else line_parts(feature["geometry"])[0][0][1]
+        for feature in features
+    ]
+    index = SpatialHash(tolerance_m, sum(latitudes) / len(latitudes))
+
+    # Snap sources: line endpoints and transformers. Targets: every vertex.
+    sources: List[Tuple[float, float, str, bool]] = []
+    for feature in features:
+        feature_id = component_id_for(feature)
+        geometry = feature["geometry"]
+        if geometry["type"] == "Point":
+            lon, lat = geometry["coordinates"][:2]
+            sources.append((lon, lat, feature_id, True))
+            index.insert(lon, lat, (feature_id, True))
+        else:
+            for coordinates in line_parts(geometry):
+                for lon, lat in (coordinates[0][:2], coordinates[-1][:2]):
+                    sources.append((lon, lat, feature_id, False))
+                index.insert_many(coordinates, (feature_id, False))
+
+    pairs = set()
+    for lon, lat, feature_id, is_transformer in sources:
+        for other_id, other_is_transformer in index.query(lon, lat, tolerance_m):
+            # Neighbouring transformers are separate units, not a connection
+            if other_id == feature_id or (is_transformer and other_is_transformer):
+                continue
+            pairs.add((feature_id, other_id) if feature_id < other_id else (other_id, feature_id))
+
+    return sorted(pairs)
+
+
+def connected_components(node_ids: List[str], connections: List[Tuple[str, str]]) -> Dict[str, int]:
+    """
+    Label every node with its connected component (union-find)
+
+    Components are numbered by size, largest first.
+
+    Returns:
+        Dict mapping node id -> component number
+    """
+    parent = {node_id: node_id for node_id in node_ids}
+
+    def find(node_id: str) -> str:
+        root = node_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node_id] != root:  # Path compression
+            parent[node_id], node_id = root, parent[node_id]
+        return root
+
+    for a, b in connections:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    members: Dict[str, List[str]] = {}
+    for node_id in node_ids:
+        members.setdefault(find(node_id), []).append(node_id)
+
+    labels = {}
+    ordered = sorted(members.values(), key=lambda group: (-len(group), group[0]))
+    for number, group in enumerate(ordered):
+        for node_id in group:
+            labels[node_id] = number
+    return labels
+
+
+def orient_feeds(
+    features: List[Dict[str, Any]],
+    connections: List[Tuple[str, str]],
+) -> List[Tuple[str, str]]:
+    """
+    Turn undirected connections into FEEDS (source -> target) edges
+
+    OSM has no flow direction, so power is assumed to flow away from the
+    transmission network: every feature gets a breadth-first hop level from
+    the nearest transmission line, and edges point from lower to higher
+    (level, -voltage, id). That key is a total order, so the result is
+    always acyclic.
+
+    Returns:
+        List of (source_id, target_id) pairs
+    """
+    adjacency: Dict[str, List[str]] = {}
+    for a, b in connections:
+        adjacency.setdefault(a, []).append(b)
+        adjacency.setdefault(b, []).append(a)
+
+    voltages: Dict[str, int] = {}
+    level: Dict[str, int] = {}
+    frontier = []
+    for feature in features:
+        feature_id = component_id_for(feature)
+        voltages[feature_id] = parse_voltage_value(feature["properties"].get("voltage")) or 0
+        if feature["properties"].get("power") == "line":
+            level[feature_id] = 0
+            frontier.append(feature_id)
+
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            for neighbor in adjacency.get(node, ()):
+                if neighbor not in level:
+                    level[neighbor] = level[node] + 1
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+
+    def order_key(node: str):
+        return (level.get(node, math.inf), -voltages.get(node, 0), node)
+
+    return [(a, b) if order_key(a) < order_key(b) else (b, a) for a, b in connections]
+
+
+def supply_sources(
+    records: List[Dict[str, Any]],
+    connections: List[Tuple[str, str]],
+    edges: List[Tuple[str, str]],
+) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+    """
+    Grid-supply PowerGeneration nodes for the mapped transmission networks
+
+    Only lines and transformers are fetched - plants are outside the map.
+    Every connected network that contains a transmission line gets one
+    source node (placed on its highest-voltage root line) feeding each root, i.e.
+    each component without a feeder. Networks with no transmission line
+    stay unsourced.
+
+    Args:
+        records: Component records from build_component_records
+        connections: Undirected connections from infer_connections
+        edges: Oriented FEEDS edges from orient_feeds (roots come first)
+
+    Returns:
+        Tuple of (source records, (source_id, root_id) FEEDS edges)
+    """
+    by_id = {record["id"]: record for record in records}
+    labels = connected_components(list(by_id), connections)
+    fed = {target for _, target in edges}
+
+    roots: Dict[int, List[str]] = {}
+    for record in records:
+        if record["id"] not in fed:
+            roots.setdefault(labels[record["id"]], []).append(record["id"])
+
+    def anchor_key(node: str):
+        record = by_id[node]
+        voltage = parse_voltage_value(record["properties"].get("voltage")) or 0
+        return (record["type"] != "TransmissionLine", -voltage, node)
+
+    sources, source_edges = [], []
+    for component in sorted(roots):
+        members = sorted(roots[component], key=anchor_key)
+        anchor = by_id[members[0]]
+        if anchor["type"] != "TransmissionLine":
+            continue
+        source_id = f"supply-{anchor['id']}"
+        sources.append({
+            "id": source_id,
+            "name": f"Grid supply ({anchor['name']})",
+            "type": "PowerGeneration",
+            "longitude": anchor["longitude"],
+            "latitude": anchor["latitude"],
+            "properties": {"source": "inferred"},
+        })
+        source_edges.extend((source_id, node) for node in members)
+    return sources, source_edges
+
+
+def build_component_records(features: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Convert power features into Component node records
+
+    Lines are placed at the middle vertex of their longest part so the node
+    sits on the line.
+
+    Returns:
+        List of dicts with id, name, type, longitude, latitude and extra properties
+    """
+    records = []
+    for feature in features:
+        properties = feature["properties"]
+        component_type = COMPONENT_TYPE_BY_POWER.get(properties.get("power"))
+        if not component_type:
+            continue
+
+        geometry = feature["geometry"]
+        if geometry["type"] == "Point":
+            lon, lat = geometry["coordinates"][:2]
+        else:
+            coordinates = max(line_parts(geometry), key=len)
+            lon, lat = coordinates[len(coordinates) // 2][:2]
+
+        name = (
+            properties.get("name")
+            or properties.get("ref")
+            or f"{component_type} {properties.get('osm_id')}"
+        )
+        records.append({
+            "id": component_id_for(feature),
+            "name": str(name),
+            "type": component_type,
+            "longitude": lon,
+            "latitude": lat,
+            "properties": {
+                "osm_id": properties.get("osm_id"),
+                "source": "osm",
+                "voltage": properties.get("voltage"),
+                "operator": properties.get("operator"),
+                "length_km": properties.get("length_km"),
+            },
+        })
+    return records
+
+
+def build_topology(
+    features: List[Dict[str, Any]],
+    tolerance_m: float = SNAP_TOLERANCE_M,
+) -> Dict[str, Any]:
+    """
+    Build the connectivity graph for a set of power features
+
+    Args:
+        features: GeoJSON features from get_power_infrastructure
+        tolerance_m: Snap distance in meters
+
+    Returns:
+        Dict with 'nodes', 'edges' (oriented FEEDS), 'components' and 'stats'
+    """
+    start_time = time.perf_counter()
+
+    node_ids = [component_id_for(feature) for feature in features]
+    connections = infer_connections(features, tolerance_m)
+    edges = orient_feeds(features, connections)
+    labels = connected_components(node_ids, connections)
+
+    nodes = []
+    summaries: Dict[int, Dict[str, Any]] = {}
+    for feature, node_id in zip(features, node_ids):
+        properties = feature["properties"]
+        component = labels[node_id]
+        nodes.append({
+            "id": node_id,
+            "osm_id": properties.get("osm_id"),
+            "power": properties.get("power"),
+            "type": COMPONENT_TYPE_BY_POWER.get(properties.get("power")),
+            "component": component,
+        })
+        summary = summaries.setdefault(component, {
+            "id": component,
+            "size": 0,
+            "lines": 0,
+            "minor_lines": 0,
+            "transformers": 0,
+        })
+        summary["size"] += 1
+        power = properties.get("power")
+        if power == "line":
+            summary["lines"] += 1
+        elif power == "minor_line":
+            summary["minor_lines"] += 1
+        elif power == "transformer":
+            summary["transformers"] += 1
+
+    components = [summaries[number] for number in sorted(summaries)]
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+    logger.info(
+        f"Topology built in {elapsed_ms:.1f}ms - {len(nodes)} nodes, "
+        f"{len(edges)} connections, {len(components)} components"
+    )
+
+    return {
+        "nodes": nodes,
+        "edges": [[source, target] for source, target in edges],
+        "components": components,
+        "stats": {
+            "node_count": len(nodes),
+            "edge_count": len(edges),
+            "component_count": len(components),
+            "isolated_count": sum(1 for c in components if c["size"] == 1),
+            "largest_component": components[0]["size"] if components else 0,
+            "tolerance_m": tolerance_m,
+            "build_ms": round(elapsed_ms, 1),
+        },
+    }
+
+
+async def get_power_topology(
+    bbox: Tuple[float, float, float, float],
+    tolerance_m: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Connectivity graph of the power infrastructure in a bounding box
+
+    Built from (and cached alongside) get_power_infrastructure results.
+
+    Args:
+        bbox: (south, west, north, east) in decimal degrees
+        tolerance_m: Snap distance in meters (default SNAP_TOLERANCE_M), rounded to TOLERANCE_STEP_M
+
+    Returns:
+        Topology dict from build_topology
+    """
+    tolerance_m = SNAP_TOLERANCE_M if tolerance_m is None else tolerance_m
+    tolerance_m = max(TOLERANCE_STEP_M, round(tolerance_m / TOLERANCE_STEP_M) * TOLERANCE_STEP_M)
+    cache_key = f"{round_bbox(bbox, decimals=3)}:{tolerance_m}"
+
+    current_time = time.time()
+    if cache_key in _topology_cache:
+        cached_data, cache_time = _topology_cache[cache_key]
+        if (current_time - cache_time) < TOPOLOGY_CACHE_TTL:
+            _topology_cache.move_to_end(cache_key)
+            record_cache("topology", hit=True)
+            return cached_data
+    record_cache("topology", hit=False)
+
+    power = await get_power_infrastructure(bbox)
+    # Snapping and orientation are pure CPU work - keep them off the event loop
+    topology = await run_cpu_bound(build_topology, power["geojson"]["features"], tolerance_m)
+    _topology_cache[cache_key] = (topology, current_time)
+    _topology_cache.move_to_end(cache_key)
+    while len(_topology_cache) > TOPOLOGY_CACHE_SIZE:
+        _topology_cache.popitem(last=False)
+    return topology
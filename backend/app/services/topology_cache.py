@@ -0,0 +1,547 @@
+"""
+In-process topology cache for the Component / FEEDS graph
+Keeps a compact adjacency index (CSR arrays) so path queries can be answered
+from memory; Neo4j remains the source of truth.
+"""
+
+import os
+import time
+import logging
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.database.neo4j import neo4j_driver
+
+logger = logging.getLogger(__name__)
+
+# Disabled by default - enable with TOPOLOGY_CACHE_ENABLED=true
+TOPOLOGY_CACHE_ENABLED = os.getenv("TOPOLOGY_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+# How often (seconds) to ask Neo4j whether the topology changed
+TOPOLOGY_CACHE_CHECK_INTERVAL = float(os.getenv("TOPOLOGY_CACHE_CHECK_INTERVAL", "30"))
+# Longest wait (seconds) between refresh attempts while Neo4j keeps failing
+TOPOLOGY_CACHE_MAX_BACKOFF = float(os.getenv("TOPOLOGY_CACHE_MAX_BACKOFF", "300"))
+
+POWER_GENERATION_TYPE = "PowerGeneration"
+
+# Sentinel for "no PowerGeneration reachable upstream"
+_UNREACHABLE = -1
+
+# Sorted downstream result sets kept for cursor paging
+_DOWNSTREAM_RESULT_CACHE_SIZE = 64
+
+
+def bump_topology_version(session) -> None:
+    """
+    Mark the FEEDS topology as changed so every topology cache reloads
+
+    Call this from any code path that writes Component nodes or FEEDS relationships.
+
+    Args:
+        session: Open Neo4j session
+    """
+    session.run("""
+        MERGE (m:GraphMeta {id: 'topology'})
+        SET m.version = coalesce(m.version, 0) + 1,
+            m.updated_at = timestamp()
+    """)
+
+
+def fetch_topology_rows(session) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+    """
+    All Component nodes and FEEDS relationships
+
+    Returns:
+        Tuple of (node dicts with id/name/type/longitude/latitude, (source_id, target_id) edges)
+    """
+    nodes = [
+        record.data()
+        for record in session.run("""
+            MATCH (n:Component)
+            RETURN n.id as id, n.name as name, n.type as type,
+                   n.longitude as longitude, n.latitude as latitude
+        """)
+    ]
+    edges = [
+        (record["source"], record["target"])
+        for record in session.run("""
+            MATCH (a:Component)-[:FEEDS]->(b:Component)
+            RETURN a.id as source, b.id as target
+        """)
+    ]
+    return nodes, edges
+
+
+def fetch_topology_version(session) -> str:
+    """Cheap fingerprint of the topology (explicit version + count-store totals)"""
+    record = session.run("""
+        OPTIONAL MATCH (m:GraphMeta {id: 'topology'})
+        RETURN m.version AS version
+    """).single()
+    version = record["version"] if record else None
+    node_count = session.run("MATCH (n:Component) RETURN count(n) AS count").single()["count"]
+    edge_count = session.run("MATCH ()-[r:FEEDS]->() RETURN count(r) AS count").single()["count"]
+    return f"{version}:{node_count}:{edge_count}"
+
+
+class _Topology:
+    """Immutable snapshot of the graph: integer IDs plus forward/reverse CSR arrays"""
+
+    def __init__(
+        self,
+        version: str,
+        nodes: List[Dict[str, Any]],
+        edges: List[Tuple[str, str]],
+    ):
+        self.version = version
+        self.ids: List[str] = [node["id"] for node in nodes]
+        self.index: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.names: List[str] = [node.get("name") or "" for node in nodes]
+        self.types: List[str] = [node.get("type") or "" for node in nodes]
+        self.longitudes = array("d", (node.get("longitude") or 0.0 for node in nodes))
+        self.latitudes = array("d", (node.get("latitude") or 0.0 for node in nodes))
+
+        pairs = [
+            (self.index[src], self.index[dst])
+            for src, dst in edges
+            if src in self.index and dst in self.index
+        ]
+        self.edge_count = len(pairs)
+
+        # Children (downstream) and parents (upstream) in CSR form
+        self.out_offsets, self.out_targets = self._build_csr(len(self.ids), pairs)
+        self.in_offsets, self.in_targets = self._build_csr(len(self.ids), [(d, s) for s, d in pairs])
+
+        # Longest-path-from-source memo, filled lazily by path_to_source()
+        self._best_len: Dict[int, int] = {}
+        self._best_parent: Dict[int, int] = {}
+
+        # Downstream counts per ComponentType: precomputed for trees, memoized otherwise
+        self.type_names: List[str] = sorted(set(self.types))
+        self._type_index = {name: i for i, name in enumerate(self.type_names)}
+        # Longest FEEDS chain below any node; set with the precomputed counts
+        self.height: Optional[int] = None
+        self._subtree_counts: Optional[array] = self._precompute_subtree_counts()
+        # (node, depth limit or None) -> counts; a limit >= node count is stored as None
+        self._subtree_memo: Dict[Tuple[int, Optional[int]], Dict[str, int]] = {}
+
+    @staticmethod
+    def _build_csr(node_count: int, pairs: List[Tuple[int, int]]) -> Tuple[array, array]:
+        """Build (offsets, targets) arrays from (source, target) integer pairs"""
+        offsets = array("i", [0]) * (node_count + 1)
+        for src, _ in pairs:
+            offsets[src + 1] += 1
+        for i in range(node_count):
+            offsets[i + 1] += offsets[i]
+
+        targets = array("i", [0]) * len(pairs)
+        cursor = array("i", offsets[:-1]) if node_count else array("i")
+        for src, dst in pairs:
+            targets[cursor[src]] = dst
+            cursor[src] += 1
+        return offsets, targets
+
+    def _precompute_subtree_counts(self) -> Optional[array]:
+        """
+        Per-node descendant counts by type, as one flat array of node_count x type_count
+
+        Only valid when every component has at most one feeder and the graph is
+        acyclic (a forest) - then subtree sizes simply add up bottom-up. For any
+        other shape this returns None and counts are computed on demand.
+        """
+        node_count = len(self.ids)
+        type_count = len(self.type_names)
+        if any(self.in_offsets[i + 1] - self.in_offsets[i] > 1 for i in range(node_count)):
+            return None
+
+        # Kahn topological order over FEEDS
+        in_degree = [self.in_offsets[i + 1] - self.in_offsets[i] for i in range(node_count)]
+        order = [i for i in range(node_count) if in_degree[i] == 0]
+        for node in order:
+            for child in self.children(node):
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    order.append(child)
+        if len(order) != node_count:
+            return None  # Cycle
+
+        type_ids = [self._type_index[t] for t in self.types]
+        counts = array("i", [0]) * (node_count * type_count)
+        heights = array("i", [0]) * node_count
+        for node in reversed(order):
+            base = node * type_count
+            for child in self.children(node):
+                heights[node] = max(heights[node], heights[child] + 1)
+                child_base = child * type_count
+                for t in range(type_count):
+                    counts[base + t] += counts[child_base + t]
+                counts[base + type_ids[child]] += 1
+        self.height = max(heights, default=0)
+        return counts
+
+    def subtree_counts(self, node: int, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """
+        Number of downstream components per type, memoized per (node, depth)
+
+        A walk can never be longer than the node count, so any limit at or
+        above it (or above the forest height) is the unlimited count.
+        """
+        if max_depth is not None and (
+            max_depth >= len(self.ids) or (self.height is not None and max_depth >= self.height)
+        ):
+            max_depth = None
+
+        if max_depth is None and self._subtree_counts is not None:
+            type_count = len(self.type_names)
+            base = node * type_count
+            return {
+                name: self._subtree_counts[base + t]
+                for t, name in enumerate(self.type_names)
+                if self._subtree_counts[base + t]
+            }
+
+        key = (node, max_depth)
+        counts = self._subtree_memo.get(key)
+        if counts is None:
+            counts = {}
+            for child, _ in self.downstream(node, max_depth):
+                child_type = self.types[child]
+                counts[child_type] = counts.get(child_type, 0) + 1
+            self._subtree_memo[key] = counts
+        return counts
+
+    def children(self, node: int):
+        return self.out_targets[self.out_offsets[node]:self.out_offsets[node + 1]]
+
+    def parents(self, node: int):
+        return self.in_targets[self.in_offsets[node]:self.in_offsets[node + 1]]
+
+    def node_dict(self, node: int) -> Dict[str, Any]:
+        return {
+            "id": self.ids[node],
+            "name": self.names[node],
+            "type": self.types[node],
+            "longitude": self.longitudes[node],
+            "latitude": self.latitudes[node],
+        }
+
+    def _solve_longest(self, start: int) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        Fill the longest-path memo for start and all its ancestors
+
+        Iterative post-order DFS over parents; nodes on the current stack are
+        treated as unreachable so a cycle can never recurse forever. Only
+        values with no cycle upstream are final and go into the shared memo -
+        values that depended on an in-progress node are only valid for this
+        start and are returned instead.
+
+        Returns:
+            (length, parent) dicts for the nodes solved relative to start
+        """
+        best_len = self._best_len
+        best_parent = self._best_parent
+        local_len: Dict[int, int] = {}
+        local_parent: Dict[int, int] = {}
+        in_progress = set()
+        stack = [start]
+
+        while stack:
+            node = stack[-1]
+            if node in best_len or node in local_len:
+                stack.pop()
+                continue
+
+            if node not in in_progress:
+                in_progress.add(node)
+                for parent in self.parents(node):
+                    if parent not in best_len and parent not in local_len and parent not in in_progress:
+                        stack.append(parent)
+                continue
+
+            stack.pop()
+            in_progress.discard(node)
+            length = 0 if self.types[node] == POWER_GENERATION_TYPE else _UNREACHABLE
+            chosen = -1
+            provisional = False
+            for parent in self.parents(node):
+                if parent in in_progress or parent in local_len:
+                    provisional = True
+                    parent_len = local_len.get(parent, _UNREACHABLE)
+                else:
+                    parent_len = best_len[parent]
+                if parent_len != _UNREACHABLE and parent_len + 1 > length:
+                    length = parent_len + 1
+                    chosen = parent
+            if provisional:
+                local_len[node] = length
+                local_parent[node] = chosen
+            else:
+                best_len[node] = length
+                best_parent[node] = chosen
+
+        return local_len, local_parent
+
+    def path_to_source(self, node: int) -> List[Dict[str, Any]]:
+        """Longest PowerGeneration -> node chain, ordered source -> target"""
+        local_len, local_parent = self._solve_longest(node)
+        length = local_len[node] if node in local_len else self._best_len.get(node, _UNREACHABLE)
+        # A path needs at least one FEEDS hop, same as [:FEEDS*] in Cypher
+        if length < 1:
+            return []
+
+        chain = []
+        current = node
+        while current != -1:
+            chain.append(current)
+            if current in local_parent:
+                current = local_parent[current]
+            else:
+                current = self._best_parent.get(current, -1)
+        chain.reverse()
+        return [self.node_dict(n) for n in chain]
+
+    def downstream(self, node: int, max_depth: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Breadth-first walk over FEEDS; returns (node, depth) pairs excluding the start"""
+        seen = {node}
+        frontier = [node]
+        reached = []
+        depth = 0
+
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for current in frontier:
+                for child in self.children(current):
+                    if child not in seen:
+                        seen.add(child)
+                        next_frontier.append(child)
+                        reached.append((child, depth))
+            frontier = next_frontier
+
+        return reached
+
+
+class TopologyCache:
+    """Optional in-memory adjacency index of the FEEDS graph"""
+
+    def __init__(self, enabled: bool = TOPOLOGY_CACHE_ENABLED):
+        self.enabled = enabled
+        self._topology: Optional[_Topology] = None
+        self._last_check: float = 0
+        self._loaded_at: float = 0
+        self._lock = threading.Lock()
+        # Background refresh state: one refresh thread at a time, backoff after failures
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._retry_at: float = 0
+        self._backoff: float = TOPOLOGY_CACHE_CHECK_INTERVAL
+        # (version, component, types, depth) -> (sorted ids, node/depth by id)
+        # Guards _downstream_results - pages are served from worker threads
+        self._results_lock = threading.Lock()
+        self._downstream_results: "OrderedDict[tuple, Tuple[List[str], Dict[str, Tuple[int, int]]]]" = OrderedDict()
+
+    @property
+    def loaded(self) -> bool:
+        return self._topology is not None
+
+    def load(self) -> bool:
+        """
+        (Re)load the whole Component / FEEDS graph from Neo4j
+
+        Returns:
+            True if the cache holds a usable topology afterwards
+        """
+        if not self.enabled:
+            return False
+
+        with self._lock:
+            start_time = time.time()
+            try:
+                with neo4j_driver.get_session() as session:
+                    version = fetch_topology_version(session)
+                    nodes, edges = fetch_topology_rows(session)
+            except Exception as e:
+                logger.warning(f"⚠️ Topology cache load failed: {e}")
+                self._schedule_retry()
+                return self.loaded
+
+            self._topology = _Topology(version, nodes, edges)
+            with self._results_lock:
+                self._downstream_results.clear()
+            self._loaded_at = time.time()
+            self._last_check = self._loaded_at
+            self._retry_at = 0
+            self._backoff = TOPOLOGY_CACHE_CHECK_INTERVAL
+            elapsed = self._loaded_at - start_time
+            logger.info(
+                f"✅ Topology cache loaded in {elapsed:.2f}s - "
+                f"{len(nodes)} components, {self._topology.edge_count} FEEDS (version {version})"
+            )
+            return True
+
+    def invalidate(self) -> None:
+        """Drop the cached topology; the next ensure_fresh() reloads it"""
+        self._topology = None
+        self._last_check = 0
+        with self._results_lock:
+            self._downstream_results.clear()
+
+    def _schedule_retry(self) -> None:
+        """Back off exponentially before the next refresh attempt"""
+        self._retry_at = time.time() + self._backoff
+        self._backoff = min(self._backoff * 2, TOPOLOGY_CACHE_MAX_BACKOFF)
+
+    def _refresh(self) -> None:
+        """Load, or reload if the Neo4j topology version changed (runs in a background thread)"""
+        try:
+            if self._topology is None:
+                self.load()
+                return
+
+            try:
+                with neo4j_driver.get_session() as session:
+                    version = fetch_topology_version(session)
+            except Exception as e:
+                # Keep serving the last known topology while Neo4j is unreachable
+                logger.warning(f"⚠️ Topology version check failed, serving cached topology: {e}")
+                self._schedule_retry()
+                return
+
+            topology = self._topology
+            if topology is not None and version != topology.version:
+                logger.info(f"🔄 Topology changed ({topology.version} -> {version}), reloading")
+                self.load()
+            else:
+                self._retry_at = 0
+                self._backoff = TOPOLOGY_CACHE_CHECK_INTERVAL
+        finally:
+            self._refreshing = False
+
+    def ensure_fresh(self) -> bool:
+        """
+        Make sure the cache is loaded and not older than the Neo4j topology
+
+        Never blocks the caller: loads and version checks run in a background
+        thread (at most once per TOPOLOGY_CACHE_CHECK_INTERVAL, backing off
+        up to TOPOLOGY_CACHE_MAX_BACKOFF while Neo4j is down). Until the first
+        load finishes, callers fall back to Neo4j.
+
+        Returns:
+            True if the cache can answer queries
+        """
+        if not self.enabled:
+            return False
+
+        now = time.time()
+        due = self._topology is None or now - self._last_check >= TOPOLOGY_CACHE_CHECK_INTERVAL
+        if due and now >= self._retry_at and not self._refreshing:
+            with self._refresh_lock:
+                start = not self._refreshing
+                self._refreshing = True
+            if start:
+                self._last_check = now
+                threading.Thread(target=self._refresh, name="topology-refresh", daemon=True).start()
+        return self._topology is not None
+
+    def has_component(self, component_id: str) -> bool:
+        topology = self._topology
+        return topology is not None and component_id in topology.index
+
+    def path_to_source(self, component_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answer get_path_to_source from memory
+
+        Returns:
+            Path nodes ordered source -> target, or None if the cache can't answer
+        """
+        topology = self._topology
+        if topology is None or component_id not in topology.index:
+            return None
+        return topology.path_to_source(topology.index[component_id])
+
+    def downstream_counts(self, component_id: str, max_depth: Optional[int] = None) -> Optional[Dict[str, int]]:
+        """
+        Count downstream components per ComponentType
+
+        Counts come from the precomputed subtree sizes (forests) or a
+        per-(node, depth) memo, so repeated calls don't walk the graph.
+
+        Returns:
+            Mapping type -> count, or None if the cache can't answer
+        """
+        topology = self._topology
+        if topology is None or component_id not in topology.index:
+            return None
+        return dict(topology.subtree_counts(topology.index[component_id], max_depth))
+
+    def downstream_page(
+        self,
+        component_id: str,
+        types: Optional[List[str]] = None,
+        max_depth: Optional[int] = None,
+        limit: int = 1000,
+        after: Optional[str] = None,
+    ) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        One page of downstream components ordered by id (keyset on id)
+
+        The sorted result set is kept in a small LRU so following pages are
+        a bisect plus a slice.
+
+        Returns:
+            (nodes, next_cursor) or None if the cache can't answer
+        """
+        topology = self._topology
+        if topology is None or component_id not in topology.index:
+            return None
+
+        key = (topology.version, component_id, tuple(sorted(types)) if types else None, max_depth)
+        with self._results_lock:
+            entry = self._downstream_results.get(key)
+            if entry is not None:
+                self._downstream_results.move_to_end(key)
+        if entry is None:
+            # Built outside the lock - a concurrent duplicate build is harmless
+            wanted = set(types) if types else None
+            by_id = {
+                topology.ids[node]: (node, depth)
+                for node, depth in topology.downstream(topology.index[component_id], max_depth)
+                if wanted is None or topology.types[node] in wanted
+            }
+            entry = (sorted(by_id), by_id)
+            with self._results_lock:
+                self._downstream_results[key] = entry
+                while len(self._downstream_results) > _DOWNSTREAM_RESULT_CACHE_SIZE:
+                    self._downstream_results.popitem(last=False)
+
+        sorted_ids, by_id = entry
+        start = bisect_right(sorted_ids, after) if after is not None else 0
+        page_ids = sorted_ids[start:start + limit]
+
+        nodes = []
+        for node_id in page_ids:
+            node, depth = by_id[node_id]
+            node_data = topology.node_dict(node)
+            node_data["depth"] = depth
+            nodes.append(node_data)
+
+        next_cursor = page_ids[-1] if start + limit < len(sorted_ids) and page_ids else None
+        return nodes, next_cursor
+
+    def info(self) -> Dict[str, Any]:
+        """Cache status for health/debug endpoints"""
+        topology = self._topology
+        return {
+            "enabled": self.enabled,
+            "loaded": topology is not None,
+            "version": topology.version if topology else None,
+            "components": len(topology.ids) if topology else 0,
+            "feeds": topology.edge_count if topology else 0,
+            "loaded_at": self._loaded_at or None,
+        }
+
+
+# Global instance
+topology_cache = TopologyCache()
@@ -0,0 +1,325 @@
+"""
+Materialized upstream-source index on the graph
+Stores, for every component, its parent on the longest PowerGeneration
+-> component FEEDS chain as an (:Component)-[:UPSTREAM]->(:Component)
+pointer, plus upstream_source (id of the PowerGeneration at the top) and
+upstream_depth (hops from it; -1 when no source is reachable). Paths to
+source then follow a single UPSTREAM chain instead of enumerating FEEDS
+paths. After FEEDS changes only the subtree below the change is
+recomputed.
+"""
+
+import time
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.database.neo4j import neo4j_driver
+from app.services.topology_cache import POWER_GENERATION_TYPE, fetch_topology_rows, fetch_topology_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Sentinel depth for "no PowerGeneration reachable upstream"
+UNREACHABLE = -1
+
+# (parent id, source id, depth) per component id
+UpstreamRow = Tuple[Optional[str], Optional[str], int]
+
+_WRITE_ROWS_QUERY = """
+    UNWIND $rows AS row
+    MATCH (c:Component {id: row.id})
+    OPTIONAL MATCH (c)-[old:UPSTREAM]->()
+    DELETE old
+    WITH DISTINCT c, row
+    SET c.upstream_parent = row.parent,
+        c.upstream_source = row.source,
+        c.upstream_depth = row.depth
+    WITH c, row
+    WHERE row.parent IS NOT NULL
+    MATCH (p:Component {id: row.parent})
+    MERGE (c)-[:UPSTREAM]->(p)
+"""
+
+# The index is only trusted while it was built for the current topology
+# fingerprint (version:node_count:edge_count, as the topology cache checks it),
+# so FEEDS writes that skip bump_topology_version still make it stale
+_STAMP_QUERY = """
+    MERGE (i:GraphMeta {id: 'upstream_index'})
+    SET i.topology_version = $version,
+        i.updated_at = timestamp()
+"""
+
+
+def _upstream_components(
+    ids: Iterable[str],
+    types: Dict[str, str],
+    parents: Dict[str, List[str]],
+) -> List[List[str]]:
+    """
+    Strongly connected components of the FEEDS graph, upstream first
+
+    Iterative Tarjan over parent edges (restricted to components in types):
+    a component is emitted only after every component upstream of it.
+    """
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    on_stack = set()
+    stack: List[str] = []
+    components: List[List[str]] = []
+
+    for start in ids:
+        if start in index:
+            continue
+        work = [(start, iter(parents.get(start, ())))]
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        while work:
+            node, pending = work[-1]
+            advanced = False
+            for parent in pending:
+                if parent not in types:
+                    continue
+                if parent not in index:
+                    index[parent] = low[parent] = len(index)
+                    stack.append(parent)
+                    on_stack.add(parent)
+                    work.append((parent, iter(parents.get(parent, ()))))
+                    advanced = True
+                    break
+                if parent in on_stack:
+                    low[node] = min(low[node], index[parent])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                low[work[-1][0]] = min(low[work[-1][0]], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
+
+
+def solve_upstream(
+    ids: Iterable[str],
+    types: Dict[str, str],
+    parents: Dict[str, List[str]],
+    fixed: Optional[Dict[str, Tuple[int, Optional[str]]]] = None,
+) -> Dict[str, UpstreamRow]:
+    """
+    Longest-chain parent, source and depth for each component in ids
+
+    Strongly connected components are solved upstream first, so every
+    stored value is final and the result doesn't depend on traversal
+    order. An acyclic component takes its deepest parent. A cycle is
+    entered once, at its deepest entry (ties to the lowest id), and
+    its members chain from there along the fewest FEEDS hops, which
+    keeps the UPSTREAM pointers a tree.
+
+    Args:
+        ids: Components to solve
+        types: Component type by id (for the solved components)
+        parents: FEEDS parents by id (for the solved components)
+        fixed: (depth, source) of parents outside ids whose stored values stay valid
+
+    Returns:
+        (parent, source, depth) per solved component
+    """
+    fixed = fixed or {}
+    solved: Dict[str, UpstreamRow] = {}
+
+    def known(node: str) -> Tuple[int, Optional[str]]:
+        if node in solved:
+            return solved[node][2], solved[node][1]
+        depth, source = fixed.get(node) or (UNREACHABLE, None)
+        return (UNREACHABLE if depth is None else depth), source
+
+    def entry(node: str, members) -> UpstreamRow:
+        """Best (parent, source, depth) for node from sources and parents outside members"""
+        depth = 0 if types.get(node) == POWER_GENERATION_TYPE else UNREACHABLE
+        chosen, source = None, node if depth == 0 else None
+        for parent in parents.get(node, ()):
+            if parent in members:
+                continue
+            parent_depth, parent_source = known(parent)
+            if parent_depth == UNREACHABLE:
+                continue
+            # Ties go to the lowest parent id so FEEDS row order doesn't matter
+            if parent_depth + 1 > depth or (parent_depth + 1 == depth and chosen is not None and parent < chosen):
+                depth, chosen, source = parent_depth + 1, parent, parent_source
+        return chosen, source, depth
+
+    for component in _upstream_components(ids, types, parents):
+        if len(component) == 1:
+            node = component[0]
+            solved[node] = entry(node, component)
+            continue
+
+        members = set(component)
+        entries = {node: entry(node, members) for node in component}
+        start = max(sorted(members), key=lambda node: entries[node][2])
+        parent, source, depth = entries[start]
+        if depth == UNREACHABLE:
+            for node in component:
+                solved[node] = (None, None, UNREACHABLE)
+            continue
+
+        # Breadth-first around the cycle; children visited in id order
+        children: Dict[str, List[str]] = {}
+        for node in component:
+            for member_parent in parents.get(node, ()):
+                if member_parent in members and member_parent != node:
+                    children.setdefault(member_parent, []).append(node)
+        solved[start] = (parent, source, depth)
+        frontier = [start]
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for child in sorted(children.get(node, ())):
+                    if child not in solved:
+                        solved[child] = (node, source, solved[node][2] + 1)
+                        next_frontier.append(child)
+            frontier = next_frontier
+
+    return solved
+
+
+def _write_rows(session, solved: Dict[str, UpstreamRow], batch_size: int) -> None:
+    rows = [
+        {"id": node, "parent": parent, "source": source, "depth": depth}
+        for node, (parent, source, depth) in solved.items()
+    ]
+    # Sequential batches - parallel writers would contend for locks on shared parents
+    for i in range(0, len(rows), batch_size):
+        chunk = rows[i:i + batch_size]
+        session.execute_write(lambda tx: tx.run(_WRITE_ROWS_QUERY, rows=chunk).consume())
+    session.run(_STAMP_QUERY, version=fetch_topology_version(session)).consume()
+
+
+def rebuild_upstream_index(batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, float]:
+    """
+    Recompute the upstream index for the whole graph
+
+    Run after bulk imports (load_graph does) or via build_upstream_index.py.
+
+    Returns:
+        Dict with component count, reachable count and elapsed seconds
+    """
+    start_time = time.time()
+    with neo4j_driver.get_session() as session:
+        nodes, edges = fetch_topology_rows(session)
+        types = {node["id"]: node.get("type") or "" for node in nodes}
+        parents: Dict[str, List[str]] = {}
+        for source, target in edges:
+            parents.setdefault(target, []).append(source)
+
+        solved = solve_upstream(types, types, parents)
+        _write_rows(session, solved, batch_size)
+
+    reachable = sum(1 for _, _, depth in solved.values() if depth >= 0)
+    elapsed = time.time() - start_time
+    logger.info(
+        f"✅ Upstream index rebuilt in {elapsed:.2f}s - {len(solved)} components, "
+        f"{reachable} reachable from a source"
+    )
+    return {"components": len(solved), "reachable": reachable, "seconds": round(elapsed, 3)}
+
+
+def refresh_upstream_subtree(roots: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Recompute the upstream index below changed components
+
+    Call after adding or removing FEEDS relationships (and bump_topology_version),
+    with the targets of the changed relationships as roots. Only the roots and
+    everything downstream of them can change; their other parents keep their
+    stored values.
+
+    Returns:
+        Number of components recomputed
+    """
+    with neo4j_driver.get_session() as session:
+        # Level-by-level walk - a [:FEEDS*] pattern would enumerate every path, not every node
+        affected: Dict[str, str] = {
+            record["id"]: record["type"] or ""
+            for record in session.run(
+                "MATCH (r:Component) WHERE r.id IN $ids RETURN r.id AS id, r.type AS type", ids=roots
+            )
+        }
+        frontier = list(affected)
+        while frontier:
+            next_frontier = []
+            for record in session.run("""
+                MATCH (a:Component)-[:FEEDS]->(d:Component) WHERE a.id IN $ids
+                RETURN DISTINCT d.id AS id, d.type AS type
+            """, ids=frontier):
+                if record["id"] not in affected:
+                    affected[record["id"]] = record["type"] or ""
+                    next_frontier.append(record["id"])
+            frontier = next_frontier
+        if not affected:
+            return 0
+
+        parents: Dict[str, List[str]] = {}
+        fixed: Dict[str, Tuple[int, Optional[str]]] = {}
+        for record in session.run("""
+            MATCH (p:Component)-[:FEEDS]->(d:Component) WHERE d.id IN $ids
+            RETURN d.id AS child, p.id AS parent, p.upstream_depth AS depth, p.upstream_source AS source
+        """, ids=list(affected)):
+            parents.setdefault(record["child"], []).append(record["parent"])
+            if record["parent"] not in affected:
+                fixed[record["parent"]] = (record["depth"], record["source"])
+
+        solved = solve_upstream(affected, affected, parents, fixed)
+        _write_rows(session, solved, batch_size)
+
+    logger.info(f"🔄 Upstream index refreshed for {len(solved)} component(s) below {len(roots)} root(s)")
+    return len(solved)
+
+
+def path_from_index(session, component_id: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Path to source by following UPSTREAM pointers
+
+    Returns:
+        Components ordered source -> target ([] when no source is reachable),
+        or None if the index is missing, stale or its UPSTREAM chain is
+        broken (caller falls back to FEEDS)
+    """
+    version = fetch_topology_version(session)
+    record = session.run("""
+        MATCH (i:GraphMeta {id: 'upstream_index'})
+        WHERE i.topology_version = $version
+        MATCH (selected:Component {id: $component_id})
+        WHERE selected.upstream_depth IS NOT NULL
+        OPTIONAL MATCH chain = (selected)-[:UPSTREAM*]->(source:Component)
+        WHERE selected.upstream_depth >= 1 AND source.id = selected.upstream_source
+            AND source.upstream_parent IS NULL
+        RETURN selected.upstream_depth AS depth, nodes(chain) AS nodes
+    """, component_id=component_id, version=version).single()
+
+    if record is None:
+        return None
+    if record["depth"] < 1:
+        return []
+    if not record["nodes"]:
+        # Reachable per the index but no pointer chain to the source
+        return None
+    return [
+        {
+            "id": node.get("id", ""),
+            "name": node.get("name", ""),
+            "type": node.get("type", ""),
+            "longitude": node.get("longitude", 0.0),
+            "latitude": node.get("latitude", 0.0),
+        }
+        for node in reversed(record["nodes"])
+    ]
@@ -0,0 +1,199 @@
+"""
+Delta responses for map panning
+Every /api/op/power response carries a view token naming the set of
+features it contained. A client that sends the token back as `since=`
+only receives the features entering the new view and the keys of the
+ones leaving it, plus the new view's stats.
+
+Tokens are content hashes of the feature key set, so identical views
+(e.g. the default city view) share one index entry. Feature key sets
+are computed once per cached dataset object (per layer for layered
+responses, plus once per layer combination), and are also written to
+the shared cache tier so any worker can answer a delta request.
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from geojson import FeatureCollection
+
+from app.services.shared_cache import shared_cache
+
+# Total feature keys held by all view tokens (bounds memory, oldest tokens go first)
+VIEW_INDEX_MAX_KEYS = 2_000_000
+# Tokens older than this fall back to a full response (matches the power cache TTL)
+VIEW_TOKEN_TTL = 1800
+# Cached datasets whose key sets are memoized
+DATASET_INDEX_KEEP = 64
+
+
+def feature_key(feature: Dict[str, Any]) -> str:
+    """Stable key of an OSM feature, e.g. "way/123" or "node/456" (ids are per element type)"""
+    element_type = "node" if feature["geometry"]["type"] == "Point" else "way"
+    return f"{element_type}/{feature['properties'].get('osm_id')}"
+
+
+def result_features(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Features of a /power result, in either the geojson or the per-layer shape"""
+    if "geojson" in result:
+        return result["geojson"]["features"]
+    return [feature for layer in result["layers"] for feature in result[layer]["features"]]
+
+
+class ViewIndex:
+    """View token -> feature key set, with per-dataset memoization"""
+
+    def __init__(self, max_keys: int = VIEW_INDEX_MAX_KEYS, ttl: float = VIEW_TOKEN_TTL):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._views: "OrderedDict[str, Tuple[FrozenSet[str], float]]" = OrderedDict()
+        self._key_count = 0
+        # ids of the datasets -> (datasets, token, keys); holding them keeps their ids from being reused
+        self._datasets: "OrderedDict[Tuple[int, ...], Tuple[Tuple[Any, ...], str, FrozenSet[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.deltas = 0
+        self.fallbacks = 0
+
+    def _memoized(self, datasets: Tuple[Any, ...]) -> Optional[Tuple[str, FrozenSet[str]]]:
+        """Memoized token and key set of these exact dataset objects (lock held)"""
+        memo_id = tuple(id(dataset) for dataset in datasets)
+        entry = self._datasets.get(memo_id)
+        if entry is None or any(a is not b for a, b in zip(entry[0], datasets)):
+            return None
+        self._datasets.move_to_end(memo_id)
+        return entry[1], entry[2]
+
+    def _memoize(self, datasets: Tuple[Any, ...], token: str, keys: FrozenSet[str]) -> None:
+        """Remember the token and key set of these dataset objects (lock held)"""
+        self._datasets[tuple(id(dataset) for dataset in datasets)] = (datasets, token, keys)
+        while len(self._datasets) > DATASET_INDEX_KEEP:
+            self._datasets.popitem(last=False)
+
+    def _keys(self, dataset: Any) -> FrozenSet[str]:
+        """Feature key set of one layer's collection, memoized per cached object"""
+        with self._lock:
+            memo = self._memoized((dataset,))
+        if memo is not None:
+            return memo[1]
+        keys = frozenset(feature_key(feature) for feature in dataset["features"])
+        with self._lock:
+            self._memoize((dataset,), "", keys)
+        return keys
+
+    def _index(self, datasets: Tuple[Any, ...], features: List[Dict[str, Any]]) -> Tuple[str, FrozenSet[str]]:
+        """
+        Token and key set of a response, memoized on its cached dataset objects
+
+        Args:
+            datasets: The geojson result, or each layer's collection of a layered result
+            features: All features of the response
+        """
+        with self._lock:
+            memo = self._memoized(datasets)
+            if memo is not None and memo[0]:
+                token, keys = memo
+                self._remember(token, keys)
+                return token, keys
+
+        if len(datasets) > 1:
+            # Layered response - union of the memoized per-layer key sets
+            keys = frozenset().union(*(self._keys(dataset) for dataset in datasets))
+        else:
+            keys = frozenset(feature_key(feature) for feature in features)
+        digest = hashlib.blake2b(digest_size=12)
+        for key in sorted(keys):
+            digest.update(key.encode())
+            digest.update(b"\0")
+        token = digest.hexdigest()
+
+        with self._lock:
+            self._memoize(datasets, token, keys)
+            known = token in self._views
+            self._remember(token, keys)
+        if shared_cache is not None and not known:
+            shared_cache.put(f"view:{token}", sorted(keys))
+        return token, keys
+
+    def _remember(self, token: str, keys: FrozenSet[str]) -> None:
+        """Store or refresh a token (lock held)"""
+        previous = self._views.pop(token, None)
+        if previous is not None:
+            self._key_count -= len(previous[0])
+        self._views[token] = (keys, time.time())
+        self._key_count += len(keys)
+        while self._key_count > self.max_keys and len(self._views) > 1:
+            _, (old_keys, _) = self._views.popitem(last=False)
+            self._key_count -= len(old_keys)
+
+    def _lookup(self, token: str) -> Optional[FrozenSet[str]]:
+        with self._lock:
+            entry = self._views.get(token)
+        if entry is not None and time.time() - entry[1] < self.ttl:
+            return entry[0]
+        if shared_cache is not None:
+            # Issued by another worker
+            shared = shared_cache.get(f"view:{token}")
+            if shared is not None and time.time() - shared[1] < self.ttl:
+                keys = frozenset(shared[0])
+                with self._lock:
+                    self._remember(token, keys)
+                return keys
+        return None
+
+    def respond(self, result: Dict[str, Any], since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Response body for a /power result: full with a view token, or a delta
+
+        Args:
+            result: Result of get_power_infrastructure or get_power_layers (not modified)
+            since: View token of the client's previous response
+
+        Returns:
+            The result plus 'view'. With a known `since`, instead 'delta': True,
+            'added' (FeatureCollection), 'removed' (feature keys), 'stats' and 'view'.
+            An unknown or expired `since` gives the full result with 'delta': False.
+        """
+        features = result_features(result)
+        # The geojson result and each layer's collection are the cached objects themselves
+        if "geojson" in result:
+            datasets = (result,)
+        else:
+            datasets = tuple(result[layer] for layer in result["layers"])
+        token, keys = self._index(datasets, features)
+
+        previous = self._lookup(since) if since else None
+        if previous is None:
+            if since:
+                self.fallbacks += 1
+                return {**result, "view": token, "delta": False}
+            return {**result, "view": token}
+
+        self.deltas += 1
+        added = [feature for feature in features if feature_key(feature) not in previous]
+        response = {
+            "delta": True,
+            "since": since,
+            "view": token,
+            "added": FeatureCollection(added),
+            "removed": sorted(previous - keys),
+            "stats": result["stats"],
+        }
+        if "layers" in result:
+            response["layers"] = result["layers"]
+        return response
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "views": len(self._views),
+                "feature_keys": self._key_count,
+                "deltas": self.deltas,
+                "fallbacks": self.fallbacks,
+            }
+
+
+# Global instance
+view_index = ViewIndex()
@@ -0,0 +1,318 @@
+"""
+Background cache warm-up for predicted map viewports
+Users start at the city-wide view and then zoom into a few neighborhoods,
+so the boundary and power caches are pre-populated for the default view,
+the most-requested views and the neighbors of recent views. Neighbors of
+a new view are also prefetched shortly after it is requested, once
+panning settles.
+"""
+
+import os
+import asyncio
+import logging
+from collections import Counter, deque
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+from app.services.overpass_service import (
+    OVERLAND_PARK_BBOX,
+    get_boundary_geometry,
+    get_power_infrastructure,
+    is_power_cached,
+    overpass_limiter,
+    round_bbox,
+)
+from app.services.power_stream import tiles_for
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+# Seconds between warm-up rounds (power cache TTL is 30 minutes)
+WARMUP_INTERVAL = int(os.getenv("WARMUP_INTERVAL", "600"))
+# Most-requested views warmed each round
+WARMUP_TOP_VIEWS = int(os.getenv("WARMUP_TOP_VIEWS", "5"))
+# Upstream budget: concurrent fetches and total fetches per round
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "1"))
+WARMUP_MAX_FETCHES = int(os.getenv("WARMUP_MAX_FETCHES", "12"))
+# Overpass slots (of OVERPASS_MAX_CONCURRENCY) warm-up never takes, so user requests aren't queued behind it
+WARMUP_RESERVED_SLOTS = int(os.getenv("WARMUP_RESERVED_SLOTS", "1"))
+# Quiet time (seconds) after the last request before its neighbors are prefetched
+WARMUP_PREFETCH_DELAY = float(os.getenv("WARMUP_PREFETCH_DELAY", "2"))
+
+# Recent views whose neighbors are prefetched
+RECENT_VIEWS = 4
+# Distinct views whose request counts are tracked (least requested are dropped beyond this)
+TRACKED_VIEWS = 1000
+
+BBox = Tuple[float, float, float, float]
+
+
+def neighbor_bboxes(bbox: BBox) -> List[BBox]:
+    """
+    The 8 same-size views around a bbox (one pan step in each direction)
+
+    Only neighbors overlapping the Overland Park view are returned.
+    """
+    south, west, north, east = bbox
+    height = north - south
+    width = east - west
+    op_south, op_west, op_north, op_east = OVERLAND_PARK_BBOX
+
+    neighbors = []
+    for d_lat in (-1, 0, 1):
+        for d_lon in (-1, 0, 1):
+            if d_lat == 0 and d_lon == 0:
+                continue
+            n_south = south + d_lat * height
+            n_west = west + d_lon * width
+            n_north = n_south + height
+            n_east = n_west + width
+            if n_north <= op_south or n_south >= op_north or n_east <= op_west or n_west >= op_east:
+                continue
+            neighbors.append(round_bbox((n_south, n_west, n_north, n_east), decimals=3))
+    return neighbors
+
+
+class RequestLog:
+    """
+    Frequency and recency of requested power views (by rounded bbox)
+
+    Counts decay by half every warm-up round, so popularity follows recent
+    traffic, and at most max_views views are tracked. Views last requested
+    through /power/stream are marked tiled: the stream only reads per-tile
+    cache entries, so those are what gets warmed for them.
+    """
+
+    def __init__(
+        self,
+        recent: int = RECENT_VIEWS,
+        max_views: int = TRACKED_VIEWS,
+        on_record: Optional[Callable[[BBox], None]] = None,
+    ):
+        self.counts: Counter = Counter()
+        self.recent: deque = deque(maxlen=recent)
+        self.max_views = max_views
+        self.on_record = on_record
+        self.tiled: set = set()
+
+    def record(self, bbox: BBox, tiled: bool = False) -> None:
+        key = round_bbox(bbox, decimals=3)
+        self.counts[key] += 1
+        if tiled:
+            self.tiled.add(key)
+        else:
+            self.tiled.discard(key)
+        if len(self.counts) > self.max_views:
+            # Drop the least-requested half at once so pruning stays amortized O(1)
+            self.counts = Counter(dict(self.counts.most_common(self.max_views // 2)))
+            self.tiled = {view for view in self.tiled if view in self.counts or view in self.recent}
+        if key in self.recent:
+            self.recent.remove(key)
+        self.recent.append(key)
+        if self.on_record is not None:
+            self.on_record(key)
+
+    def decay(self) -> None:
+        """Halve every count, forgetting views that reach zero"""
+        self.counts = Counter({key: count // 2 for key, count in self.counts.items() if count > 1})
+        self.tiled = {view for view in self.tiled if view in self.counts or view in self.recent}
+
+    def cache_units(self, view: BBox, around: Optional[BBox] = None) -> List[BBox]:
+        """
+        Cache keys a request for view reads
+
+        Args:
+            view: The bbox to warm
+            around: Recorded view whose mode (tiled or whole bbox) applies, default view itself
+        """
+        if (around or view) not in self.tiled:
+            return [view]
+        try:
+            return tiles_for(view)
+        except ValueError:
+            return []
+
+    def most_requested(self, n: int) -> List[BBox]:
+        return [bbox for bbox, _ in self.counts.most_common(n)]
+
+    def recent_views(self) -> List[BBox]:
+        """Most recent first"""
+        return list(reversed(self.recent))
+
+
+class WarmupScheduler:
+    """
+    Periodically warms the boundary and power caches in a background task
+
+    Each recorded request also (re)arms a debounced prefetch of its
+    neighbors, which runs once no new view arrived for prefetch_delay.
+    """
+
+    def __init__(
+        self,
+        interval: float = WARMUP_INTERVAL,
+        top_views: int = WARMUP_TOP_VIEWS,
+        concurrency: int = WARMUP_CONCURRENCY,
+        max_fetches: int = WARMUP_MAX_FETCHES,
+        prefetch_delay: float = WARMUP_PREFETCH_DELAY,
+    ):
+        self.interval = interval
+        self.top_views = top_views
+        self.concurrency = concurrency
+        self.max_fetches = max_fetches
+        self.prefetch_delay = prefetch_delay
+        self.request_log = RequestLog(on_record=self._schedule_prefetch)
+        self.last_round: Optional[Dict[str, Any]] = None
+        self.last_prefetch: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._prefetch_task: Optional[asyncio.Task] = None
+        self._prefetch_due: float = 0
+        self._prefetch_view: Optional[BBox] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def plan(self) -> List[BBox]:
+        """
+        Views to fetch this round, in priority order
+
+        Default city view first, then the most-requested views, then the
+        neighbors of recent views. Views already cached are skipped and the
+        list is capped at the per-round fetch budget.
+        """
+        log = self.request_log
+        candidates = [round_bbox(OVERLAND_PARK_BBOX, decimals=3)]
+        for view in log.most_requested(self.top_views):
+            candidates.extend(log.cache_units(view))
+        for view in log.recent_views():
+            for neighbor in neighbor_bboxes(view):
+                candidates.extend(log.cache_units(neighbor, around=view))
+        return self._uncached(candidates)
+
+    def _uncached(self, candidates: List[BBox]) -> List[BBox]:
+        """Distinct candidates that aren't cached yet, capped at the fetch budget"""
+        planned: List[BBox] = []
+        seen = set()
+        for bbox in candidates:
+            if bbox in seen or is_power_cached(bbox):
+                continue
+            seen.add(bbox)
+            planned.append(bbox)
+            if len(planned) >= self.max_fetches:
+                break
+        return planned
+
+    def _concurrency(self) -> int:
+        # Stay below the global Overpass limit so users always have a free slot
+        return min(self.concurrency, overpass_limiter.max_concurrency - WARMUP_RESERVED_SLOTS)
+
+    async def _warm(self, planned: List[BBox], concurrency: int) -> Dict[str, int]:
+        """Fetch planned views, deferring to queued user requests"""
+        # Shared by rounds and prefetches so together they stay within the concurrency budget
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(concurrency, 1))
+        semaphore = self._slots
+
+        async def warm(bbox: BBox) -> Optional[bool]:
+            async with semaphore:
+                if overpass_limiter.queued:
+                    return None  # User requests are waiting for a slot - leave it to them
+                try:
+                    await get_power_infrastructure(bbox)
+                    return True
+                except Exception as e:
+                    logger.warning(f"⚠️ Warm-up: power fetch failed for {bbox}: {e}")
+                    return False
+
+        results = await asyncio.gather(*(warm(bbox) for bbox in planned))
+        return {
+            "planned": len(planned),
+            "warmed": results.count(True),
+            "failed": results.count(False),
+            "deferred": results.count(None),
+        }
+
+    async def warm_once(self) -> Dict[str, Any]:
+        """
+        Run one warm-up round
+
+        Returns:
+            Dict with counts of warmed and failed views
+        """
+        try:
+            await get_boundary_geometry()
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up: boundary fetch failed: {e}")
+
+        concurrency = self._concurrency()
+        planned = self.plan() if concurrency > 0 else []
+        self.request_log.decay()
+        self.last_round = await self._warm(planned, concurrency)
+        warmed = self.last_round["warmed"]
+        deferred = self.last_round["deferred"]
+        if planned:
+            logger.info(f"✅ Warm-up: {warmed}/{len(planned)} views cached ({deferred} deferred to user traffic)")
+        return self.last_round
+
+    def _schedule_prefetch(self, view: BBox) -> None:
+        """Arm (or push back) the neighbor prefetch for the latest view"""
+        if self._task is None or self._task.done():
+            return  # Warm-up disabled or not started
+        loop = asyncio.get_running_loop()
+        self._prefetch_view = view
+        self._prefetch_due = loop.time() + self.prefetch_delay
+        if self._prefetch_task is None or self._prefetch_task.done():
+            self._prefetch_task = loop.create_task(self._prefetch())
+
+    async def _prefetch(self) -> None:
+        """Wait for panning to settle, then fetch the uncached neighbors of the latest view"""
+        loop = asyncio.get_running_loop()
+        while loop.time() < self._prefetch_due:
+            await asyncio.sleep(self._prefetch_due - loop.time())
+
+        concurrency = self._concurrency()
+        view = self._prefetch_view
+        if view is None or concurrency <= 0:
+            return
+        candidates = [
+            unit for neighbor in neighbor_bboxes(view)
+            for unit in self.request_log.cache_units(neighbor, around=view)
+        ]
+        try:
+            self.last_prefetch = dict(await self._warm(self._uncached(candidates), concurrency), view=view)
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up: neighbor prefetch failed: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.warm_once()
+            except Exception as e:
+                logger.warning(f"⚠️ Warm-up round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._prefetch_task is not None:
+            self._prefetch_task.cancel()
+            self._prefetch_task = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "enabled": WARMUP_ENABLED,
+            "running": self._task is not None and not self._task.done(),
+            "tracked_views": len(self.request_log.counts),
+            "last_round": self.last_round,
+            "last_prefetch": self.last_prefetch,
+        }
+
+
+# Global instance
+warmup_scheduler = WarmupScheduler()
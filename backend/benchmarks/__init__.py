@@ -0,0 +1,3 @@
+"""
+Benchmarks and load tests that run without public Overpass or Neo4j
+"""
@@ -0,0 +1,152 @@
+"""
+In-process stand-in for the Neo4j graph
+Generates a synthetic FEEDS tree and answers the handful of Cypher
+statements the app needs to serve graph routes from the topology cache
+(connection test, version check, topology load, component lookup,
+upstream index check).
+Anything else raises, so unsupported routes show up as errors in a load
+test instead of silently passing.
+"""
+
+import random
+import time
+from typing import Dict, Any, List, Tuple
+
+# Fan-out below each level of the synthetic tree
+GRAPH_LEVELS = [
+    ("PowerGeneration", 1),
+    ("StepUpSubstation", 2),
+    ("TransmissionLine", 2),
+    ("TransmissionSubstation", 2),
+    ("DistributionSubstation", 3),
+    ("DistributionLine", 4),
+    ("LocalTransformer", 5),
+    ("ServiceDrop", 3),
+    ("Building", 1),
+]
+
+
+def synthetic_grid(seed: int = 7) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+    """
+    Component records and FEEDS edges of a synthetic radial grid
+
+    Returns:
+        Tuple of (nodes, (source_id, target_id) edges)
+    """
+    rng = random.Random(seed)
+    nodes: List[Dict[str, Any]] = []
+    edges: List[Tuple[str, str]] = []
+    parents: List[str] = []
+
+    for component_type, fan_out in GRAPH_LEVELS:
+        level: List[str] = []
+        for parent in parents or [None]:
+            for _ in range(fan_out):
+                component_id = f"{component_type.lower()}-{len(nodes)}"
+                nodes.append({
+                    "id": component_id,
+                    "name": f"{component_type} {len(nodes)}",
+                    "type": component_type,
+                    "longitude": round(rng.uniform(-94.80, -94.55), 6),
+                    "latitude": round(rng.uniform(38.85, 39.10), 6),
+                })
+                if parent is not None:
+                    edges.append((parent, component_id))
+                level.append(component_id)
+        parents = level
+
+    return nodes, edges
+
+
+class _Record(dict):
+    def data(self) -> Dict[str, Any]:
+        return dict(self)
+
+
+class _Result(list):
+    def single(self):
+        return self[0] if self else None
+
+    def consume(self):
+        return None
+
+
+class FakeSession:
+    def __init__(self, graph: "FakeGraph"):
+        self.graph = graph
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def close(self):
+        pass
+
+    def run(self, query: str, **params) -> _Result:
+        if self.graph.query_latency:
+            time.sleep(self.graph.query_latency)
+        text = " ".join(query.split())
+        graph = self.graph
+
+        if text == "RETURN 1 as test":
+            return _Result([_Record(test=1)])
+        if "upstream_index" in text:
+            # No upstream index is built, so path lookups fall back to FEEDS
+            return _Result([])
+        if "GraphMeta" in text:
+            return _Result([_Record(version=graph.version)])
+        if text.startswith("MATCH (n:Component) RETURN count(n)"):
+            return _Result([_Record(count=len(graph.nodes))])
+        if text.startswith("MATCH ()-[r:FEEDS]->() RETURN count(r)"):
+            return _Result([_Record(count=len(graph.edges))])
+        if text.startswith("MATCH (n:Component) RETURN n.id as id"):
+            return _Result(_Record(node) for node in graph.nodes)
+        if text.startswith("MATCH (a:Component)-[:FEEDS]->(b:Component) RETURN a.id as source"):
+            return _Result(_Record(source=s, target=t) for s, t in graph.edges)
+        if text.startswith("MATCH (n:Component {id: $component_id})"):
+            node = graph.by_id.get(params.get("component_id"))
+            return _Result([_Record(node)] if node else [])
+
+        raise NotImplementedError(f"Fake graph can't answer: {text[:80]}")
+
+
+class FakeDriver:
+    def __init__(self, graph: "FakeGraph"):
+        self.graph = graph
+
+    def session(self, **kwargs) -> FakeSession:
+        return FakeSession(self.graph)
+
+    def verify_connectivity(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class FakeGraph:
+    """
+    Synthetic grid served through a Neo4j-like driver
+
+    Args:
+        query_latency: Seconds added to every statement (simulated round trip)
+    """
+
+    def __init__(self, query_latency: float = 0.0, seed: int = 7):
+        self.nodes, self.edges = synthetic_grid(seed)
+        self.by_id = {node["id"]: node for node in self.nodes}
+        self.version = "fake-1"
+        self.query_latency = query_latency
+
+    def component_ids(self, component_type: str) -> List[str]:
+        return [node["id"] for node in self.nodes if node["type"] == component_type]
+
+    def install(self) -> None:
+        """Replace the app's Neo4j driver with this graph"""
+        from app.database.neo4j import neo4j_driver
+
+        driver = FakeDriver(self)
+        neo4j_driver.driver = driver
+        neo4j_driver.connect = lambda: driver
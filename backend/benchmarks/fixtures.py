@@ -0,0 +1,158 @@
+"""
+Overpass response fixtures for benchmarks
+By default every size is a deterministic synthetic response, generated on
+demand, so every machine replays the same bytes without any committed
+data. Live responses can be recorded into benchmarks/fixtures/<size>.json.gz
+(git-ignored, local only); a recorded file takes precedence over the
+synthetic response of its size.
+
+Usage (record live responses, needs network):
+    python -m benchmarks.fixtures --record small --bbox 38.93,-94.70,38.95,-94.67
+    python -m benchmarks.fixtures --record all     # every size over FIXTURE_BBOXES
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+from typing import Dict, Any, List, Tuple
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Element counts of the synthetic responses (roughly: one neighborhood,
+# a few square km, the whole city)
+FIXTURE_SIZES = {
+    "small": 500,
+    "medium": 5000,
+    "large": 30000,
+}
+
+# Overland Park map view (south, west, north, east)
+SYNTHETIC_BBOX = (38.85, -94.80, 39.10, -94.55)
+
+# Live views recorded for each size (south, west, north, east)
+FIXTURE_BBOXES = {
+    "small": (38.93, -94.70, 38.95, -94.67),
+    "medium": (38.90, -94.72, 38.98, -94.62),
+    "large": SYNTHETIC_BBOX,
+}
+
+
+def fixture_path(size: str) -> str:
+    return os.path.join(FIXTURES_DIR, f"{size}.json.gz")
+
+
+def synthetic_response(elements: int, seed: int = 42) -> Dict[str, Any]:
+    """
+    Deterministic Overpass-shaped response
+
+    ~30% transformers, ~60% distribution lines, ~10% transmission lines;
+    lines are short random walks of 2-25 nodes.
+    """
+    rng = random.Random(seed)
+    south, west, north, east = SYNTHETIC_BBOX
+    result: List[Dict[str, Any]] = []
+
+    for i in range(elements):
+        lat = rng.uniform(south, north)
+        lon = rng.uniform(west, east)
+        roll = rng.random()
+        if roll < 0.3:
+            result.append({
+                "type": "node",
+                "id": 1_000_000_000 + i,
+                "lat": round(lat, 7),
+                "lon": round(lon, 7),
+                "tags": {"power": "transformer", "voltage": rng.choice(["12470", "7200", "13200;480"])},
+            })
+            continue
+
+        transmission = roll > 0.9
+        geometry = []
+        for _ in range(rng.randint(2, 25)):
+            geometry.append({"lat": round(lat, 7), "lon": round(lon, 7)})
+            lat += rng.uniform(-0.0005, 0.0005)
+            lon += rng.uniform(-0.0005, 0.0005)
+        tags = {"power": "line" if transmission else "minor_line", "operator": "Evergy"}
+        if transmission or rng.random() < 0.5:
+            tags["voltage"] = rng.choice(["345000", "161000", "69000"]) if transmission else "12470"
+        result.append({
+            "type": "way",
+            "id": 500_000_000 + i,
+            "nodes": list(range(len(geometry))),
+            "geometry": geometry,
+            "tags": tags,
+        })
+
+    return {"version": 0.6, "generator": "synthetic", "elements": result}
+
+
+def load_fixture(size: str) -> Tuple[bytes, str]:
+    """
+    Raw response body for a fixture size
+
+    Returns:
+        Tuple of (JSON bytes, "recorded" or "synthetic")
+    """
+    path = fixture_path(size)
+    if os.path.exists(path):
+        with gzip.open(path, "rb") as f:
+            body = f.read()
+        return body, "synthetic" if b'"generator": "synthetic"' in body[:200] else "recorded"
+    if size not in FIXTURE_SIZES:
+        raise ValueError(f"Unknown fixture size: {size}")
+    return json.dumps(synthetic_response(FIXTURE_SIZES[size])).encode(), "synthetic"
+
+
+async def record_fixture(size: str, bbox: Tuple[float, float, float, float]) -> str:
+    """Fetch the power query for bbox from live Overpass and store it as a fixture"""
+    from app.services.overpass_service import query_overpass
+
+    south, west, north, east = bbox
+    query = f"""
+    [out:json][timeout:25];
+    (
+      way["power"="line"]({south},{west},{north},{east});
+      way["power"="minor_line"]({south},{west},{north},{east});
+      node["power"="transformer"]({south},{west},{north},{east});
+    );
+    out geom;
+    """
+    body = await query_overpass(query, raw=True)
+    return write_fixture(size, body)
+
+
+def write_fixture(size: str, body: bytes) -> str:
+    """Store a response body as a fixture (mtime 0, so the same body gives the same file)"""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    path = fixture_path(size)
+    with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0) as f:
+        f.write(body)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record Overpass fixtures for the benchmarks")
+    parser.add_argument("--record", metavar="SIZE", help="Fixture name, e.g. small/medium/large, or 'all'")
+    parser.add_argument("--bbox", help="Bounding box as south,west,north,east (default: FIXTURE_BBOXES)")
+    args = parser.parse_args()
+
+    if not args.record:
+        parser.error("--record is required")
+
+    sizes = list(FIXTURE_BBOXES) if args.record == "all" else [args.record]
+    for size in sizes:
+        if args.bbox:
+            bbox = tuple(float(x) for x in args.bbox.split(","))
+        elif size in FIXTURE_BBOXES:
+            bbox = FIXTURE_BBOXES[size]
+        else:
+            parser.error(f"--bbox is required for fixture '{size}'")
+        path = asyncio.run(record_fixture(size, bbox))
+        print(f"✅ Recorded {size} fixture to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+API server for load tests
+Runs the real FastAPI app with the Neo4j driver replaced by the fake graph
+and the topology cache enabled. Overpass is redirected by the caller
+through OVERPASS_URLS.
+
+Usage (normally started by load_test.py):
+    python -m benchmarks.load_server --port 8765 [--graph-latency 0.002]
+"""
+
+import argparse
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API against the fake graph")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--graph-latency", type=float, default=0.0, help="Seconds added per Cypher statement")
+    args = parser.parse_args()
+
+    # Must be set before the app modules read their configuration
+    os.environ["TOPOLOGY_CACHE_ENABLED"] = "true"
+    os.environ.setdefault("WARMUP_ENABLED", "false")
+
+    import uvicorn
+    from benchmarks.fake_graph import FakeGraph
+    from main import app
+
+    FakeGraph(query_latency=args.graph_latency).install()
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
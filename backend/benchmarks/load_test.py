@@ -0,0 +1,262 @@
+"""
+Load-test harness for one API instance
+Starts the app in a subprocess against a local Overpass stand-in
+(configurable latency, payload size and injected failures) and the fake
+graph, drives simulated map users through open / zoom / pan / inspect
+sessions, and reports latency percentiles and throughput per route.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --users 20 --duration 60
+    python -m benchmarks.load_test --users 50 --payload large --overpass-latency 2 --failure-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Any, List
+
+import httpx
+
+from benchmarks.fake_graph import FakeGraph
+from benchmarks.fixtures import FIXTURE_SIZES, load_fixture
+from benchmarks.stand_in import OverpassStandIn
+
+# Overland Park map view (south, west, north, east) - the frontend default
+CITY_BBOX = (38.85, -94.80, 39.10, -94.55)
+
+# Zoomed-in views are snapped to this grid, like repeated visits to the same neighborhoods
+VIEW_GRID = 0.005
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def bbox_param(bbox) -> str:
+    return ",".join(f"{c:.3f}" for c in bbox)
+
+
+class Stats:
+    """Latencies and errors per route"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, seconds: float, ok: bool) -> None:
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            routes[route] = {
+                "requests": len(values),
+                "errors": self.errors[route],
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+            }
+        total = sum(r["requests"] for r in routes.values())
+        return {
+            "elapsed_s": round(elapsed, 1),
+            "requests": total,
+            "errors": sum(r["errors"] for r in routes.values()),
+            "throughput_rps": round(total / elapsed, 2),
+            "routes": routes,
+        }
+
+
+class MapUser:
+    """
+    One simulated map user
+
+    Opens the city view, then repeatedly zooms into a neighborhood, pans
+    around it, checks stats and inspects grid components.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, stats: Stats, graph: FakeGraph, think: float, seed: int):
+        self.client = client
+        self.stats = stats
+        self.rng = random.Random(seed)
+        self.think = think
+        self.transformers = graph.component_ids("LocalTransformer")
+        self.buildings = graph.component_ids("Building")
+        self.substations = graph.component_ids("DistributionSubstation")
+
+    async def get(self, route: str, url: str) -> None:
+        start = time.perf_counter()
+        try:
+            response = await self.client.get(url)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        self.stats.record(route, time.perf_counter() - start, ok)
+
+    async def pause(self) -> None:
+        if self.think:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.think)
+
+    def neighborhood(self):
+        """A snapped zoomed-in view inside the city"""
+        south, west, north, east = CITY_BBOX
+        size = self.rng.choice([0.01, 0.02, 0.04])
+        lat = round(self.rng.uniform(south, north - size) / VIEW_GRID) * VIEW_GRID
+        lon = round(self.rng.uniform(west, east - size) / VIEW_GRID) * VIEW_GRID
+        return (lat, lon, lat + size, lon + size)
+
+    async def session(self, deadline: float) -> None:
+        await self.get("GET /api/op/boundary", "/api/op/boundary?detail=medium")
+        await self.get("GET /api/op/power", f"/api/op/power?bbox={bbox_param(CITY_BBOX)}")
+
+        while time.monotonic() < deadline:
+            await self.pause()
+            view = self.neighborhood()
+            await self.get("GET /api/op/power", f"/api/op/power?bbox={bbox_param(view)}")
+
+            for _ in range(self.rng.randint(1, 3)):
+                if time.monotonic() >= deadline:
+                    return
+                await self.pause()
+                south, west, north, east = view
+                d_lat = (north - south) / 2 * self.rng.choice([-1, 0, 1])
+                d_lon = (east - west) / 2 * self.rng.choice([-1, 0, 1])
+                view = (south + d_lat, west + d_lon, north + d_lat, east + d_lon)
+                await self.get("GET /api/op/power", f"/api/op/power?bbox={bbox_param(view)}")
+
+            if self.rng.random() < 0.5:
+                await self.get("GET /api/op/stats", f"/api/op/stats?bbox={bbox_param(view)}")
+
+            await self.pause()
+            roll = self.rng.random()
+            if roll < 0.5:
+                component = self.rng.choice(self.buildings)
+                await self.get("GET /api/components/{id}/path-to-source",
+                               f"/api/components/{component}/path-to-source")
+            elif roll < 0.8:
+                component = self.rng.choice(self.transformers)
+                await self.get("GET /api/components/{id}/impact", f"/api/components/{component}/impact")
+            else:
+                component = self.rng.choice(self.substations)
+                await self.get("GET /api/components/{id}/downstream",
+                               f"/api/components/{component}/downstream?limit=500")
+
+
+async def wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"API server exited with status {process.returncode}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("API server did not become ready")
+
+
+async def drive(base_url: str, users: int, duration: float, think: float, ramp_up: float) -> Dict[str, Any]:
+    stats = Stats()
+    graph = FakeGraph()
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        start = time.monotonic()
+        deadline = start + duration
+
+        async def run_user(i: int):
+            await asyncio.sleep(ramp_up * i / max(1, users))
+            await MapUser(client, stats, graph, think, seed=i).session(deadline)
+
+        await asyncio.gather(*(run_user(i) for i in range(users)))
+        elapsed = time.monotonic() - start
+        server_metrics = (await client.get("/api/health")).json()
+    report = stats.report(elapsed)
+    report["server"] = {
+        "event_loop_lag": server_metrics.get("event_loop_lag"),
+        "overpass": {k: v for k, v in (server_metrics.get("overpass") or {}).items() if k != "mirrors"},
+    }
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n📊 {report['requests']} requests in {report['elapsed_s']}s "
+          f"({report['throughput_rps']} req/s, {report['errors']} errors)\n")
+    print(f"   {'route':<42} {'reqs':>6} {'errs':>5} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, r in report["routes"].items():
+        print(f"   {route:<42} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>7} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+    print(f"\n   server event loop lag: {report['server']['event_loop_lag']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API with local Overpass and Neo4j stand-ins")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=60, help="Test length in seconds")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds over which users join")
+    parser.add_argument("--think", type=float, default=1.0, help="Mean think time between actions (seconds)")
+    parser.add_argument("--payload", default="medium", choices=list(FIXTURE_SIZES), help="Overpass response size")
+    parser.add_argument("--overpass-latency", type=float, default=0.5, help="Stand-in Overpass latency (seconds)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of Overpass queries that fail")
+    parser.add_argument("--failure-status", type=int, default=429, help="HTTP status of injected failures")
+    parser.add_argument("--graph-latency", type=float, default=0.002, help="Fake Neo4j latency per statement")
+    parser.add_argument("--mirror-rate", type=float, default=1000, help="OVERPASS_MIRROR_RATE for the server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--server-log", default=os.devnull, help="File for the API server's log output")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    body, source = load_fixture(args.payload)
+    print(f"📦 Overpass payload: {args.payload} ({len(body) / 1024:.0f} KB, {source})")
+
+    with OverpassStandIn(body, latency=args.overpass_latency, failure_rate=args.failure_rate,
+                         failure_status=args.failure_status) as stand_in:
+        env = dict(
+            os.environ,
+            OVERPASS_URLS=stand_in.url,
+            OVERPASS_MIRROR_RATE=str(args.mirror_rate),
+            OVERPASS_MIRROR_BURST=str(max(1, int(args.mirror_rate))),
+        )
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        server_log = open(args.server_log, "w")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.load_server", "--port", str(args.port),
+             "--graph-latency", str(args.graph_latency)],
+            cwd=backend_dir,
+            env=env,
+            stdout=server_log,
+            stderr=subprocess.STDOUT,
+        )
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(wait_ready(base_url, process))
+            print(f"🚀 {args.users} users for {args.duration:.0f}s against {base_url}")
+            report = asyncio.run(drive(base_url, args.users, args.duration, args.think, args.ramp_up))
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+            server_log.close()
+        report["overpass_stand_in"] = {"requests": stand_in.requests, "injected_failures": stand_in.failures}
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Benchmark suite for the power data path
+Replays Overpass fixtures (recorded or synthetic, see fixtures.py) through
+a local stand-in server and times parsing, serialization, length
+calculation, the cache hit/miss paths of get_power_infrastructure and
+end-to-end /api/op/power throughput. Results are compared against stored
+baselines to catch regressions.
+
+Absolute timings differ between machines and between runs on a busy one,
+so every result stores the timing of a fixed stdlib-only reference
+workload measured right before it, and comparisons use the ratio of the
+fastest run to that reference (minimums are the least disturbed by other
+load). That cancels most of the machine's speed; the end-to-end and
+sub-millisecond cache-hit timings are still noisy, so treat --check as a
+local gate on one machine rather than a portable threshold.
+
+Usage (from backend/):
+    python -m benchmarks.run_benchmarks                  # run and compare with baselines.json
+    python -m benchmarks.run_benchmarks --save           # store current results as the baseline
+    python -m benchmarks.run_benchmarks --check          # exit 1 on regression (for CI)
+    python -m benchmarks.run_benchmarks --sizes small,medium
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Any, List
+
+from benchmarks.fixtures import FIXTURE_SIZES, load_fixture, synthetic_response
+from benchmarks.stand_in import OverpassStandIn
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# Slower than baseline by more than this factor counts as a regression
+DEFAULT_THRESHOLD = 1.25
+
+BENCH_BBOX = (38.93, -94.70, 38.95, -94.67)
+
+
+def configure_environment(stand_in_url: str) -> None:
+    """Point the app at the stand-in and lift the public-mirror budget (before app imports)"""
+    os.environ["OVERPASS_URLS"] = stand_in_url
+    os.environ["OVERPASS_MIRROR_RATE"] = "1000000"
+    os.environ["OVERPASS_MIRROR_BURST"] = "1000000"
+    os.environ["OVERPASS_MAX_CONCURRENCY"] = "64"
+    os.environ["WARMUP_ENABLED"] = "false"
+    os.environ.setdefault("CPU_EXECUTOR", "thread")
+
+
+def reference_workload(body: str) -> None:
+    """Fixed CPU work on the standard library only, so app changes can't move it"""
+    json.dumps(json.loads(body), separators=(",", ":"))
+    total = 0.0
+    for i in range(50_000):
+        total += math.sin(i) * math.cos(i)
+
+
+_REFERENCE_BODY = json.dumps(synthetic_response(FIXTURE_SIZES["small"]))
+
+
+def measure_reference(repeat: int) -> float:
+    """Fastest run of the reference workload, in milliseconds"""
+    return bench(lambda: reference_workload(_REFERENCE_BODY), max(5, repeat))["min_ms"]
+
+
+def summarize(samples: List[float], ops_per_sample: int = 1) -> Dict[str, float]:
+    """Per-operation timings in milliseconds"""
+    per_op = [s * 1000 / ops_per_sample for s in samples]
+    return {
+        "median_ms": round(statistics.median(per_op), 4),
+        "min_ms": round(min(per_op), 4),
+        "mean_ms": round(statistics.mean(per_op), 4),
+        "runs": len(per_op),
+    }
+
+
+def bench(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Time a synchronous callable (one warm-up call first)"""
+    func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def bench_async(func: Callable[[], Any], repeat: int, setup: Callable[[], None] = None) -> Dict[str, float]:
+    """Time an async callable, running setup (untimed) before each call"""
+    if setup:
+        setup()
+    await func()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def bench_throughput(client, url_for: Callable[[int], str], requests: int, concurrency: int,
+                           setup: Callable[[], None] = None) -> Dict[str, float]:
+    """Requests per second through the ASGI app with a fixed number of concurrent clients"""
+    if setup:
+        setup()
+    queue = list(range(requests))
+    latencies: List[float] = []
+
+    async def worker():
+        while queue:
+            i = queue.pop()
+            start = time.perf_counter()
+            response = await client.get(url_for(i))
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    result = summarize(latencies)
+    result["requests_per_second"] = round(requests / elapsed, 1)
+    return result
+
+
+async def run_suite(stand_in: OverpassStandIn, sizes: List[str], repeat: int) -> Dict[str, Any]:
+    import httpx
+    from main import app
+    from app.services import overpass_service
+    from app.services.overpass_service import (
+        build_power_result,
+        calculate_linestring_length,
+        get_power_infrastructure,
+    )
+
+    def clear_caches():
+        overpass_service._power_cache.clear()
+
+    results: Dict[str, Any] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in sizes:
+            body, source = load_fixture(size)
+            stand_in.body = body
+            decoded = build_power_result(body)
+            features = decoded["geojson"]["features"]
+            lines = [f["geometry"]["coordinates"] for f in features if f["geometry"]["type"] == "LineString"]
+            print(f"\n📦 {size}: {len(features)} features, {len(body) / 1024:.0f} KB ({source})")
+
+            def length_all():
+                for coordinates in lines:
+                    calculate_linestring_length(coordinates)
+
+            cases = {
+                "linestring_length": lambda: bench(length_all, repeat),
+                "parse": lambda: bench(lambda: build_power_result(body), repeat),
+                "serialize": lambda: bench(lambda: json.dumps(decoded, separators=(",", ":")), repeat),
+            }
+            for name, run in cases.items():
+                reference_ms = measure_reference(repeat)
+                results[f"{name}[{size}]"] = dict(run(), reference_ms=reference_ms)
+
+            reference_ms = measure_reference(repeat)
+            results[f"power_miss[{size}]"] = dict(await bench_async(
+                lambda: get_power_infrastructure(BENCH_BBOX), repeat, setup=clear_caches
+            ), reference_ms=reference_ms)
+            reference_ms = measure_reference(repeat)
+            results[f"power_hit[{size}]"] = dict(await bench_async(
+                lambda: get_power_infrastructure(BENCH_BBOX), repeat * 10
+            ), reference_ms=reference_ms)
+
+            bbox_param = ",".join(str(c) for c in BENCH_BBOX)
+            reference_ms = measure_reference(repeat)
+            results[f"e2e_power_hit[{size}]"] = dict(await bench_throughput(
+                client, lambda i: f"/api/op/power?bbox={bbox_param}", requests=max(20, repeat * 10), concurrency=8
+            ), reference_ms=reference_ms)
+
+            def unique_bbox(i: int) -> str:
+                # Distinct 3-decimal cache keys, so every request is a miss
+                shift = (i + 1) * 0.001
+                south, west, north, east = BENCH_BBOX
+                return f"/api/op/power?bbox={south + shift},{west},{north + shift},{east}"
+
+            reference_ms = measure_reference(repeat)
+            results[f"e2e_power_miss[{size}]"] = dict(await bench_throughput(
+                client, unique_bbox, requests=repeat * 2, concurrency=4, setup=clear_caches
+            ), reference_ms=reference_ms)
+
+            for name in [n for n in results if n.endswith(f"[{size}]")]:
+                r = results[name]
+                rps = f"  {r['requests_per_second']:>8} req/s" if "requests_per_second" in r else ""
+                print(f"   {name:<28} median {r['median_ms']:>10.3f} ms  min {r['min_ms']:>10.3f} ms{rps}")
+
+    return results
+
+
+def compare(results: Dict[str, Any], baselines: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Names of benchmarks slower than baseline by more than threshold
+
+    Fastest runs are divided by the reference workload timed before each
+    benchmark; baselines saved without one are compared on absolute medians.
+    """
+    regressions = []
+    print("\n📊 Comparison with baseline (min, relative to the reference workload):")
+    for name, result in results.items():
+        base = baselines.get(name)
+        if not base:
+            print(f"   {name:<28} (no baseline)")
+            continue
+        if base.get("reference_ms"):
+            field = "min_ms"
+            current = result[field] / result["reference_ms"]
+            baseline = base[field] / base["reference_ms"]
+            note = ""
+        else:
+            field = "median_ms"
+            current, baseline, note = result[field], base[field], " (absolute median)"
+        ratio = current / baseline if baseline else float("inf")
+        flag = "⚠️ REGRESSION" if ratio > threshold else ""
+        print(f"   {name:<28} {base[field]:>10.3f} -> {result[field]:>10.3f} ms  x{ratio:.2f}{note} {flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the power data path against recorded Overpass fixtures")
+    parser.add_argument("--sizes", default=",".join(FIXTURE_SIZES), help="Comma-separated fixture sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--save", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 on regression")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Slowdown factor that counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+
+    with OverpassStandIn(b"{}") as stand_in:
+        configure_environment(stand_in.url)
+        results = asyncio.run(run_suite(stand_in, sizes, args.repeat))
+
+    if args.save:
+        baselines = {}
+        if os.path.exists(BASELINES_PATH):
+            with open(BASELINES_PATH) as f:
+                baselines = json.load(f).get("results", {})
+        baselines.update(results)
+        with open(BASELINES_PATH, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": baselines,
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n✅ Baseline saved to {BASELINES_PATH}")
+        return
+
+    if not os.path.exists(BASELINES_PATH):
+        print("\nℹ️  No baseline yet - run with --save to create one")
+        return
+
+    with open(BASELINES_PATH) as f:
+        baselines = json.load(f).get("results", {})
+    regressions = compare(results, baselines, args.threshold)
+    if regressions:
+        print(f"\n⚠️ {len(regressions)} regression(s): {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+    else:
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
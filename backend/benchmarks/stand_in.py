@@ -0,0 +1,115 @@
+"""
+Local stand-in for an Overpass server
+Serves a fixed response body from a background thread, with optional
+latency and injected failures, so the real HTTP path of query_overpass is
+exercised without touching the public mirrors.
+"""
+
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class OverpassStandIn:
+    """
+    Threaded HTTP server answering POST /api/interpreter and GET /api/status
+
+    Args:
+        body: Response body returned for every interpreter query
+        latency: Seconds to wait before answering
+        failure_rate: Fraction of queries answered with an injected failure
+        failure_status: HTTP status of injected failures (429 sends Retry-After: 1)
+        seed: Seed for failure injection
+    """
+
+    def __init__(
+        self,
+        body: bytes,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_status: int = 429,
+        seed: int = 0,
+    ):
+        self.body = body
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.requests = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/interpreter"
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            fail = self._rng.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+            return fail
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str, headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.endswith("/status"):
+                    self._send(200, b"Rate limit: 0\n4 slots available now.\n", "text/plain")
+                else:
+                    self._send(404, b"not found", "text/plain")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                if stand_in._should_fail():
+                    status = stand_in.failure_status
+                    headers = {"Retry-After": "1"} if status == 429 else None
+                    self._send(status, b"rate_limited", "text/plain", headers)
+                    return
+                self._send(200, stand_in.body, "application/json")
+
+        return Handler
+
+    def start(self) -> "OverpassStandIn":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "OverpassStandIn":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
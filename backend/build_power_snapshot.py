@@ -0,0 +1,54 @@
+"""
+Build the memory-mapped power dataset snapshot
+Runs the same pipeline as /api/op/power (get_power_infrastructure) for a
+large bbox and writes the result as a snapshot file. Workers pointed at it
+with POWER_SNAPSHOT_PATH serve every view inside the bbox from the file;
+re-run it (e.g. nightly) to refresh - the file is replaced atomically and
+running workers pick up the new one.
+
+Usage:
+    python build_power_snapshot.py [--bbox south,west,north,east] [--output PATH]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services.overpass_service import get_power_infrastructure, OVERLAND_PARK_BBOX
+from app.services.power_snapshot import POWER_SNAPSHOT_PATH, power_snapshot, write_snapshot
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Fetch and process the power dataset, then write it as a snapshot"""
+    parser = argparse.ArgumentParser(description="Write a memory-mapped snapshot of the power dataset")
+    parser.add_argument("--bbox", default=",".join(str(c) for c in OVERLAND_PARK_BBOX),
+                        help="Bounding box as south,west,north,east")
+    parser.add_argument("--output", default=POWER_SNAPSHOT_PATH,
+                        help="Snapshot file (default: POWER_SNAPSHOT_PATH)")
+    args = parser.parse_args()
+
+    if not args.output:
+        parser.error("--output is required when POWER_SNAPSHOT_PATH is not set")
+    bbox = tuple(float(x) for x in args.bbox.split(","))
+
+    # Build from Overpass, not from the snapshot being replaced
+    power_snapshot.path = ""
+
+    logger.info(f"🌐 Fetching power infrastructure for {bbox}...")
+    power = asyncio.run(get_power_infrastructure(bbox))
+    header = write_snapshot(args.output, power, bbox)
+    logger.info(
+        f"✅ Wrote {args.output}: {header['features']} features, "
+        f"{header['bytes'] / 1024:.0f} KB, {header['grid']['rows']}x{header['grid']['cols']} index cells"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Build the materialized upstream-source index in Neo4j
+Stores each component's UPSTREAM parent, source id and depth so path-to-source
+lookups follow one pointer chain. load_graph.py already runs the full
+rebuild; use --component after editing FEEDS by hand to refresh only the
+subtree below the changed components.
+
+Usage:
+    python build_upstream_index.py [--component ID ...] [--batch-size N]
+"""
+
+import argparse
+import logging
+
+from app.database.neo4j import neo4j_driver
+from app.services.upstream_index import (
+    DEFAULT_BATCH_SIZE,
+    rebuild_upstream_index,
+    refresh_upstream_subtree,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Rebuild the whole index, or refresh the subtrees below the given components"""
+    parser = argparse.ArgumentParser(description="Precompute upstream parent/source pointers in Neo4j")
+    parser.add_argument("--component", action="append", default=[],
+                        help="Refresh only this component and everything downstream of it (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per transaction")
+    args = parser.parse_args()
+
+    try:
+        logger.info("🔌 Connecting to Neo4j...")
+        neo4j_driver.connect()
+
+        if args.component:
+            count = refresh_upstream_subtree(args.component, batch_size=args.batch_size)
+            logger.info(f"✅ Recomputed {count} component(s)")
+        else:
+            summary = rebuild_upstream_index(batch_size=args.batch_size)
+            logger.info(f"✅ Upstream index complete: {summary}")
+    except Exception as e:
+        logger.error(f"❌ Error building upstream index: {e}")
+        raise
+    finally:
+        neo4j_driver.close()
+
+
+if __name__ == "__main__":
+    main()
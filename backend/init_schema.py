@@ -19,6 +19,13 @@ def create_constraints():
         # Indexes for faster lookups
         "CREATE INDEX component_type IF NOT EXISTS FOR (c:Component) ON (c.type)",
         "CREATE INDEX component_name IF NOT EXISTS FOR (c:Component) ON (c.name)",
+        
+        # Range indexes for sorted listings and (type, id) keyset pagination
+        "CREATE INDEX component_type_name IF NOT EXISTS FOR (c:Component) ON (c.type, c.name)",
+        "CREATE INDEX component_type_id IF NOT EXISTS FOR (c:Component) ON (c.type, c.id)",
+        
+        # Spatial index for bbox filters and nearest-component lookups
+        "CREATE POINT INDEX component_location IF NOT EXISTS FOR (c:Component) ON (c.location)",
     ]
     
     with neo4j_driver.get_session() as session:
@@ -31,6 +38,39 @@ def create_constraints():
                 logger.debug(f"Constraint/index may already exist: {e}")
 
 
+def migrate_locations(batch_size: int = 10000) -> int:
+    """
+    Set the location point property from longitude/latitude
+    
+    Runs in batches so large graphs don't need one huge transaction.
+    Safe to re-run: only components without a location are touched.
+    
+    Args:
+        batch_size: Number of components updated per transaction
+        
+    Returns:
+        Number of components migrated
+    """
+    total = 0
+    with neo4j_driver.get_session() as session:
+        while True:
+            result = session.run("""
+                MATCH (c:Component)
+                WHERE c.location IS NULL
+                  AND c.longitude IS NOT NULL AND c.latitude IS NOT NULL
+                WITH c LIMIT $batch_size
+                SET c.location = point({longitude: c.longitude, latitude: c.latitude})
+                RETURN count(c) as count
+            """, batch_size=batch_size)
+            count = result.single()["count"]
+            total += count
+            if count < batch_size:
+                break
+    
+    logger.info(f"✅ Migrated location for {total} components")
+    return total
+
+
 def create_sample_data():
     """
     Create sample power grid data for testing
@@ -42,8 +82,7 @@ def create_sample_data():
     # DISABLED: This creates SF demo data. Use Overpass API for real data instead.
     return 0
     
-    # Original SF demo data (commented out):
-    """
+    # Original SF demo data (unreachable while disabled):
     sample_data = """
     // Create a sample power generation plant
     CREATE (pg:Component:PowerGeneration {
@@ -204,6 +243,10 @@ def main():
         logger.info("📋 Creating constraints and indexes...")
         create_constraints()
         
+        # Backfill location points for the spatial index
+        logger.info("\n📍 Migrating component locations...")
+        migrate_locations()
+        
         # Create sample data (DISABLED - using Overpass API for real data instead)
         # logger.info("\n📦 Creating sample power grid data...")
         # create_sample_data()
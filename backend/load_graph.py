@@ -0,0 +1,63 @@
+"""
+Import Overland Park power infrastructure into the Neo4j graph
+Fetches lines and transformers from Overpass, infers FEEDS topology and
+bulk-loads it. Safe to re-run: everything is merged on component id.
+
+Usage:
+    python load_graph.py [--bbox south,west,north,east] [--batch-size N] [--workers N]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from app.database.neo4j import neo4j_driver
+from app.services.overpass_service import get_power_infrastructure, OVERLAND_PARK_BBOX
+from app.services.graph_loader import build_graph, load_graph, DEFAULT_BATCH_SIZE, DEFAULT_WORKERS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Fetch, build and load the power graph"""
+    parser = argparse.ArgumentParser(description="Bulk-load OSM power infrastructure into Neo4j")
+    parser.add_argument("--bbox", default=",".join(str(c) for c in OVERLAND_PARK_BBOX),
+                        help="Bounding box as south,west,north,east")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per transaction")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel writer sessions for node batches")
+    args = parser.parse_args()
+
+    bbox = tuple(float(x) for x in args.bbox.split(","))
+
+    logger.info("=" * 50)
+    logger.info("Loading power graph from OpenStreetMap")
+    logger.info("=" * 50)
+
+    try:
+        logger.info(f"\n🌐 Fetching power infrastructure for {bbox}...")
+        power = asyncio.run(get_power_infrastructure(bbox))
+        features = power["geojson"]["features"]
+
+        logger.info(f"🔗 Inferring topology for {len(features)} features...")
+        records, edges = build_graph(features)
+        logger.info(f"   {len(records)} components, {len(edges)} FEEDS relationships")
+
+        logger.info("\n🔌 Connecting to Neo4j...")
+        neo4j_driver.connect()
+
+        logger.info(f"📦 Writing (batch size {args.batch_size}, {args.workers} node workers)...")
+        summary = load_graph(records, edges, batch_size=args.batch_size, workers=args.workers)
+
+        logger.info("\n" + "=" * 50)
+        logger.info(f"✅ Import complete: {summary}")
+        logger.info("=" * 50)
+    except Exception as e:
+        logger.error(f"\n❌ Error during import: {e}")
+        raise
+    finally:
+        neo4j_driver.close()
+
+
+if __name__ == "__main__":
+    main()
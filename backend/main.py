@@ -2,45 +2,82 @@
 Power Grid Visualizer - FastAPI Backend
 Main entry point for the application
 """
+import time
+
+# Boot reference for the startup report (before the heavy imports)
+_boot_started = time.perf_counter()
+
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from app.database.neo4j import neo4j_driver
+from app.services.topology_cache import topology_cache
+from app.services.executor import run_in_thread, shutdown_executor
+from app.services.loop_monitor import loop_monitor
+from app.services.warmup import warmup_scheduler, WARMUP_ENABLED
+from app.services.overpass_service import overpass_limiter, power_batcher
+from app.services.shared_cache import shared_cache
+from app.services.view_delta import view_index
+from app.services.power_snapshot import power_snapshot
+from app.services.stats_grid import stats_grid
+from app.services import metrics
+from app.services.profiling import RequestProfile, token_valid
+from app.services.startup import (
+    startup_report,
+    connect_neo4j_in_background,
+    restore_cache_snapshot,
+    open_power_snapshot,
+    save_cache_snapshot,
+)
 from app.api import components
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+startup_report.begin(_boot_started)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Manage application lifespan - connect to Neo4j on startup (optional)"""
-    # Startup: Try to connect to Neo4j (optional for map view)
+    """Manage application lifespan - serve immediately, connect to Neo4j in the background (optional)"""
     logger.info("🚀 Starting Power Grid Visualizer API...")
     logger.info("📡 Overland Park map endpoints available (Neo4j optional)")
+    startup_report.mark("imports_done")
+    loop_monitor.start()
     
-    try:
-        neo4j_driver.connect()
-        if neo4j_driver.test_connection():
-            logger.info("✅ Neo4j connection verified! (Path traversal features enabled)")
-        else:
-            logger.warning("⚠️ Neo4j connection test failed (Map view still works)")
-    except Exception as e:
-        logger.warning(f"⚠️ Neo4j not available: {e}")
-        logger.info("ℹ️  Map view works without Neo4j. Start Neo4j for path traversal features.")
+    # Boundary and power caches from the last shutdown, so the first map load is a cache hit
+    await restore_cache_snapshot()
+    await open_power_snapshot()
+    
+    # Pre-populate boundary and power caches for the views users are likely to open
+    if WARMUP_ENABLED:
+        warmup_scheduler.start()
+    
+    # Neo4j is optional for the map view - connect (with backoff) without delaying readiness
+    neo4j_task = asyncio.create_task(connect_neo4j_in_background())
+    
+    ready_ms = startup_report.mark("ready")
+    logger.info(f"✅ Ready to serve in {ready_ms:.0f}ms after boot ({startup_report.milestones})")
     
     yield
     
     # Shutdown: Close Neo4j connection if it exists
     logger.info("🛑 Shutting down...")
+    neo4j_task.cancel()
+    save_cache_snapshot()
+    await warmup_scheduler.stop()
+    await loop_monitor.stop()
+    shutdown_executor()
     try:
         neo4j_driver.close()
     except:
@@ -71,10 +108,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Observe latency and response size per route template for /metrics"""
+    start = time.perf_counter()
+    response = None
+    try:
+        response = await call_next(request)
+        return response
+    finally:
+        # The router stores the matched route in the shared scope
+        route_path = getattr(request.scope.get("route"), "path", "unmatched")
+        status = str(response.status_code) if response is not None else "500"
+        metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, request.method, route_path, status)
+        length = response.headers.get("content-length") if response is not None else None
+        if length:
+            metrics.HTTP_RESPONSE_BYTES.observe(int(length), route_path)
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """Profile requests carrying the admin token in the X-Profile-Token header"""
+    # Header only - a token in the query string would end up in access logs and browser history
+    token = request.headers.get("x-profile-token")
+    if token is None or not token_valid(token):
+        return await call_next(request)
+    
+    with RequestProfile(f"{request.method} {request.url.path}") as profile:
+        response = await call_next(request)
+    response.headers["X-Profile-Id"] = profile.id
+    response.headers["Server-Timing"] = profile.server_timing()
+    logger.info(f"🔬 Profiled {profile.name}: {profile.server_timing()} (GET /api/profiles/{profile.id})")
+    return response
+
+
 # Include API routers
 app.include_router(components.router)
 from app.api import overland_park
 app.include_router(overland_park.router)
+from app.api import profiles
+app.include_router(profiles.router)
 
 
 @app.get("/")
@@ -97,18 +171,38 @@ async def health():
 async def health_detailed():
     """Health check endpoint with Neo4j connection status"""
     try:
-        neo4j_status = neo4j_driver.test_connection()
+        # Don't trigger a (blocking) connect here - the background task owns that
+        neo4j_status = neo4j_driver.connected and neo4j_driver.test_connection()
     except:
         neo4j_status = False
     
+    # Takes the cache file lock and reads every index slot - keep it off the loop
+    shared_cache_info = await run_in_thread(shared_cache.info) if shared_cache is not None else None
+    
     return {
         "status": "ok",
         "neo4j_connected": neo4j_status,
         "neo4j_uri": neo4j_driver.uri if neo4j_status else None,
+        "topology_cache": topology_cache.info(),
+        "event_loop_lag": loop_monitor.stats(),
+        "warmup": warmup_scheduler.info(),
+        "overpass": overpass_limiter.info(),
+        "overpass_batching": power_batcher.info(),
+        "shared_cache": shared_cache_info,
+        "view_index": view_index.info(),
+        "power_snapshot": power_snapshot.info(),
+        "stats_grid": stats_grid.info(),
+        "startup": startup_report.info(),
         "message": "Map endpoints work without Neo4j. Neo4j is optional for path traversal features."
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus metrics (text exposition format)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/test-neo4j")
 async def test_neo4j():
     """Test Neo4j connection and return database info"""
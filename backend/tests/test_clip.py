@@ -0,0 +1,120 @@
+"""
+Clipping power features to the city boundary
+A U-shaped boundary lets one line leave and re-enter, so its inside
+pieces come back as a MultiLineString.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import pytest
+
+from app.services.geometry import PreparedPolygon
+from app.services.overpass_service import (
+    BoundaryGeometry,
+    calculate_linestring_length,
+    clip_power_to_boundary,
+)
+
+# U shape: two arms (west -94.70..-94.66, east -94.64..-94.60) joined along the south
+U_SHAPE = [[
+    [-94.70, 38.90], [-94.60, 38.90], [-94.60, 39.00], [-94.64, 39.00],
+    [-94.64, 38.94], [-94.66, 38.94], [-94.66, 39.00], [-94.70, 39.00], [-94.70, 38.90],
+]]
+
+INSIDE = [[-94.69, 38.91], [-94.68, 38.92], [-94.67, 38.93]]
+CROSSING = [[-94.68, 38.95], [-94.68, 39.05]]
+LEAVE_AND_REENTER = [[-94.69, 38.97], [-94.61, 38.97]]
+
+
+def line(coordinates, power="minor_line", voltage="12470"):
+    length_km = calculate_linestring_length(coordinates)
+    return {
+        "type": "Feature",
+        "geometry": {"type": "LineString", "coordinates": coordinates},
+        "properties": {
+            "power": power,
+            "voltage": voltage,
+            "length_km": round(length_km, 3),
+            "length_miles": round(length_km * 0.621371, 3),
+        },
+    }
+
+
+def point(lon, lat):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": {"power": "transformer", "voltage": "7200"},
+    }
+
+
+@pytest.fixture(scope="module")
+def prepared():
+    return PreparedPolygon([U_SHAPE])
+
+
+def test_line_inside_is_unclipped(prepared):
+    pieces, unclipped = prepared.clip_line(INSIDE)
+    assert unclipped
+    assert pieces == [INSIDE]
+
+
+def test_line_crossing_once(prepared):
+    pieces, unclipped = prepared.clip_line(CROSSING)
+    assert not unclipped
+    assert pieces == [[[-94.68, 38.95], [-94.68, 39.0]]]
+
+
+def test_line_leaving_and_reentering(prepared):
+    pieces, unclipped = prepared.clip_line(LEAVE_AND_REENTER)
+    assert not unclipped
+    assert len(pieces) == 2
+    assert pieces[0][0] == [-94.69, 38.97]
+    assert pieces[0][-1][0] == pytest.approx(-94.66)
+    assert pieces[1][0][0] == pytest.approx(-94.64)
+    assert pieces[1][-1] == [-94.61, 38.97]
+
+
+def test_line_outside(prepared):
+    assert prepared.clip_line([[-94.50, 38.95], [-94.40, 38.95]]) == ([], False)
+    # Inside the bbox, in the notch of the U
+    assert prepared.clip_line([[-94.65, 38.96], [-94.65, 38.99]]) == ([], False)
+
+
+def test_clip_power_to_boundary():
+    boundary = BoundaryGeometry([U_SHAPE], {"name": "test"})
+    inside = line(INSIDE)
+    features = [
+        inside,
+        line(CROSSING, power="line", voltage="161000"),
+        line(LEAVE_AND_REENTER),
+        line([[-94.50, 38.95], [-94.40, 38.95]], voltage="345000"),
+        point(-94.69, 38.91),
+        point(-94.65, 38.97),
+    ]
+    clipped = clip_power_to_boundary({"geojson": {"features": features}}, boundary)
+    kept = clipped["geojson"]["features"]
+
+    assert len(kept) == 4
+    # Entirely inside - the original feature, stored length untouched
+    assert kept[0] == inside
+    assert "clipped" not in kept[0]["properties"]
+    assert kept[1]["geometry"]["type"] == "LineString"
+    assert kept[1]["properties"]["clipped"] is True
+    assert kept[2]["geometry"]["type"] == "MultiLineString"
+    assert len(kept[2]["geometry"]["coordinates"]) == 2
+    assert kept[3]["geometry"]["type"] == "Point"
+
+    def miles(feature):
+        geometry = feature["geometry"]
+        lines = geometry["coordinates"] if geometry["type"] == "MultiLineString" else [geometry["coordinates"]]
+        return sum(calculate_linestring_length(c) for c in lines) * 0.621371
+
+    stats = clipped["stats"]
+    assert stats["transformer_count"] == 1
+    assert stats["transmission_miles"] == round(miles(kept[1]), 2)
+    assert stats["distribution_miles"] == round(inside["properties"]["length_miles"] + miles(kept[2]), 2)
+    assert kept[2]["properties"]["length_miles"] == round(miles(kept[2]), 3)
+    # Dropped features don't count toward the voltage range
+    assert stats["highest_voltage"] == 161000
+    assert stats["lowest_voltage"] == 7200
@@ -0,0 +1,40 @@
+"""
+CPU executor result transport
+Process-pool results are pickled once in the worker and come back as
+bytes through the pool pipe or, past the threshold, through shared memory.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import asyncio
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from app.services import executor
+from app.services.executor import _read_shared_result, _run_in_worker, run_cpu_bound
+
+
+def test_small_result_pickled_once():
+    kind, payload, size = _run_in_worker(dict, ({"a": [1, 2]},))
+    assert kind == "inline_bytes"
+    assert isinstance(payload, bytes) and size == len(payload)
+    assert pickle.loads(payload) == {"a": [1, 2]}
+
+
+def test_large_result_through_shared_memory(monkeypatch):
+    pytest.importorskip("multiprocessing.shared_memory")
+    monkeypatch.setattr(executor, "SHARED_MEMORY_THRESHOLD", 100)
+    kind, name, size = _run_in_worker(list, (range(1000),))
+    assert kind == "shm"
+    assert _read_shared_result(name, size) == list(range(1000))
+
+
+def test_process_pool_round_trip(monkeypatch):
+    pool = ProcessPoolExecutor(max_workers=1)
+    monkeypatch.setattr(executor, "_executor", pool)
+    try:
+        assert asyncio.run(run_cpu_bound(sorted, [3, 1, 2])) == [1, 2, 3]
+    finally:
+        pool.shutdown()
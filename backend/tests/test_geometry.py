@@ -0,0 +1,89 @@
+"""
+Boundary ring assembly, multipolygon winding/hole assignment and
+Douglas-Peucker simplification
+
+Run from backend/: python -m pytest -q tests
+"""
+
+from app.services.geometry import (
+    assemble_rings,
+    build_multipolygon,
+    point_in_ring,
+    ring_area,
+    simplify_line,
+    simplify_multipolygon,
+)
+
+
+def square(west, south, east, north, clockwise=False):
+    ring = [[west, south], [east, south], [east, north], [west, north], [west, south]]
+    return ring[::-1] if clockwise else ring
+
+
+def test_ring_split_across_ways():
+    # One square in three unordered ways, the middle one reversed
+    ways = [
+        [[1.0, 1.0], [0.0, 1.0], [0.0, 0.0]],
+        [[1.0, 0.0], [0.5, 0.0], [0.0, 0.0]],
+        [[1.0, 0.0], [1.0, 1.0]],
+    ]
+    rings = assemble_rings(ways)
+    assert len(rings) == 1
+    ring = rings[0]
+    assert ring[0] == ring[-1]
+    assert len(ring) == 6
+    assert abs(ring_area(ring)) == 1.0
+    assert {tuple(c) for c in ring} == {(0.0, 0.0), (0.5, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)}
+
+
+def test_broken_ring_is_closed():
+    rings = assemble_rings([[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0]]])
+    assert rings == [[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]]]
+
+
+def test_polygon_with_hole_winding():
+    outer = square(0.0, 0.0, 10.0, 10.0, clockwise=True)
+    hole = square(2.0, 2.0, 4.0, 4.0)
+    polygons = build_multipolygon([outer], [hole])
+
+    assert len(polygons) == 1
+    shell, inner = polygons[0]
+    assert ring_area(shell) > 0  # RFC 7946: exterior counter-clockwise
+    assert ring_area(inner) < 0  # holes clockwise
+    assert abs(ring_area(inner)) == 4.0
+
+
+def test_two_outer_rings_hole_goes_to_smallest_container():
+    big = square(0.0, 0.0, 10.0, 10.0)
+    # Island inside the big ring's hole, with its own hole
+    lake = square(1.0, 1.0, 9.0, 9.0)
+    island = square(3.0, 3.0, 7.0, 7.0)
+    pond = square(4.0, 4.0, 5.0, 5.0)
+    polygons = build_multipolygon([island, big], [pond, lake])
+
+    assert len(polygons) == 2
+    largest, smallest = polygons
+    assert abs(ring_area(largest[0])) == 100.0
+    assert abs(ring_area(smallest[0])) == 16.0
+    # The lake only fits the big ring; the pond is inside both and goes to the island
+    assert [abs(ring_area(h)) for h in largest[1:]] == [64.0]
+    assert [abs(ring_area(h)) for h in smallest[1:]] == [1.0]
+    assert point_in_ring(4.5, 4.5, smallest[1])
+
+
+def test_simplify_line_keeps_endpoints_and_peaks():
+    line = [[0.0, 0.0], [1.0, 0.01], [2.0, -0.01], [3.0, 5.0], [4.0, 0.0], [5.0, 0.0]]
+    assert simplify_line(line, 0.1) == [[0.0, 0.0], [2.0, -0.01], [3.0, 5.0], [4.0, 0.0], [5.0, 0.0]]
+    assert simplify_line(line, 10.0) == [[0.0, 0.0], [5.0, 0.0]]
+    assert simplify_line(line[:2], 10.0) == line[:2]
+
+
+def test_simplify_multipolygon_keeps_collapsing_shell_drops_hole():
+    shell = square(0.0, 0.0, 10.0, 10.0)
+    # A very flat hole that collapses to a line
+    hole = [[2.0, 2.0], [3.0, 2.0], [3.0, 2.001], [2.0, 2.001], [2.0, 2.0]]
+    simplified = simplify_multipolygon([[shell, hole]], 1.0)
+    assert simplified == [[shell]]
+    # Shell too small for the tolerance keeps its original ring
+    tiny = square(0.0, 0.0, 0.1, 0.1)
+    assert simplify_multipolygon([[tiny]], 1.0) == [[tiny]]
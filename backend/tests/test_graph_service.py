@@ -0,0 +1,91 @@
+"""
+Downstream paging on the Neo4j fallback (topology cache off)
+A fake session answers the expansion, page lookup and version queries
+and records which ones ran.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from app.services import graph_service
+from app.services.graph_service import GraphService, decode_cursor, encode_cursor
+
+DOWNSTREAM = ["bldg-1", "bldg-2", "bldg-3", "xfmr"]
+
+
+class FakeRecord(dict):
+    def data(self):
+        return dict(self)
+
+
+class FakeSession:
+    def __init__(self, log):
+        self.log = log
+
+    def run(self, query, **params):
+        if "shortestPath" in query:
+            self.log.append("page")
+            return [
+                FakeRecord(id=node_id, name=node_id, type="Building", longitude=0.0, latitude=0.0, depth=2)
+                for node_id in params["ids"]
+            ]
+        self.log.append("expand")
+        return [FakeRecord(id=node_id) for node_id in DOWNSTREAM]
+
+
+@pytest.fixture
+def neo4j(monkeypatch):
+    log = []
+    versions = iter(["v1:5:4", "v1:5:4", "v2:6:5"])
+
+    @contextmanager
+    def get_session():
+        yield FakeSession(log)
+
+    def fetch_topology_version(session):
+        log.append("version")
+        return next(versions)
+
+    monkeypatch.setattr(graph_service.topology_cache, "ensure_fresh", lambda: False)
+    monkeypatch.setattr(graph_service.neo4j_driver, "get_session", get_session)
+    monkeypatch.setattr(graph_service, "fetch_topology_version", fetch_topology_version)
+    monkeypatch.setattr(graph_service, "_downstream_ids", graph_service.OrderedDict())
+    return log
+
+
+def page(cursor=None):
+    return GraphService.get_downstream_page("gen", None, None, 2, cursor)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("osm-way-1")) == "osm-way-1"
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+def test_pages_share_one_expansion(neo4j):
+    first, cursor = page()
+    assert [node["id"] for node in first] == ["bldg-1", "bldg-2"]
+    assert all(node["depth"] == 2 for node in first)
+    assert decode_cursor(cursor) == "bldg-2"
+
+    second, cursor = page(cursor)
+    assert [node["id"] for node in second] == ["bldg-3", "xfmr"]
+    assert cursor is None
+    # The version is checked when a first page starts, not per page
+    assert neo4j == ["version", "expand", "page", "page"]
+
+
+def test_first_page_reexpands_only_on_new_version(neo4j):
+    page()
+    page()
+    page()
+    assert neo4j == ["version", "expand", "page", "version", "page", "version", "expand", "page"]
+
+
+def test_bad_cursor(neo4j):
+    with pytest.raises(ValueError):
+        page("bldg-2")
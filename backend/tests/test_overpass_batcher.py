@@ -0,0 +1,143 @@
+"""
+Union-query batching: bbox selection, splitting and grouping
+Elements are selected per region the way an Overpass bbox clause selects
+them - a way counts when any vertex is inside or any segment crosses the
+box - and one element can belong to several regions.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import json
+import asyncio
+
+from app.services.overpass_batcher import (
+    OverpassBatcher,
+    _Pending,
+    _segment_hits_bbox,
+    element_in_bbox,
+    feature_in_bbox,
+    split_elements,
+)
+
+BBOX = (38.90, -94.70, 38.95, -94.65)
+
+SELECTORS = {
+    "transmission": 'way["power"="line"]',
+    "distribution": 'way["power"="minor_line"]',
+    "transformers": 'node["power"="transformer"]',
+}
+ELEMENT_LAYERS = {
+    ("way", "line"): "transmission",
+    ("way", "minor_line"): "distribution",
+    ("node", "transformer"): "transformers",
+}
+ALL_LAYERS = tuple(SELECTORS)
+
+
+def node(lat, lon):
+    return {"lat": lat, "lon": lon}
+
+
+def way(osm_id, points, power="minor_line"):
+    return {"type": "way", "id": osm_id, "tags": {"power": power}, "geometry": [node(*p) for p in points]}
+
+
+def transformer(osm_id, lat, lon):
+    return {"type": "node", "id": osm_id, "lat": lat, "lon": lon, "tags": {"power": "transformer"}}
+
+
+# Straight across the box west to east, both vertices outside
+CROSSING = way(1, [(38.92, -94.75), (38.92, -94.60)])
+# Cuts the north-west corner diagonally
+CORNER = way(2, [(38.96, -94.71), (38.94, -94.69), (38.97, -94.60)])
+# Passes the north-east corner without touching it
+MISSING = way(3, [(38.96, -94.66), (38.94, -94.64)])
+
+
+def test_segment_hits_bbox():
+    assert _segment_hits_bbox(node(38.92, -94.75), node(38.92, -94.60), BBOX)
+    assert _segment_hits_bbox(node(38.80, -94.68), node(39.00, -94.68), BBOX)
+    assert not _segment_hits_bbox(node(38.96, -94.66), node(38.94, -94.64), BBOX)
+    # Parallel to an edge, outside / along it
+    assert not _segment_hits_bbox(node(38.96, -94.75), node(38.96, -94.60), BBOX)
+    assert _segment_hits_bbox(node(38.95, -94.75), node(38.95, -94.60), BBOX)
+    # Degenerate segment (one point) inside and outside
+    assert _segment_hits_bbox(node(38.92, -94.68), node(38.92, -94.68), BBOX)
+    assert not _segment_hits_bbox(node(38.99, -94.68), node(38.99, -94.68), BBOX)
+
+
+def test_element_in_bbox():
+    assert element_in_bbox(CROSSING, BBOX)
+    assert element_in_bbox(CORNER, BBOX)
+    assert not element_in_bbox(MISSING, BBOX)
+    assert element_in_bbox(transformer(4, 38.95, -94.65), BBOX)  # Edges are inclusive
+    assert not element_in_bbox(transformer(5, 38.951, -94.65), BBOX)
+    assert not element_in_bbox({"type": "node", "id": 6}, BBOX)
+
+    # Bounds outside the box reject the way before its geometry is read
+    bounded = dict(CROSSING, bounds={"minlat": 38.96, "maxlat": 38.97, "minlon": -94.75, "maxlon": -94.60})
+    assert not element_in_bbox(bounded, BBOX)
+
+
+def test_feature_in_bbox():
+    def line_feature(points, multi=False):
+        coordinates = [[lon, lat] for lat, lon in points]
+        if multi:
+            return {"geometry": {"type": "MultiLineString", "coordinates": [[[0.0, 0.0], [0.1, 0.0]], coordinates]}}
+        return {"geometry": {"type": "LineString", "coordinates": coordinates}}
+
+    assert feature_in_bbox(line_feature([(38.92, -94.75), (38.92, -94.60)]), BBOX)
+    assert not feature_in_bbox(line_feature([(38.96, -94.66), (38.94, -94.64)]), BBOX)
+    assert feature_in_bbox(line_feature([(38.92, -94.75), (38.92, -94.60)], multi=True), BBOX)
+    assert feature_in_bbox({"geometry": {"type": "Point", "coordinates": [-94.68, 38.92]}}, BBOX)
+    assert not feature_in_bbox({"geometry": {"type": "Point", "coordinates": [-94.60, 38.92]}}, BBOX)
+
+
+def test_split_shared_element():
+    east = (38.90, -94.65, 38.95, -94.60)
+    elements = [CROSSING, MISSING, transformer(4, 38.92, -94.68), way(7, [(38.92, -94.64), (38.93, -94.63)], "line")]
+    regions = [(BBOX, ALL_LAYERS), (east, ("distribution", "transmission"))]
+    west_split, east_split = split_elements(json.dumps({"elements": elements}), regions, ELEMENT_LAYERS)
+
+    assert [e["id"] for e in west_split["elements"]] == [1, 4]
+    # The crossing way is in both regions; the east region didn't ask for transformers
+    assert [e["id"] for e in east_split["elements"]] == [1, 3, 7]
+
+
+def test_group_by_span_and_count():
+    async def group(bboxes, **limits):
+        batcher = OverpassBatcher(None, SELECTORS, ELEMENT_LAYERS, None, **limits)
+        pending = [_Pending(bbox, ALL_LAYERS) for bbox in bboxes]
+        return [[pending.index(p) for p in batch] for batch in batcher._group(pending)]
+
+    tile = 0.05
+    row = [(38.90, -94.70 + i * tile, 38.95, -94.65 + i * tile) for i in range(4)]
+    far = (39.50, -94.70, 39.55, -94.65)
+
+    # Four adjacent tiles span 0.2 degrees - one batch; the far tile gets its own
+    assert asyncio.run(group(row + [far], max_span=0.3)) == [[0, 1, 2, 3], [4]]
+    # A span of about two tiles splits the row
+    assert asyncio.run(group(row, max_span=0.11)) == [[0, 1], [2, 3]]
+    assert asyncio.run(group(row, max_regions=3)) == [[0, 1, 2], [3]]
+
+
+def test_concurrent_fetches_share_one_query():
+    queries = []
+    east = (38.90, -94.65, 38.95, -94.60)
+
+    async def query(text, raw=False):
+        queries.append(text)
+        return json.dumps({"elements": [CROSSING, transformer(4, 38.92, -94.68)]}).encode()
+
+    async def split(func, *args):
+        return func(*args)
+
+    async def run():
+        batcher = OverpassBatcher(query, SELECTORS, ELEMENT_LAYERS, split, window=0.01)
+        return await asyncio.gather(batcher.fetch(BBOX, list(ALL_LAYERS)), batcher.fetch(east, ["distribution"]))
+
+    west_result, east_result = asyncio.run(run())
+    assert len(queries) == 1
+    assert queries[0].count("(38.9,-94.7,38.95,-94.65);") == 3
+    assert [e["id"] for e in west_result["elements"]] == [1, 4]
+    assert [e["id"] for e in east_result["elements"]] == [1]
@@ -0,0 +1,202 @@
+"""
+Overpass request budget: status/Retry-After parsing, token buckets and
+mirror acquisition against a deadline
+Time is a fake clock that asyncio.sleep (as seen by the limiter) advances,
+so waits are checked exactly and the tests don't sleep.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import asyncio
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.services import overpass_limiter
+from app.services.overpass_limiter import (
+    DEFAULT_THROTTLE_SECONDS,
+    OverpassBusyError,
+    OverpassLimiter,
+    TokenBucket,
+    is_throttled,
+    parse_retry_after,
+    parse_status,
+    status_url,
+)
+
+STATUS_FREE = """Connected as: 1681125513
+Current time: 2024-05-02T10:15:02Z
+Announced endpoint: gall.openstreetmap.de/
+Rate limit: 2
+2 slots available now.
+Currently running queries (pid, space limit, time limit, start time):
+"""
+
+STATUS_BUSY = """Connected as: 1681125513
+Current time: 2024-05-02T10:15:02Z
+Announced endpoint: gall.openstreetmap.de/
+Rate limit: 2
+Slot available after: 2024-05-02T10:15:43Z, in 41 seconds.
+Slot available after: 2024-05-02T10:15:16Z, in 14 seconds.
+Currently running queries (pid, space limit, time limit, start time):
+"""
+
+STATUS_ONE_FREE = """Rate limit: 2
+1 slot available now.
+Slot available after: 2024-05-02T10:15:16Z, in 14 seconds.
+"""
+
+STATUS_OVERDUE = """Rate limit: 2
+0 slots available now.
+Slot available after: 2024-05-02T10:15:00Z, in -2 seconds.
+"""
+
+INTERPRETER = "https://overpass.example/api/interpreter"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(overpass_limiter, "time", SimpleNamespace(monotonic=clock.monotonic, time=time.time))
+    monkeypatch.setattr(overpass_limiter, "asyncio", SimpleNamespace(
+        sleep=clock.sleep, Semaphore=asyncio.Semaphore, wait_for=asyncio.wait_for, TimeoutError=asyncio.TimeoutError,
+    ))
+    return clock
+
+
+def test_parse_status():
+    assert parse_status(STATUS_FREE) == 0.0
+    assert parse_status(STATUS_BUSY) == 14.0
+    assert parse_status(STATUS_ONE_FREE) == 0.0
+    assert parse_status(STATUS_OVERDUE) == 0.0
+    assert parse_status("<html>Service unavailable</html>") is None
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("30") == 30.0
+    assert parse_retry_after(" 5 ") == 5.0
+    assert parse_retry_after(formatdate(time.time() + 60, usegmt=True)) == pytest.approx(60, abs=2)
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_is_throttled():
+    assert is_throttled(httpx.Response(429))
+    assert is_throttled(httpx.Response(504, text="runtime error: ... rate_limited ..."))
+    assert not is_throttled(httpx.Response(504, text="Gateway timeout"))
+    assert not is_throttled(httpx.Response(200, text="rate_limited"))
+    assert status_url(INTERPRETER) == "https://overpass.example/api/status"
+
+
+def test_token_bucket_reservations(clock):
+    bucket = TokenBucket(rate=0.5, capacity=2)
+    # The burst is free, then reservations queue up at the sustained rate
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 2.0, 4.0]
+    assert bucket.delay() == 6.0
+
+    clock.now += 3
+    assert bucket.delay() == 3.0
+    clock.now += 100
+    # Refills up to capacity only
+    assert bucket.delay() == 0.0
+    assert bucket.tokens == 2
+
+
+def test_acquire_waits_for_tokens(clock):
+    limiter = OverpassLimiter([INTERPRETER], rate=0.5, burst=1, max_wait=30)
+
+    async def run():
+        return [await limiter.acquire(INTERPRETER, clock.now + 30) for _ in range(3)]
+
+    assert asyncio.run(run()) == [True, True, True]
+    assert clock.sleeps == [2.0, 2.0]
+    assert limiter.mirrors[INTERPRETER].requests == 3
+
+
+def test_acquire_gives_up_past_deadline(clock):
+    limiter = OverpassLimiter([INTERPRETER], rate=0.5, burst=1)
+    mirror = limiter.mirrors[INTERPRETER]
+
+    async def run(deadline):
+        return await limiter.acquire(INTERPRETER, deadline)
+
+    assert asyncio.run(run(clock.now))
+    # The next token is 2s away
+    assert not asyncio.run(run(clock.now + 1))
+    assert clock.sleeps == [] and mirror.bucket.tokens == 0.0
+
+    mirror.block(20)
+    assert not asyncio.run(run(clock.now + 10))
+    assert asyncio.run(run(clock.now + 25))
+    # Block lapsed first; the token had refilled by then
+    assert clock.sleeps == [20.0]
+
+
+def test_throttled_uses_retry_after_then_status(clock):
+    limiter = OverpassLimiter([INTERPRETER])
+    statuses = []
+
+    def handler(request):
+        statuses.append(str(request.url))
+        return httpx.Response(200, text=STATUS_BUSY)
+
+    async def run(response):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await limiter.throttled(INTERPRETER, response, client)
+
+    assert asyncio.run(run(httpx.Response(429, headers={"Retry-After": "7"}))) == 7.0
+    assert statuses == []
+    assert asyncio.run(run(httpx.Response(429))) == 14.0
+    assert statuses == ["https://overpass.example/api/status"]
+    assert limiter.mirrors[INTERPRETER].blocked_until == clock.now + 14.0
+    assert limiter.mirrors[INTERPRETER].throttled == 2
+
+
+def test_throttled_default_when_status_is_free(clock):
+    limiter = OverpassLimiter([INTERPRETER])
+
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, text=STATUS_FREE))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await limiter.throttled(INTERPRETER, httpx.Response(429), client)
+
+    assert asyncio.run(run()) == DEFAULT_THROTTLE_SECONDS
+
+
+def test_mirror_order_prefers_ready_mirrors(clock):
+    second = "https://other.example/api/interpreter"
+    limiter = OverpassLimiter([INTERPRETER, second])
+    assert limiter.mirror_order() == [INTERPRETER, second]
+    limiter.mirrors[INTERPRETER].block(30)
+    assert limiter.mirror_order() == [second, INTERPRETER]
+
+
+def test_slot_times_out():
+    limiter = OverpassLimiter([INTERPRETER], max_concurrency=1, max_wait=0.01)
+
+    async def run():
+        async with limiter.slot():
+            with pytest.raises(OverpassBusyError):
+                async with limiter.slot():
+                    pass
+            assert limiter.in_flight == 1
+        assert limiter.in_flight == 0 and limiter.queued == 0
+
+    asyncio.run(run())
@@ -0,0 +1,303 @@
+"""
+Round-trip tests for the bulk export encoders
+The FlatGeobuf file is parsed back by hand (header, packed Hilbert R-tree,
+features) so the test needs nothing beyond the standard library; GDAL
+(pyogrio) and pyarrow reads run too when those packages are installed and
+are skipped otherwise (pip install -r requirements-export.txt).
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import json
+import struct
+import asyncio
+
+import pytest
+
+from app.services.overpass_service import build_power_result
+from app.services.power_export import (
+    _FGB_INDEX_NODE_SIZE,
+    _FGB_MAGIC,
+    PowerExport,
+    _Dataset,
+)
+from benchmarks.fixtures import load_fixture
+
+
+@pytest.fixture(scope="module")
+def features():
+    """Small fixture view, plus a clipped MultiLineString and a bool property"""
+    body, _ = load_fixture("small")
+    features = json.loads(json.dumps(build_power_result(body)["geojson"]["features"]))
+    features.append({
+        "type": "Feature",
+        "geometry": {"type": "MultiLineString", "coordinates": [
+            [[-94.70, 38.93], [-94.69, 38.94]],
+            [[-94.68, 38.94], [-94.67, 38.95], [-94.66, 38.95]],
+        ]},
+        "properties": {"power": "minor_line", "osm_id": 1, "length_km": 3.2, "clipped": True},
+    })
+    return features
+
+
+def export(features, export_format):
+    """Whole encoded file of an export of these features"""
+    dataset = _Dataset(len(features), features.__getitem__)
+    if export_format != "ndjson":
+        dataset.scan()
+
+    async def collect():
+        return b"".join([chunk async for chunk in PowerExport(export_format, dataset, None).chunks()])
+
+    return asyncio.run(collect())
+
+
+def bounds(feature):
+    geometry = feature["geometry"]
+    if geometry["type"] == "Point":
+        coordinates = [geometry["coordinates"]]
+    elif geometry["type"] == "LineString":
+        coordinates = geometry["coordinates"]
+    else:
+        coordinates = [c for line in geometry["coordinates"] for c in line]
+    return (
+        min(c[0] for c in coordinates), min(c[1] for c in coordinates),
+        max(c[0] for c in coordinates), max(c[1] for c in coordinates),
+    )
+
+
+class _Table:
+    """Minimal FlatBuffers table reader"""
+
+    def __init__(self, buf, position):
+        self.buf = buf
+        self.position = position
+        vtable = position - struct.unpack_from("<i", buf, position)[0]
+        vtable_size = struct.unpack_from("<H", buf, vtable)[0]
+        self.offsets = [
+            struct.unpack_from("<H", buf, vtable + 4 + 2 * i)[0] for i in range((vtable_size - 4) // 2)
+        ]
+
+    def _field(self, index):
+        offset = self.offsets[index] if index < len(self.offsets) else 0
+        return self.position + offset if offset else None
+
+    def scalar(self, index, fmt, default=0):
+        field = self._field(index)
+        return struct.unpack_from(fmt, self.buf, field)[0] if field is not None else default
+
+    def _indirect(self, index):
+        field = self._field(index)
+        return field + struct.unpack_from("<I", self.buf, field)[0] if field is not None else None
+
+    def table(self, index):
+        position = self._indirect(index)
+        return _Table(self.buf, position) if position is not None else None
+
+    def vector(self, index, fmt):
+        position = self._indirect(index)
+        if position is None:
+            return []
+        length = struct.unpack_from("<I", self.buf, position)[0]
+        return list(struct.unpack_from(f"<{length}{fmt}", self.buf, position + 4))
+
+    def tables(self, index):
+        position = self._indirect(index)
+        length = struct.unpack_from("<I", self.buf, position)[0]
+        elements = [position + 4 + 4 * i for i in range(length)]
+        return [_Table(self.buf, e + struct.unpack_from("<I", self.buf, e)[0]) for e in elements]
+
+    def string(self, index):
+        return bytes(self.vector(index, "B")).decode("utf-8")
+
+
+def _size_prefixed(buf, position):
+    """Root table of a size-prefixed FlatBuffer and the position after it"""
+    size = struct.unpack_from("<I", buf, position)[0]
+    root = position + 4
+    return _Table(buf, root + struct.unpack_from("<I", buf, root)[0]), root + size
+
+
+def _tree_levels(count):
+    """(start, count) of each R-tree level from the leaves up, as FlatGeobuf readers lay it out"""
+    level_counts = [count]
+    n = count
+    while True:
+        n = -(-n // _FGB_INDEX_NODE_SIZE)
+        level_counts.append(n)
+        if n == 1:
+            break
+    start, levels = sum(level_counts), []
+    for level_count in level_counts:
+        start -= level_count
+        levels.append((start, level_count))
+    return levels
+
+
+def read_flatgeobuf(data):
+    """Header, R-tree nodes and features of a FlatGeobuf file"""
+    assert data[:8] == _FGB_MAGIC
+    header, position = _size_prefixed(data, 8)
+    count = header.scalar(8, "<Q")
+    node_size = header.scalar(9, "<H")
+    columns = [(column.string(0), column.scalar(1, "<B")) for column in header.tables(7)]
+
+    levels = _tree_levels(count)
+    node_count = levels[0][0] + levels[0][1]
+    nodes = [struct.unpack_from("<4dQ", data, position + 40 * i) for i in range(node_count)]
+    features_start = position + 40 * node_count
+
+    features = {}
+    position = features_start
+    while position < len(data):
+        feature, end = _size_prefixed(data, position)
+        geometry = feature.table(0)
+        properties, raw, i = {}, bytes(feature.vector(1, "B")), 0
+        while i < len(raw):
+            name, column_type = columns[struct.unpack_from("<H", raw, i)[0]]
+            i += 2
+            if column_type == 2:
+                properties[name], i = bool(raw[i]), i + 1
+            elif column_type == 7:
+                properties[name], i = struct.unpack_from("<q", raw, i)[0], i + 8
+            elif column_type == 10:
+                properties[name], i = struct.unpack_from("<d", raw, i)[0], i + 8
+            else:
+                length = struct.unpack_from("<I", raw, i)[0]
+                properties[name], i = raw[i + 4:i + 4 + length].decode("utf-8"), i + 4 + length
+        features[position - features_start] = {
+            "type": geometry.scalar(6, "<B"),
+            "xy": geometry.vector(1, "d"),
+            "ends": geometry.vector(0, "I"),
+            "properties": properties,
+        }
+        position = end
+    return {"header": header, "count": count, "node_size": node_size, "levels": levels,
+            "nodes": nodes, "features": features}
+
+
+def search(fgb, bbox):
+    """Feature offsets whose R-tree boxes intersect bbox, walking from the root"""
+    min_x, min_y, max_x, max_y = bbox
+    nodes, levels = fgb["nodes"], fgb["levels"]
+    leaf_start = levels[0][0]
+    hits, stack = [], [(0, len(levels) - 1)]
+    while stack:
+        node, level = stack.pop()
+        end = min(node + fgb["node_size"], levels[level][0] + levels[level][1])
+        for i in range(node, end):
+            x0, y0, x1, y1, offset = nodes[i]
+            if x1 < min_x or x0 > max_x or y1 < min_y or y0 > max_y:
+                continue
+            if i >= leaf_start:
+                hits.append(offset)
+            else:
+                stack.append((offset, level - 1))
+    return hits
+
+
+def test_ndjson_round_trip(features):
+    lines = export(features, "ndjson").decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == features
+
+
+def test_flatgeobuf_header(features):
+    fgb = read_flatgeobuf(export(features, "flatgeobuf"))
+    assert fgb["count"] == len(features)
+    assert fgb["node_size"] == _FGB_INDEX_NODE_SIZE
+    assert fgb["header"].table(10).scalar(1, "<i") == 4326
+    envelope = fgb["header"].vector(1, "d")
+    assert envelope == [
+        min(b[0] for b in map(bounds, features)), min(b[1] for b in map(bounds, features)),
+        max(b[2] for b in map(bounds, features)), max(b[3] for b in map(bounds, features)),
+    ]
+    # The root box covers everything
+    assert list(fgb["nodes"][0][:4]) == envelope
+
+
+def test_flatgeobuf_features_round_trip(features):
+    fgb = read_flatgeobuf(export(features, "flatgeobuf"))
+    assert len(fgb["features"]) == len(features)
+
+    by_id = {(f["geometry"]["type"] == "Point", f["properties"]["osm_id"]): f for f in features}
+    for decoded in fgb["features"].values():
+        original = by_id[(decoded["type"] == 1, decoded["properties"]["osm_id"])]
+        geometry = original["geometry"]
+        if geometry["type"] == "Point":
+            assert decoded["xy"] == geometry["coordinates"][:2]
+        elif geometry["type"] == "LineString":
+            assert decoded["xy"] == [o for c in geometry["coordinates"] for o in c[:2]]
+        else:
+            assert decoded["xy"] == [o for line in geometry["coordinates"] for c in line for o in c[:2]]
+            assert decoded["ends"] == [2, 5]
+        expected = {
+            k: (v if isinstance(v, (bool, int, float, str)) else json.dumps(v))
+            for k, v in original["properties"].items() if v is not None
+        }
+        assert decoded["properties"] == expected
+
+
+def test_flatgeobuf_index(features):
+    fgb = read_flatgeobuf(export(features, "flatgeobuf"))
+    leaf_start, leaf_count = fgb["levels"][0]
+    leaves = fgb["nodes"][leaf_start:leaf_start + leaf_count]
+
+    # Every leaf points at the start of a feature whose bounds it holds
+    assert sorted(leaf[4] for leaf in leaves) == sorted(fgb["features"])
+    by_id = {(f["geometry"]["type"] == "Point", f["properties"]["osm_id"]): f for f in features}
+    for *box, offset in leaves:
+        decoded = fgb["features"][offset]
+        original = by_id[(decoded["type"] == 1, decoded["properties"]["osm_id"])]
+        assert tuple(box) == bounds(original)
+
+    # Inner nodes bound their children
+    for level in range(1, len(fgb["levels"])):
+        start, count = fgb["levels"][level]
+        child_start, child_count = fgb["levels"][level - 1]
+        for parent in fgb["nodes"][start:start + count]:
+            children = fgb["nodes"][parent[4]:min(parent[4] + fgb["node_size"], child_start + child_count)]
+            assert parent[0] == min(c[0] for c in children) and parent[1] == min(c[1] for c in children)
+            assert parent[2] == max(c[2] for c in children) and parent[3] == max(c[3] for c in children)
+
+
+def test_flatgeobuf_bbox_search(features):
+    fgb = read_flatgeobuf(export(features, "flatgeobuf"))
+    envelope = fgb["header"].vector(1, "d")
+    mid_x, mid_y = (envelope[0] + envelope[2]) / 2, (envelope[1] + envelope[3]) / 2
+    query = (envelope[0], envelope[1], mid_x, mid_y)
+
+    expected = sorted(
+        (f["geometry"]["type"] == "Point", f["properties"]["osm_id"])
+        for f in features
+        if not (bounds(f)[2] < query[0] or bounds(f)[0] > query[2] or bounds(f)[3] < query[1] or bounds(f)[1] > query[3])
+    )
+    found = sorted(
+        (fgb["features"][offset]["type"] == 1, fgb["features"][offset]["properties"]["osm_id"])
+        for offset in search(fgb, query)
+    )
+    assert found and found == expected
+
+
+def test_flatgeobuf_gdal_read(features, tmp_path):
+    pyogrio = pytest.importorskip("pyogrio")
+    path = tmp_path / "power.fgb"
+    path.write_bytes(export(features, "flatgeobuf"))
+
+    info = pyogrio.read_info(path)
+    assert info["features"] == len(features)
+    envelope = [min(b[0] for b in map(bounds, features)), min(b[1] for b in map(bounds, features))]
+    query = (envelope[0], envelope[1], envelope[0] + 0.02, envelope[1] + 0.02)
+    _, _, geometry, _ = pyogrio.raw.read(path, bbox=query)
+    assert 0 < len(geometry) == len(search(read_flatgeobuf(path.read_bytes()), query))
+
+
+def test_geoparquet_round_trip(features):
+    pytest.importorskip("pyarrow")
+    import io
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(io.BytesIO(export(features, "geoparquet")))
+    assert table.num_rows == len(features)
+    geo = json.loads(table.schema.metadata[b"geo"])
+    assert geo["primary_column"] == "geometry"
+    assert sorted(table.column("osm_id").to_pylist()) == sorted(f["properties"]["osm_id"] for f in features)
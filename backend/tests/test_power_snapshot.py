@@ -0,0 +1,139 @@
+"""
+Power snapshot files: write, reopen and query
+Sub-view queries must select the same features, in the same order, with
+the same stats as build_power_result over what Overpass returns for
+that view.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import json
+import random
+
+import pytest
+
+from app.services.overpass_batcher import element_in_bbox
+from app.services.overpass_service import build_power_result
+from app.services.power_snapshot import (
+    _PREFIX,
+    PowerSnapshotStore,
+    _layout_header,
+    _Snapshot,
+    write_snapshot,
+)
+
+BBOX = (38.90, -94.72, 38.98, -94.62)
+SUB_VIEWS = [
+    (38.93, -94.70, 38.95, -94.67),
+    (38.90, -94.72, 38.91, -94.71),
+    (38.955, -94.655, 38.975, -94.625),
+    # A thin strip - lines crossing it have no vertex inside
+    (38.9412, -94.72, 38.9413, -94.62),
+]
+
+
+def elements(count=400, seed=7):
+    """Overpass-shaped elements inside BBOX: transformers, lines and ways crossing cell edges"""
+    rng = random.Random(seed)
+    south, west, north, east = BBOX
+    result = []
+    for i in range(count):
+        lat, lon = rng.uniform(south, north), rng.uniform(west, east)
+        if i % 3 == 0:
+            result.append({
+                "type": "node", "id": i, "lat": lat, "lon": lon,
+                "tags": {"power": "transformer", "voltage": rng.choice(["7200", "12470", ""])},
+            })
+            continue
+        geometry = []
+        for _ in range(rng.randint(2, 6)):
+            geometry.append({"lat": min(north, max(south, lat)), "lon": min(east, max(west, lon))})
+            lat += rng.uniform(-0.01, 0.01)
+            lon += rng.uniform(-0.01, 0.01)
+        power = "line" if i % 10 == 1 else "minor_line"
+        tags = {"power": power, "operator": "Evergy", "name": f"Línea {i}"}
+        if power == "line":
+            tags["voltage"] = "161000;69000"
+        result.append({"type": "way", "id": i, "geometry": geometry, "tags": tags})
+    return result
+
+
+@pytest.fixture(scope="module")
+def source():
+    return elements()
+
+
+@pytest.fixture
+def store(source, tmp_path):
+    path = str(tmp_path / "power.snap")
+    write_snapshot(path, build_power_result({"elements": source}), BBOX)
+    return PowerSnapshotStore(path, max_age=0)
+
+
+def test_full_view_round_trip(source, store):
+    expected = build_power_result({"elements": source})
+    result = store.query(BBOX)
+    assert result["geojson"]["features"] == expected["geojson"]["features"]
+    assert result["stats"] == expected["stats"]
+    assert json.dumps(result) == json.dumps(expected)
+
+
+@pytest.mark.parametrize("view", SUB_VIEWS)
+def test_sub_view_matches_build_power_result(source, store, view):
+    expected = build_power_result({"elements": [e for e in source if element_in_bbox(e, view)]})
+    snapshot = store.current()
+    # The grid only narrows the search - every real match is a candidate
+    candidates = set(snapshot.candidates(view))
+    assert all(i in candidates for i in range(snapshot.header["features"]) if snapshot.matches(i, view))
+
+    result = store.query(view)
+    assert result["geojson"]["features"] == expected["geojson"]["features"]
+    assert result["stats"] == expected["stats"]
+
+
+def test_power_filter(source, store):
+    view = SUB_VIEWS[0]
+    wanted = [e for e in source if element_in_bbox(e, view) and e["tags"]["power"] == "transformer"]
+    result = store.query(view, powers=["transformer"])
+    assert result["geojson"]["features"] == build_power_result({"elements": wanted})["geojson"]["features"]
+
+
+def test_uncovered_view(store):
+    assert store.query((38.85, -94.72, 38.95, -94.67)) is None
+    assert not store.covers((38.85, -94.72, 38.95, -94.67))
+    assert PowerSnapshotStore("").query(BBOX) is None
+
+
+def test_replaced_file_is_reopened(source, store):
+    first = store.current()
+    write_snapshot(store.path, build_power_result({"elements": source[:30]}), BBOX)
+    assert store.current() is not first
+    assert store.current().header["features"] == 30
+
+
+def test_expired_snapshot_unused(store):
+    assert store.current() is not None
+    store.max_age = 1
+    store.current().header["built_at"] -= 10
+    assert store.query(BBOX) is None
+
+
+def test_header_outgrowing_its_reserve():
+    header = {"version": 1, "stats": {}, "sections": {}}
+    sections = [("a", 3, 8), ("b", 10 ** 9, 1), ("c", 5, 4)]
+    # No room reserved for the offset digits - the data start has to move out
+    encoded = _layout_header(header, sections, reserve=0)
+    data_start = _PREFIX.size + len(encoded)
+    assert data_start % 8 == 0
+    decoded = json.loads(encoded)
+    assert decoded["sections"]["a"] == [data_start, 3]
+    assert decoded["sections"]["b"] == [data_start + 24, 10 ** 9]
+    assert decoded["sections"]["c"] == [data_start + 24 + 10 ** 9, 5]
+
+
+def test_bad_magic(tmp_path):
+    path = tmp_path / "bad.snap"
+    path.write_bytes(_PREFIX.pack(b"NOTASNAP", 0))
+    with pytest.raises(ValueError):
+        _Snapshot(str(path))
+    assert PowerSnapshotStore(str(path)).current() is None
@@ -0,0 +1,119 @@
+"""
+Tiled power streaming: tile grid, de-duplication across tiles and stats
+The stream is fed from a fake get_power_infrastructure that answers each
+tile with the features an Overpass bbox query would select; its final
+stats must match what /power builds for the same view.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import json
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from geojson import FeatureCollection
+
+from app.api.overland_park import _parse_bbox
+from app.services import power_stream
+from app.services.overpass_batcher import feature_in_bbox
+from app.services.overpass_service import build_power_result
+from app.services.power_stream import POWER_STREAM_MAX_TILES, stream_power, tiles_for
+
+VIEW = (38.93, -94.68, 38.98, -94.63)
+
+
+def way(osm_id, points, power="minor_line", voltage="12470"):
+    return {
+        "type": "way",
+        "id": osm_id,
+        "tags": {"power": power, "voltage": voltage},
+        "geometry": [{"lat": lat, "lon": lon} for lat, lon in points],
+    }
+
+
+def transformer(osm_id, lat, lon):
+    return {"type": "node", "id": osm_id, "lat": lat, "lon": lon, "tags": {"power": "transformer", "voltage": "7200"}}
+
+
+IN_VIEW = [
+    # Crosses three of the four tiles
+    way(1, [(38.94, -94.67), (38.96, -94.64)], power="line", voltage="161000"),
+    way(2, [(38.935, -94.675), (38.94, -94.68)]),
+    transformer(3, 38.97, -94.66),
+    # Leaves the view
+    way(4, [(38.975, -94.635), (38.99, -94.61)]),
+]
+# Inside a tile, outside the view
+OUTSIDE = [transformer(5, 38.99, -94.61), way(6, [(38.91, -94.69), (38.92, -94.69)], voltage="345000")]
+
+
+def test_tiles_for_grid():
+    tiles = tiles_for(VIEW)
+    assert len(tiles) == 4
+    # Nearest to the view's center first, edges on the 0.05 degree grid
+    assert tiles[0] == (38.95, -94.7, 39.0, -94.65)
+    assert set(tiles) == {
+        (38.9, -94.7, 38.95, -94.65), (38.9, -94.65, 38.95, -94.6),
+        (38.95, -94.7, 39.0, -94.65), (38.95, -94.65, 39.0, -94.6),
+    }
+    # Neighbouring views share tiles
+    assert tiles_for((38.951, -94.699, 38.952, -94.698)) == [tiles[0]]
+
+
+def test_tiles_for_limit():
+    with pytest.raises(ValueError):
+        tiles_for((38.5, -95.0, 39.0, -94.5))
+    assert len(tiles_for((38.81, -94.79, 39.19, -94.41))) == POWER_STREAM_MAX_TILES  # 8 x 8
+
+
+def test_parse_bbox():
+    assert _parse_bbox("38.93,-94.68,38.98,-94.63") == VIEW
+    for bad in ("38.93,-94.68,38.98", "38.98,-94.68,38.93,-94.63", "a,b,c,d", "38.0,-95.0,39.0,-94.0"):
+        with pytest.raises(HTTPException) as excinfo:
+            _parse_bbox(bad)
+        assert excinfo.value.status_code == 400
+
+
+def run_stream(monkeypatch, cached_tiles):
+    full = build_power_result({"elements": IN_VIEW + OUTSIDE})
+    fetched = []
+
+    async def fake_power(tile, clip=None):
+        fetched.append(tile)
+        features = [f for f in full["geojson"]["features"] if feature_in_bbox(f, tile)]
+        return {"geojson": FeatureCollection(features), "stats": {}}
+
+    monkeypatch.setattr(power_stream, "get_power_infrastructure", fake_power)
+    monkeypatch.setattr(power_stream, "is_power_cached", lambda tile: tile in cached_tiles)
+
+    async def collect():
+        return [message async for message in stream_power(VIEW)]
+
+    events = []
+    for message in asyncio.run(collect()):
+        event, data = message.strip().split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events, fetched
+
+
+def test_stream_sends_each_feature_once(monkeypatch):
+    tiles = tiles_for(VIEW)
+    events, fetched = run_stream(monkeypatch, {tiles[2]})
+    assert sorted(fetched) == sorted(tiles)
+    assert events[0] == ("start", {"bbox": list(VIEW), "tiles": 4, "cached": 1})
+
+    tile_events = [data for event, data in events if event == "tile"]
+    assert len(tile_events) == 4
+    assert tile_events[0]["cached"] and tile_events[0]["tile"] == list(tiles[2])
+    sent = [f["properties"]["osm_id"] for data in tile_events for f in data["geojson"]["features"]]
+    assert sorted(sent) == [1, 2, 3, 4]
+    assert [data["progress"]["done"] for data in tile_events] == [1, 2, 3, 4]
+
+
+def test_stream_stats_match_power(monkeypatch):
+    events, _ = run_stream(monkeypatch, set())
+    event, final = events[-1]
+    assert event == "stats"
+    assert final["features"] == 4 and final["failed"] == 0
+    assert final["stats"] == build_power_result({"elements": IN_VIEW})["stats"]
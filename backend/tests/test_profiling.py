@@ -0,0 +1,77 @@
+"""
+Request profiling: which threads a profile samples
+Only the thread that opened the profile and threads doing work for that
+request are sampled; other busy threads in the process are left out.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import asyncio
+import threading
+import time
+
+from app.services.executor import run_in_thread
+from app.services.profiling import RequestProfile, profiling_active, sampled_thread
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def other_request(stop):
+    while not stop.is_set():
+        spin(0.001)
+
+
+def sampled_functions(profile):
+    profiles = profile.profiler.to_speedscope(profile.name)
+    frames = profiles["shared"]["frames"]
+    return {
+        p["name"]: {frames[i]["name"] for sample in p["samples"] for i in sample}
+        for p in profiles["profiles"]
+    }
+
+
+def test_unrelated_threads_not_sampled():
+    stop = threading.Event()
+    bystander = threading.Thread(target=other_request, args=(stop,), name="bystander")
+    bystander.start()
+
+    async def request():
+        with RequestProfile("GET /test") as profile:
+            assert profiling_active()
+            spin(0.05)
+            await run_in_thread(spin, 0.05)
+        return profile
+
+    try:
+        profile = asyncio.run(request())
+    finally:
+        stop.set()
+        bystander.join()
+
+    functions = sampled_functions(profile)
+    assert "bystander" not in functions
+    assert "spin" in functions[threading.current_thread().name]
+    executor_threads = [name for name in functions if name.startswith("cpu-local")]
+    assert executor_threads and all("spin" in functions[name] for name in executor_threads)
+    assert not profiling_active()
+
+
+def test_sampled_thread_outside_a_profile():
+    with sampled_thread():
+        assert not profiling_active()
+
+
+def test_nested_registration():
+    profile = RequestProfile("GET /nested")
+    sampler = profile.profiler
+    with profile:
+        with sampled_thread():
+            with sampled_thread():
+                pass
+            assert threading.get_ident() in sampler._threads
+        assert threading.get_ident() in sampler._threads
+    assert sampler._threads == {}
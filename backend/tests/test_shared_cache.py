@@ -0,0 +1,135 @@
+"""
+Cross-worker shared cache: round trips, ring overwrites and fill claims
+Each test maps its own 1 MB cache file under tmp_path. Other workers are
+simulated by writing their pid into a slot.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import os
+import time
+import asyncio
+
+import pytest
+
+pytest.importorskip("fcntl")
+
+from app.services.shared_cache import _FILLING, _READY, SharedCache, _digest
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedCache(str(tmp_path / "cache"), size_mb=1)
+
+
+def incompressible(size):
+    """JSON value whose compressed payload is roughly size bytes (hex compresses about 2:1)"""
+    return os.urandom(size).hex()
+
+
+def slot_of(cache, key):
+    return cache._read_slot(cache._find(_digest(key)))
+
+
+def test_round_trip(cache):
+    value = {"geojson": {"features": [{"id": 1}]}, "stats": {"transformer_count": 3}}
+    assert cache.put("power:a", value, created_at=123.0)
+    assert cache.get("power:a") == (value, 123.0)
+    assert cache.created_at("power:a") == 123.0
+    assert cache.get("power:missing") is None
+    assert cache.info()["entries"] == 1
+
+
+def test_reopen_keeps_entries(cache, tmp_path):
+    cache.put("power:a", [1, 2, 3], created_at=5.0)
+    assert SharedCache(str(tmp_path / "cache"), size_mb=1).get("power:a") == ([1, 2, 3], 5.0)
+
+
+def test_replacing_a_key(cache):
+    cache.put("power:a", "old")
+    cache.put("power:a", "new")
+    assert cache.get("power:a")[0] == "new"
+    assert cache.info()["entries"] == 1
+
+
+def test_ring_overwrite_invalidates(cache):
+    # The first two take ~45% of the ring each; the third doesn't fit behind them,
+    # wraps, and is short enough to overwrite only the first
+    first, second, third = incompressible(400_000), incompressible(400_000), incompressible(300_000)
+    assert cache.put("power:1", first)
+    assert cache.put("power:2", second)
+    assert cache.get("power:1")[0] == first
+
+    assert cache.put("power:3", third)
+    assert cache.get("power:1") is None
+    assert cache.created_at("power:1") is None
+    assert cache.get("power:2")[0] == second
+    assert cache.get("power:3")[0] == third
+    assert cache.info()["entries"] == 2
+
+
+def test_too_large_payload(cache):
+    assert not cache.put("power:huge", incompressible(3 * 1024 * 1024))
+    assert cache.get("power:huge") is None
+
+
+def test_claim_and_release(cache):
+    assert cache.claim("power:a")
+    assert slot_of(cache, "power:a")[1] == _FILLING
+    # Claims are per worker - this one may claim again
+    assert cache.claim("power:a")
+    assert cache.get("power:a") is None
+
+    cache.release("power:a")
+    assert cache._find(_digest("power:a")) is None
+
+    assert cache.claim("power:a")
+    cache.put("power:a", "filled")
+    slot = slot_of(cache, "power:a")
+    assert slot[1] == _READY and slot[6] == 0
+    assert cache.get("power:a")[0] == "filled"
+
+
+def test_claim_held_by_other_worker(cache):
+    cache.claim("power:a")
+    index = cache._find(_digest("power:a"))
+    slot = cache._read_slot(index)
+    # A live process that isn't this one
+    cache._write_slot(index, *slot[:6], os.getppid(), time.time())
+
+    assert not cache.claim("power:a")
+    # Not ours to release
+    cache.release("power:a")
+    assert slot_of(cache, "power:a")[1] == _FILLING
+
+    # Abandoned claim (its worker died) - taken over
+    cache._write_slot(index, *slot[:6], 2 ** 31 - 1, time.time())
+    assert cache.claim("power:a")
+    assert slot_of(cache, "power:a")[6] == os.getpid()
+
+
+def test_stale_entry_refresh_keeps_data_readable(cache):
+    cache.put("power:a", "stale", created_at=1.0)
+    assert cache.claim("power:a")
+    assert cache.get("power:a") == ("stale", 1.0)
+    cache.release("power:a")
+    assert cache.get("power:a") == ("stale", 1.0)
+    assert slot_of(cache, "power:a")[6] == 0
+
+
+def test_get_or_fill(cache):
+    calls = []
+
+    async def fill():
+        calls.append(1)
+        return {"n": len(calls)}
+
+    async def run():
+        first = await cache.get_or_fill("power:a", 60, fill)
+        second = await cache.get_or_fill("power:a", 60, fill)
+        return first, second
+
+    (value, _, source), (cached, _, cached_source) = asyncio.run(run())
+    assert (value, source) == ({"n": 1}, "filled")
+    assert (cached, cached_source) == ({"n": 1}, "hit")
+    assert calls == [1]
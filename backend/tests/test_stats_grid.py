@@ -0,0 +1,125 @@
+"""
+Stats summary grid: cell selection, fill splitting and ingestion
+Only cells lying completely inside a fetched bbox are rebuilt; the grid
+drops expired cells and holds at most max_cells.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import pytest
+
+from app.services import stats_grid as grid_module
+from app.services.overpass_service import calculate_bbox_diagonal, haversine_distance
+from app.services.stats_grid import (
+    KM_TO_MILES,
+    StatsGrid,
+    cells_bbox,
+    cells_covering,
+    cells_inside,
+    split_cells,
+)
+
+# Two by two cells: rows 3890-3891, columns -9470 to -9469
+BBOX = (38.90, -94.70, 38.92, -94.68)
+# Just inside BBOX, so it intersects the same four cells
+VIEW = (38.901, -94.699, 38.919, -94.681)
+
+
+def point(lon, lat, voltage=None):
+    properties = {"power": "transformer"}
+    if voltage is not None:
+        properties["voltage"] = voltage
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [lon, lat]}, "properties": properties}
+
+
+def line(coordinates, power="minor_line", voltage=None):
+    properties = {"power": power}
+    if voltage is not None:
+        properties["voltage"] = voltage
+    return {"type": "Feature", "geometry": {"type": "LineString", "coordinates": coordinates}, "properties": properties}
+
+
+def test_cells_inside():
+    # Grid-aligned edges, including values that aren't exact in binary (38.95 * 100)
+    assert cells_inside(BBOX) == [(3890, -9470), (3890, -9469), (3891, -9470), (3891, -9469)]
+    assert len(cells_inside((38.90, -94.70, 38.95, -94.65))) == 25
+    # Partial cells at every edge are left out
+    assert cells_inside((38.905, -94.705, 38.925, -94.675)) == [(3891, -9470), (3891, -9469)]
+    assert cells_inside((38.901, -94.70, 38.909, -94.69)) == []
+    # ...but still intersect the bbox
+    assert len(cells_covering((38.905, -94.705, 38.925, -94.675))) == 12
+
+
+def test_split_cells():
+    cells = cells_inside((38.90, -94.80, 38.94, -94.60))
+    assert len(cells) == 80
+    assert split_cells(cells, lambda bbox: True) == [cells]
+
+    groups = split_cells(cells, lambda bbox: calculate_bbox_diagonal(bbox) <= 10)
+    assert sorted(cell for group in groups for cell in group) == sorted(cells)
+    assert all(calculate_bbox_diagonal(cells_bbox(group)) <= 10 for group in groups)
+    # Halved once, along the longer (east-west) side
+    assert [len(group) for group in groups] == [40, 40]
+    assert all({row for row, _ in group} == {3890, 3891, 3892, 3893} for group in groups)
+
+    # A lone cell always fits
+    assert split_cells(cells[:2], lambda bbox: False) == [[cells[1]], [cells[0]]]
+
+
+def test_ingest_and_summarize():
+    grid = StatsGrid()
+    features = [
+        point(-94.695, 38.905, "12470"),
+        point(-94.685, 38.915),
+        # Outside the bbox - ignored
+        point(-94.675, 38.905, "69000"),
+        # One segment per cell, both in the bottom row
+        line([[-94.699, 38.905], [-94.691, 38.905], [-94.681, 38.905]], voltage="7200"),
+        # Its midpoint is outside the bbox
+        line([[-94.685, 38.915], [-94.665, 38.915]], power="line", voltage="161000"),
+    ]
+    assert grid.ingest(BBOX, features) == 4
+
+    stats = grid.summarize(VIEW)
+    miles = (
+        haversine_distance((38.905, -94.699), (38.905, -94.691))
+        + haversine_distance((38.905, -94.691), (38.905, -94.681))
+    ) * KM_TO_MILES
+    assert stats["distribution_miles"] == round(miles, 2)
+    assert stats["transmission_miles"] == 0
+    assert stats["transformer_count"] == 2
+    assert (stats["lowest_voltage"], stats["highest_voltage"]) == (7200, 12470)
+    assert stats["grid_bbox"] == pytest.approx(list(BBOX))
+    assert stats["cells"] == 4
+
+    # A fetch over partial cells leaves the grid alone
+    assert grid.ingest((38.905, -94.705, 38.909, -94.675), [point(-94.695, 38.906)]) == 0
+    assert grid.summarize(VIEW)["transformer_count"] == 2
+
+
+def test_missing_cells_drop_expired(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(grid_module.time, "time", lambda: now[0])
+    grid = StatsGrid(ttl=60)
+    grid.ingest(BBOX, [])
+    assert grid.missing_cells(VIEW) == []
+    assert len(grid.missing_cells((38.901, -94.699, 38.919, -94.671))) == 2
+
+    now[0] += 30
+    grid.ingest((38.92, -94.70, 38.93, -94.68), [])
+    now[0] += 31
+    # The first fetch expired; the later one is still fresh
+    assert len(grid.missing_cells((38.901, -94.699, 38.929, -94.681))) == 4
+    assert grid.info() == {"cells": 2, "max_cells": grid.max_cells}
+
+
+def test_max_cells():
+    grid = StatsGrid(max_cells=6)
+    grid.ingest(BBOX, [])
+    grid.ingest((38.92, -94.70, 38.93, -94.68), [])
+    # Rebuilding cells moves them to the back
+    grid.ingest(BBOX, [])
+    grid.ingest((38.93, -94.70, 38.94, -94.68), [])
+    assert grid.info()["cells"] == 6
+    assert grid.missing_cells((38.921, -94.699, 38.929, -94.681)) == [(3892, -9470), (3892, -9469)]
+    assert grid.missing_cells(VIEW) == []
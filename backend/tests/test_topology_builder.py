@@ -0,0 +1,143 @@
+"""
+Snapping, union-find components and FEEDS orientation on a small graph
+A transmission line feeds a distribution line with two transformers
+tapped onto its middle, a line crossing it without touching, and a line
+clipped to the boundary (a MultiLineString) whose second part reaches
+another line.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import pytest
+
+from app.services.topology_builder import (
+    SpatialHash,
+    build_component_records,
+    build_topology,
+    connected_components,
+    infer_connections,
+    orient_feeds,
+)
+
+# ~4 m east of a point at this latitude
+NUDGE = 0.00005
+
+
+def line(osm_id, coordinates, power="minor_line", voltage="12470"):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "LineString", "coordinates": coordinates},
+        "properties": {"osm_id": osm_id, "power": power, "voltage": voltage},
+    }
+
+
+def transformer(osm_id, lon, lat):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": {"osm_id": osm_id, "power": "transformer", "voltage": "7200"},
+    }
+
+
+FEATURES = [
+    line(1, [[-94.70, 38.90], [-94.68, 38.90]], power="line", voltage="161000"),
+    line(2, [[-94.68 + NUDGE, 38.90], [-94.67, 38.90], [-94.66, 38.90]]),
+    # Tapped onto the middle vertex of line 2, ~6 m and ~11 m away (and ~6 m from each other)
+    transformer(3, -94.67, 38.90005),
+    transformer(4, -94.67, 38.9001),
+    # Crosses line 2 between its vertices
+    line(5, [[-94.665, 38.89], [-94.665, 38.90], [-94.665, 38.91]]),
+    {
+        "type": "Feature",
+        "geometry": {
+            "type": "MultiLineString",
+            "coordinates": [
+                [[-94.66, 38.90], [-94.65, 38.90]],
+                [[-94.60, 38.95], [-94.59, 38.95]],
+            ],
+        },
+        "properties": {"osm_id": 6, "power": "minor_line", "voltage": "12470", "clipped": True},
+    },
+    line(7, [[-94.58, 38.95], [-94.59 + NUDGE, 38.95]]),
+]
+
+CONNECTIONS = [
+    ("osm-node-3", "osm-way-2"),
+    ("osm-node-4", "osm-way-2"),
+    ("osm-way-1", "osm-way-2"),
+    ("osm-way-2", "osm-way-6"),
+    ("osm-way-6", "osm-way-7"),
+]
+
+
+def test_spatial_hash_radius():
+    index = SpatialHash(15.0, 38.9)
+    index.insert(-94.67, 38.90, "a")
+    index.insert_many([[-94.67, 38.9001], [-94.67, 38.9002]], "b")
+    assert sorted(index.query(-94.67, 38.90005, 15.0)) == ["a", "b"]
+    # ~17 m from "a", ~6 m from both of "b"'s vertices
+    assert index.query(-94.67, 38.90015, 6.0) == ["b", "b"]
+    assert index.query(-94.67, 38.90015, 5.0) == []
+    assert index.query(-94.60, 38.90, 15.0) == []
+
+
+def test_infer_connections():
+    assert infer_connections(FEATURES) == CONNECTIONS
+    assert infer_connections([]) == []
+
+
+def test_tighter_tolerance_drops_far_tap():
+    # Transformer 4 is ~11 m from line 2
+    assert ("osm-node-4", "osm-way-2") not in infer_connections(FEATURES, tolerance_m=8.0)
+    assert ("osm-node-3", "osm-way-2") in infer_connections(FEATURES, tolerance_m=8.0)
+
+
+def test_unsupported_geometry_rejected():
+    polygon = {
+        "type": "Feature",
+        "geometry": {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]},
+        "properties": {"osm_id": 8, "power": "minor_line"},
+    }
+    with pytest.raises(ValueError):
+        infer_connections([FEATURES[0], polygon])
+
+
+def test_connected_components():
+    ids = [f"osm-way-{n}" for n in (1, 2, 5, 6, 7)] + ["osm-node-3", "osm-node-4"]
+    labels = connected_components(ids, CONNECTIONS)
+    assert labels["osm-way-5"] == 1
+    assert {labels[node] for node in ids if node != "osm-way-5"} == {0}
+    # Isolated nodes are numbered by id after the larger components
+    assert connected_components(["b", "a", "c"], [("b", "c")]) == {"b": 0, "c": 0, "a": 1}
+
+
+def test_orient_feeds_from_transmission():
+    assert orient_feeds(FEATURES, CONNECTIONS) == [
+        ("osm-way-2", "osm-node-3"),
+        ("osm-way-2", "osm-node-4"),
+        ("osm-way-1", "osm-way-2"),
+        ("osm-way-2", "osm-way-6"),
+        ("osm-way-6", "osm-way-7"),
+    ]
+
+
+def test_orient_feeds_without_transmission_by_voltage():
+    features = [line(1, [[0, 0], [1, 0]], voltage="4160"), line(2, [[1, 0], [2, 0]], voltage="34500")]
+    assert orient_feeds(features, [("osm-way-1", "osm-way-2")]) == [("osm-way-2", "osm-way-1")]
+
+
+def test_multilinestring_record_on_longest_part():
+    clipped = line(6, [[[-94.66, 38.90], [-94.65, 38.90]], [[-94.60, 38.95], [-94.595, 38.95], [-94.59, 38.95]]])
+    clipped["geometry"]["type"] = "MultiLineString"
+    record = build_component_records([clipped])[0]
+    assert (record["longitude"], record["latitude"]) == (-94.595, 38.95)
+
+
+def test_build_topology():
+    topology = build_topology(FEATURES)
+    assert topology["edges"] == [list(edge) for edge in orient_feeds(FEATURES, CONNECTIONS)]
+    assert topology["components"][0] == {
+        "id": 0, "size": 6, "lines": 1, "minor_lines": 3, "transformers": 2,
+    }
+    assert topology["stats"]["component_count"] == 2
+    assert topology["stats"]["isolated_count"] == 1
@@ -0,0 +1,75 @@
+"""
+Downstream count memoization in the topology cache
+Uses a small graph where one component has two feeders, so the forest
+precomputation is skipped and counts come from the per-(node, depth) memo.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import pytest
+
+from app.services.topology_cache import TopologyCache, _Topology
+
+
+NODES = [
+    {"id": "gen", "type": "PowerGeneration"},
+    {"id": "sub-a", "type": "DistributionSubstation"},
+    {"id": "sub-b", "type": "DistributionSubstation"},
+    {"id": "xfmr", "type": "LocalTransformer"},
+    {"id": "bldg-1", "type": "Building"},
+    {"id": "bldg-2", "type": "Building"},
+]
+EDGES = [
+    ("gen", "sub-a"),
+    ("gen", "sub-b"),
+    ("sub-a", "xfmr"),
+    ("sub-b", "xfmr"),
+    ("xfmr", "bldg-1"),
+    ("xfmr", "bldg-2"),
+]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Loaded cache whose topology counts its BFS walks"""
+    topology = _Topology("test-1", NODES, EDGES)
+    assert topology._subtree_counts is None  # Two feeders - not a forest
+
+    walks = []
+    walk = topology.downstream
+
+    def counting_downstream(node, max_depth=None):
+        walks.append((node, max_depth))
+        return walk(node, max_depth)
+
+    monkeypatch.setattr(topology, "downstream", counting_downstream)
+    cache = TopologyCache(enabled=True)
+    cache._topology = topology
+    cache.walks = walks
+    return cache
+
+
+def test_unlimited_counts_walk_once(cache):
+    expected = {"DistributionSubstation": 2, "LocalTransformer": 1, "Building": 2}
+    assert cache.downstream_counts("gen") == expected
+    assert cache.downstream_counts("gen") == expected
+    assert len(cache.walks) == 1
+
+
+def test_depth_at_least_node_count_is_unlimited(cache):
+    cache.downstream_counts("gen")
+    # The service always passes its default hop limit; past the node count it is the unlimited count
+    assert cache.downstream_counts("gen", 100) == cache.downstream_counts("gen", None)
+    assert cache.walks == [(0, None)]
+
+
+def test_limited_counts_memoized_per_depth(cache):
+    assert cache.downstream_counts("gen", 1) == {"DistributionSubstation": 2}
+    assert cache.downstream_counts("gen", 1) == {"DistributionSubstation": 2}
+    assert cache.downstream_counts("gen", 2) == {"DistributionSubstation": 2, "LocalTransformer": 1}
+    assert cache.walks == [(0, 1), (0, 2)]
+
+
+def test_counts_are_copies(cache):
+    cache.downstream_counts("gen")["Building"] = 0
+    assert cache.downstream_counts("gen")["Building"] == 2
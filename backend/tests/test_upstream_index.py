@@ -0,0 +1,128 @@
+"""
+Upstream index solver on graphs with cycles
+Every traversal and FEEDS row order must store the same pointers, and
+the pointers must chain back to the source. The stored index is only used
+while the topology fingerprint it was stamped with still matches.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import random
+
+from app.services.upstream_index import UNREACHABLE, _write_rows, path_from_index, solve_upstream
+
+
+TYPES = {
+    "gen": "PowerGeneration",
+    "gen-2": "PowerGeneration",
+    "loop-a": "DistributionSubstation",
+    "loop-b": "DistributionSubstation",
+    "loop-c": "DistributionSubstation",
+    "tap": "LocalTransformer",
+    "bldg": "Building",
+    "island-a": "DistributionLine",
+    "island-b": "DistributionLine",
+}
+EDGES = [
+    ("gen", "gen-2"),
+    ("gen", "loop-a"),
+    ("gen-2", "loop-b"),
+    ("loop-a", "loop-b"),
+    ("loop-b", "loop-c"),
+    ("loop-c", "loop-a"),
+    ("loop-c", "tap"),
+    ("loop-a", "tap"),
+    ("tap", "bldg"),
+    ("bldg", "bldg"),
+    ("island-a", "island-b"),
+    ("island-b", "island-a"),
+]
+
+
+def solve(seed):
+    rng = random.Random(seed)
+    ids = list(TYPES)
+    edges = list(EDGES)
+    rng.shuffle(ids)
+    rng.shuffle(edges)
+    parents = {}
+    for source, target in edges:
+        parents.setdefault(target, []).append(source)
+    return solve_upstream(ids, TYPES, parents)
+
+
+def test_order_independent():
+    expected = solve(0)
+    for seed in range(1, 30):
+        assert solve(seed) == expected
+
+
+def test_pointers_chain_to_source():
+    solved = solve(0)
+    for node, (parent, source, depth) in solved.items():
+        if depth == UNREACHABLE:
+            assert parent is None and source is None
+            continue
+        chain = [node]
+        while solved[chain[-1]][0] is not None:
+            chain.append(solved[chain[-1]][0])
+            assert len(chain) <= len(solved)
+        assert chain[-1] == source
+        assert len(chain) - 1 == depth
+
+
+def test_cycle_without_source_unreachable():
+    solved = solve(0)
+    assert solved["island-a"] == (None, None, UNREACHABLE)
+    assert solved["island-b"] == (None, None, UNREACHABLE)
+    assert solved["gen"] == (None, "gen", 0)
+
+
+class FakeResult(list):
+    def single(self):
+        return self[0] if self else None
+
+    def consume(self):
+        return None
+
+
+class FakeSession:
+    """Topology meta, count queries and the index stamp - nothing else"""
+
+    def __init__(self):
+        self.version = 3
+        self.nodes = len(TYPES)
+        self.edges = len(EDGES)
+        self.stamp = None
+
+    def execute_write(self, work):
+        return work(self)
+
+    def run(self, query, **params):
+        if "SET i.topology_version" in query:
+            self.stamp = params["version"]
+        elif "RETURN m.version" in query:
+            return FakeResult([{"version": self.version}])
+        elif "count(n)" in query:
+            return FakeResult([{"count": self.nodes}])
+        elif "count(r)" in query:
+            return FakeResult([{"count": self.edges}])
+        elif "i.topology_version = $version" in query:
+            if params["version"] != self.stamp:
+                return FakeResult()
+            return FakeResult([{"depth": 0, "nodes": None}])
+        return FakeResult()
+
+
+def test_index_stamped_with_topology_fingerprint():
+    session = FakeSession()
+    _write_rows(session, solve(0), batch_size=4)
+    assert session.stamp == f"3:{len(TYPES)}:{len(EDGES)}"
+    assert path_from_index(session, "gen") == []
+
+    # FEEDS written without bump_topology_version - still stale
+    session.edges += 1
+    assert path_from_index(session, "gen") is None
+    session.edges -= 1
+    session.version += 1
+    assert path_from_index(session, "gen") is None
@@ -0,0 +1,138 @@
+"""
+View tokens and pan deltas for /power responses
+Tokens are content hashes of the feature key set; a known `since` token
+turns the response into added features and removed keys.
+
+Run from backend/: python -m pytest -q tests
+"""
+
+import pytest
+
+from app.services import view_delta
+from app.services.shared_cache import SharedCache
+from app.services.view_delta import ViewIndex, feature_key
+
+
+@pytest.fixture(autouse=True)
+def no_shared_cache(monkeypatch):
+    monkeypatch.setattr(view_delta, "shared_cache", None)
+
+
+def line(osm_id, power="minor_line"):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "LineString", "coordinates": [[-94.7, 38.9], [-94.69, 38.91]]},
+        "properties": {"osm_id": osm_id, "power": power},
+    }
+
+
+def transformer(osm_id):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [-94.7, 38.9]},
+        "properties": {"osm_id": osm_id, "power": "transformer"},
+    }
+
+
+def result(*features):
+    return {"geojson": {"type": "FeatureCollection", "features": list(features)}, "stats": {"n": len(features)}}
+
+
+def layered(distribution, transformers):
+    return {
+        "distribution": {"type": "FeatureCollection", "features": list(distribution)},
+        "transformers": {"type": "FeatureCollection", "features": list(transformers)},
+        "layers": ["distribution", "transformers"],
+        "stats": {},
+    }
+
+
+def test_feature_keys_per_element_type():
+    assert feature_key(line(7)) == "way/7"
+    assert feature_key(transformer(7)) == "node/7"
+
+
+def test_token_is_stable():
+    index = ViewIndex()
+    first = index.respond(result(line(1), line(2), transformer(3)))["view"]
+    # Another object, another order - same content
+    assert index.respond(result(transformer(3), line(2), line(1)))["view"] == first
+    assert ViewIndex().respond(result(line(1), line(2), transformer(3)))["view"] == first
+    assert index.respond(result(line(1), line(2)))["view"] != first
+    # Same id, other element type
+    assert index.respond(result(line(1), line(2), line(3)))["view"] != first
+    assert index.info()["views"] == 3
+
+
+def test_delta_for_overlapping_views():
+    index = ViewIndex()
+    before = index.respond(result(line(1), line(2), transformer(3)))
+    after = result(line(2), transformer(3), line(4), transformer(5))
+    delta = index.respond(after, since=before["view"])
+
+    assert delta["delta"] is True
+    assert delta["since"] == before["view"]
+    assert delta["view"] == index.respond(after)["view"]
+    assert [feature_key(f) for f in delta["added"]["features"]] == ["way/4", "node/5"]
+    assert delta["removed"] == ["way/1"]
+    assert delta["stats"] == after["stats"]
+    assert "geojson" not in delta
+    assert index.info()["deltas"] == 1
+
+
+def test_unknown_or_expired_token_falls_back():
+    index = ViewIndex(ttl=60)
+    full = index.respond(result(line(1)), since="not-a-token")
+    assert full["delta"] is False
+    assert full["geojson"]["features"] == [line(1)]
+
+    token = index.respond(result(line(1)))["view"]
+    entry = index._views[token]
+    index._views[token] = (entry[0], entry[1] - 61)
+    assert index.respond(result(line(2)), since=token)["delta"] is False
+    assert index.info()["fallbacks"] == 2
+
+
+def test_layered_memo_entries():
+    index = ViewIndex()
+    distribution = [line(1), line(2)]
+    transformers = [transformer(3)]
+    response = layered(distribution, transformers)
+    token = index.respond(response)["view"]
+
+    # One entry per layer collection (no token of their own) plus the layer combination
+    tokens = sorted(entry[1] for entry in index._datasets.values())
+    assert tokens == ["", "", token]
+    # Same token as the same features in the single-collection shape
+    assert ViewIndex().respond(result(*distribution, *transformers))["view"] == token
+
+    # A one-layer request on the same cached collection gets a real token, not the per-layer ""
+    single = {"distribution": response["distribution"], "layers": ["distribution"], "stats": {}}
+    assert index.respond(single)["view"] == ViewIndex().respond(result(*distribution))["view"]
+
+    delta = index.respond(layered([line(2)], [transformer(3), transformer(4)]), since=token)
+    assert delta["layers"] == ["distribution", "transformers"]
+    assert delta["removed"] == ["way/1"]
+    assert [feature_key(f) for f in delta["added"]["features"]] == ["node/4"]
+
+
+def test_oldest_tokens_evicted_past_max_keys():
+    index = ViewIndex(max_keys=5)
+    first = index.respond(result(line(1), line(2), line(3)))["view"]
+    second = index.respond(result(line(4), line(5)))["view"]
+    assert index.info()["feature_keys"] == 5
+
+    index.respond(result(line(6), line(7)))
+    assert index.info() == {"views": 2, "feature_keys": 4, "deltas": 0, "fallbacks": 0}
+    assert index.respond(result(line(5)), since=second)["delta"] is True
+    assert index.respond(result(line(1)), since=first)["delta"] is False
+
+
+def test_token_from_another_worker(monkeypatch, tmp_path):
+    pytest.importorskip("fcntl")
+    monkeypatch.setattr(view_delta, "shared_cache", SharedCache(str(tmp_path / "cache"), size_mb=1))
+    token = ViewIndex().respond(result(line(1), line(2)))["view"]
+
+    delta = ViewIndex().respond(result(line(2), line(3)), since=token)
+    assert delta["delta"] is True
+    assert delta["removed"] == ["way/1"]
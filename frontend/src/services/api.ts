@@ -4,7 +4,7 @@
  */
 
 import axios from 'axios';
-import type { FeatureCollection } from 'geojson';
+import type { Feature, FeatureCollection } from 'geojson';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -31,11 +31,49 @@ export const getBoundary = async (): Promise<FeatureCollection> => {
   return response.data;
 };
 
+export type PowerLayer = 'transmission' | 'distribution' | 'transformers';
+
+type PowerLayers = Record<PowerLayer, FeatureCollection>;
+
+const LAYER_BY_POWER: Record<string, PowerLayer> = {
+  line: 'transmission',
+  minor_line: 'distribution',
+  transformer: 'transformers',
+};
+
+// Last full view per layer set, so the next request only asks for what changed (`since=`)
+const lastViews = new Map<string, { token: string; layers: PowerLayers }>();
+
+/** Same key as the backend's view_delta.feature_key, e.g. "way/123" or "node/456" */
+const featureKey = (feature: Feature): string =>
+  `${feature.geometry.type === 'Point' ? 'node' : 'way'}/${feature.properties?.osm_id}`;
+
+/** Previous view's layers minus the removed features, plus the added ones */
+const applyDelta = (previous: PowerLayers, added: FeatureCollection, removed: string[]): PowerLayers => {
+  const removedKeys = new Set(removed);
+  const next = {} as PowerLayers;
+  for (const layer of Object.keys(previous) as PowerLayer[]) {
+    next[layer] = {
+      type: 'FeatureCollection',
+      features: previous[layer].features.filter((feature) => !removedKeys.has(featureKey(feature))),
+    };
+  }
+  for (const feature of added.features) {
+    const layer = LAYER_BY_POWER[feature.properties?.power];
+    if (layer && next[layer]) next[layer].features.push(feature);
+  }
+  return next;
+};
+
 /**
- * Get power infrastructure for bounding box
+ * Get power infrastructure for bounding box (only the requested layers are fetched)
+ *
+ * Sends the previous response's view token, so panning only transfers the
+ * features entering the view (and the keys of those leaving it).
  */
 export const getPowerInfrastructure = async (
-  bbox: string
+  bbox: string,
+  layers: PowerLayer[] = ['transmission', 'distribution', 'transformers']
 ): Promise<{
   transmission: FeatureCollection;
   distribution: FeatureCollection;
@@ -48,15 +86,26 @@ export const getPowerInfrastructure = async (
     lowest_voltage: number | null;
   };
 }> => {
+  const layerKey = layers.join(',');
+  const previous = lastViews.get(layerKey);
   const response = await api.get('/api/op/power', {
-    params: { bbox },
+    params: { bbox, layers: layerKey, since: previous?.token },
   });
   // Map backend response to frontend expected format
   const data = response.data;
+  const empty = (): FeatureCollection => ({ type: 'FeatureCollection', features: [] });
+  const result: PowerLayers = data.delta && previous
+    ? applyDelta(previous.layers, data.added, data.removed)
+    : {
+        transmission: data.transmission || data.geojson || empty(),
+        distribution: data.distribution || empty(),
+        transformers: data.transformers || empty(),
+      };
+  if (data.view) {
+    lastViews.set(layerKey, { token: data.view, layers: result });
+  }
   return {
-    transmission: data.transmission || data.geojson || { type: 'FeatureCollection', features: [] },
-    distribution: data.distribution || { type: 'FeatureCollection', features: [] },
-    transformers: data.transformers || { type: 'FeatureCollection', features: [] },
+    ...result,
     stats: {
       transmission_miles: data.stats?.transmission_miles || 0,
       distribution_miles: data.stats?.distribution_miles || 0,
@@ -67,4 +116,38 @@ export const getPowerInfrastructure = async (
   };
 };
 
+export interface PowerStreamHandlers {
+  onTile: (geojson: FeatureCollection, progress: { done: number; total: number }) => void;
+  onStats?: (stats: Record<string, number | null>) => void;
+  onError?: (message: string) => void;
+}
+
+/**
+ * Stream power infrastructure tile by tile (Server-Sent Events)
+ * Cached tiles arrive immediately, the rest as they are fetched.
+ * Returns a function that closes the stream.
+ */
+export const streamPowerInfrastructure = (bbox: string, handlers: PowerStreamHandlers): (() => void) => {
+  const source = new EventSource(`${API_BASE_URL}/api/op/power/stream?bbox=${encodeURIComponent(bbox)}`);
+  source.addEventListener('tile', (event) => {
+    const data = JSON.parse((event as MessageEvent).data);
+    handlers.onTile(data.geojson, data.progress);
+  });
+  source.addEventListener('stats', (event) => {
+    handlers.onStats?.(JSON.parse((event as MessageEvent).data).stats);
+    source.close();
+  });
+  source.addEventListener('error', (event) => {
+    const data = (event as MessageEvent).data;
+    if (data) {
+      handlers.onError?.(JSON.parse(data).error);
+    } else {
+      // Connection dropped - EventSource would reconnect and restart the whole view
+      handlers.onError?.('Stream connection lost');
+      source.close();
+    }
+  });
+  return () => source.close();
+};
+
 export default api;